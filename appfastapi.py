@@ -1,4 +1,6 @@
 from fastapi import FastAPI
+import asyncio
+import logging
 from fastapi.staticfiles import StaticFiles
 from fastapi.routing import APIRoute
 import os
@@ -13,6 +15,10 @@ if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
 from src.routes.registry import ROUTE_CONFIG
+from src.routes.instrumentation import instrument_app
+from synthaticTaxiData.async_db import close_pool
+from synthaticTaxiData.demand_supply_cube import warm_cube
+from src.routes.job_queue import recover_orphans
 
 app = FastAPI(
     title="Taxi Simulation API",
@@ -31,6 +37,30 @@ app.add_middleware(
 os.makedirs(MAP_DIR, exist_ok=True)
 app.mount("/map_file", StaticFiles(directory=MAP_DIR), name="map_file")
 
+async def warm_cube_in_background():
+    try:
+        await asyncio.to_thread(warm_cube)
+    except Exception:
+        logging.getLogger(__name__).exception("Demand/supply cube not loaded")
+
+@app.on_event("startup")
+async def load_demand_supply_cube():
+    # Loaded in the background so startup does not wait for it; hex-count
+    # reads fall back to the pyramid / raw points until (or if) it is loaded
+    app.state.cube_task = asyncio.create_task(warm_cube_in_background())
+
+@app.on_event("startup")
+async def fail_orphaned_jobs():
+    # Jobs left queued/running by a worker that exited will never finish
+    try:
+        await asyncio.to_thread(recover_orphans)
+    except Exception:
+        logging.getLogger(__name__).exception("Orphaned background jobs not recovered")
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    await close_pool()
+
 @app.get("/health", tags=["Health"])
 def health_check():
     return {"status": "ok"}
@@ -57,3 +87,6 @@ for route in ROUTE_CONFIG:
         prefix=f"{API_PREFIX}{route['prefix']}",
         tags=route["tags"],
     )
+
+# Timing / SQL / OSRM metrics, /metrics and ?profile=1 (after routers are registered)
+instrument_app(app)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, date
+from typing import Callable, Dict, Optional
 
 try:
     from h3 import h3
@@ -25,10 +26,11 @@ if DATA_DIR not in sys.path:
 from schema import ALL_TABLES, HEX_LIST  # type: ignore
 import rider_driver  # type: ignore
 import trip  # type: ignore
-import save_hex_counts_mysql  # type: ignore
-import store_daily_count_rid_dri  # type: ignore
-import store_hrly_count_rid_dri  # type: ignore
+import city_sim  # type: ignore
+import incremental_aggregate  # type: ignore
+import trip_summary  # type: ignore
 from db_config import get_connection as mysql_get_connection  # type: ignore
+from db_utils import ensure_drivers_schema, ensure_trips_schema  # type: ignore
 
 
 def get_conn():
@@ -47,6 +49,10 @@ def init_db() -> None:
     for ddl in ALL_TABLES:
         cur.execute(ddl)
 
+    # Generated columns / indexes missing from a pre-existing trips/drivers table
+    ensure_trips_schema(conn)
+    ensure_drivers_schema(conn)
+
     # Populate h3_hexes with basic metadata for each hex in HEX_LIST
     # (center_lat/lon, area, etc.).
     conn.commit()
@@ -105,6 +111,9 @@ def init_db() -> None:
     conn.commit()
     cur.close()
     conn.close()
+
+    # hex_counts tables and the wide compatibility views over them
+    incremental_aggregate.ensure_views()
     print(f"Initialized database '{DB_NAME}' with core tables and {len(HEX_LIST)} hexes.")
 
 
@@ -135,48 +144,65 @@ def generate_trips(
     batch_size: int = 1000,
     progress_every: int = 100,
     verbose: bool = False,
+    on_commit: Optional[Callable[[int, int], None]] = None,
+    engine: str = "db",
 ) -> None:
     """
     Programmatic API: generate trips for a given date.
 
+    engine="db" creates trips one by one against MySQL (trip.py);
+    engine="sim" runs the day in memory (city_sim) and bulk-inserts it.
+
     Example:
         from dataApp import generate_trips
         from datetime import date
         generate_trips(trip_date=date(2025, 11, 17), num_rides=3000)
     """
+    if engine == "sim":
+        city_sim.simulate_trips_for_date(trip_date, num_rides, batch_size=batch_size, on_commit=on_commit)
+        return
     trip.create_trips_for_date(
         target_date=trip_date,
         num_rides=num_rides,
         batch_size=batch_size,
         progress_every=progress_every,
         verbose=verbose,
+        on_commit=on_commit,
     )
 
 
-def aggregate(*, target_date: date) -> None:
+def aggregate(*, target_date: Optional[date] = None, rebuild: bool = False) -> Dict[str, Dict]:
     """
-    Programmatic API: run all aggregations for a given date.
-
-    Runs:
-    - Trip H3 daily & hourly counts (save_hex_counts_mysql)
-    - Rider/driver daily and hourly hex counts (store_daily_count_rid_dri,
-      store_hrly_count_rid_dri)
+    Programmatic API: bring all aggregates up to date.
+
+    Folds only the riders / drivers / trips rows added since the last run
+    (incremental_aggregate) into the daily and hourly totals and hex_counts,
+    so the cost is proportional to the new rows, not to the days they fall
+    on; only days with moved drivers are recounted. target_date is
+    deprecated and only used for logging: every new row is folded whatever
+    its date. rebuild=True recounts every source from scratch.
+
+    trip_daily_summary rows counted under an older definition (every day,
+    with rebuild=True) are recounted here too; the summary reads never
+    write them.
     """
-    target_date_str = target_date.strftime("%Y-%m-%d")
-    print(f"Running trip H3 aggregations for {target_date_str}...")
-    save_hex_counts_mysql.process_daily(target_date)
-    save_hex_counts_mysql.process_hourly(target_date)
+    label = target_date.strftime("%Y-%m-%d") if target_date else "all dates"
+    print(f"Running incremental aggregations ({label})...")
+    results = incremental_aggregate.fold_all(rebuild=rebuild)
+    for source, result in results.items():
+        print(f"{source}: folded {result['rows']} new rows")
+
+    conn = get_conn()
+    try:
+        rebuilt = trip_summary.rebuild_stale_days(conn, all_days=rebuild)
+    finally:
+        conn.close()
+    print(f"trip_daily_summary: rebuilt {len(rebuilt)} days")
 
-    # Entity-based (riders/drivers) daily & hourly hex counts
-    for entity in ("riders", "drivers"):
-        print(f"Running DAILY hex counts for {entity} on {target_date_str}...")
-        store_daily_count_rid_dri.process_entity(entity, target_date)
+    print(f"All aggregations completed ({label}).")
+    return results
 
-    for entity in ("riders", "drivers"):
-        print(f"Running HOURLY hex counts for {entity} on {target_date_str}...")
-        store_hrly_count_rid_dri.process_entity(entity, target_date)
 
-    print(f"All aggregations completed for {target_date_str}.")
 # # insert with single single date-----------------------------------------------------
 # def main() -> None:
 #     """
@@ -0,0 +1,97 @@
+"""
+Load test for the read endpoints against a locally running API.
+
+Fires --requests GET requests with --concurrency in flight at once,
+cycling over the chosen endpoints and --days consecutive Mondays from
+--start, and prints throughput plus latency percentiles per endpoint.
+
+Start the API with the response cache disabled to measure the database
+path rather than cache hits:
+
+    RESPONSE_CACHE_TTL=0 uvicorn appfastapi:app --port 8000
+    python load_test.py --concurrency 200 --requests 5000
+
+X-Cache HIT/MISS counts are reported so a warm cache is easy to spot.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import aiohttp
+import numpy as np
+
+API_PREFIX = "/api/v1"
+ENDPOINTS = {
+    "trip_summary": "/summary/trip-summary/",
+    "mondays": "/trip-summary-mondays/trip-summary-mondays/",
+    "daily": "/stats/rider-driver/daily",
+    "hourly": "/stats/rider-driver/hourly",
+}
+
+
+async def worker(session, base_url, jobs, stats):
+    for name, report_date in jobs:
+        url = f"{base_url}{API_PREFIX}{ENDPOINTS[name]}"
+        t0 = time.perf_counter()
+        try:
+            async with session.get(url, params={"report_date": report_date}) as resp:
+                await resp.read()
+                ok = resp.status == 200
+                cache = resp.headers.get("X-Cache", "-")
+        except aiohttp.ClientError:
+            ok, cache = False, "-"
+        s = stats[name]
+        s["latency"].append(time.perf_counter() - t0)
+        s["errors"] += not ok
+        s[cache] += 1
+
+
+async def run(args) -> None:
+    start = date.fromisoformat(args.start)
+    dates = [(start + timedelta(weeks=i)).isoformat() for i in range(args.days)]
+    plan = list(itertools.islice(itertools.cycle(itertools.product(args.endpoints, dates)), args.requests))
+
+    # one shared iterator: each worker pulls the next request when it is free
+    jobs = iter(plan)
+    stats = defaultdict(lambda: defaultdict(int, latency=[]))
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(session, args.base_url, jobs, stats) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    print(f"{len(plan)} requests, concurrency {args.concurrency}, {elapsed:.2f}s, "
+          f"{len(plan) / elapsed:.0f} req/s overall")
+    print(f"{'endpoint':<14s} {'n':>6s} {'err':>5s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'hit':>6s} {'miss':>6s}")
+    for name in args.endpoints:
+        s = stats[name]
+        lat = np.asarray(s["latency"]) * 1000
+        if not lat.size:
+            continue
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        print(f"{name:<14s} {lat.size:>6d} {s['errors']:>5d} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} "
+              f"{s['HIT']:>6d} {s['MISS']:>6d}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--start", default="2025-07-07", help="first report date (a Monday)")
+    parser.add_argument("--days", type=int, default=7, help="number of weekly dates to cycle over")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
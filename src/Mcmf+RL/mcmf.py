@@ -1,51 +1,35 @@
 # mcmf.py
-import networkx as nx
-from dfinit import euclid_dist
+import numpy as np
+from dfinit import euclid_dist, hex_ids
+from transport import TransportSolver, distance_matrix
 
-def solve_min_cost_driver_relocation(df, per_hex_out_caps):
-    supply = {
-        r.HexID: int(r.Drivers - r.Riders)
-        for _, r in df.iterrows()
-        if r.Drivers > r.Riders
-    }
-    demand = {
-        r.HexID: int(r.Riders - r.Drivers)
-        for _, r in df.iterrows()
-        if r.Riders > r.Drivers
-    }
-
-    if not supply or not demand:
-        return []
-
-    G = nx.DiGraph()
-    SRC, SNK = "source", "sink"
-    G.add_node(SRC)
-    G.add_node(SNK)
+# Precomputed once: integer edge weights between every pair of hexes
+DIST = distance_matrix(hex_ids, euclid_dist)
+HEX_INDEX = {h: i for i, h in enumerate(hex_ids)}
+solver = TransportSolver(DIST)
 
-    for s, amt in supply.items():
-        cap = min(per_hex_out_caps.get(s, amt), amt)
-        if cap > 0:
-            G.add_edge(SRC, s, capacity=cap, weight=0)
 
-    for d, need in demand.items():
-        G.add_edge(d, SNK, capacity=need, weight=0)
+def relocate_drivers(riders, drivers, caps):
+    """
+    Array entry point: riders, drivers and caps are per-hex sequences in
+    dfinit.hex_ids order. Returns [(src_hex, dst_hex, drivers_moved), ...].
+    """
+    return [
+        (hex_ids[s], hex_ids[d], m)
+        for s, d, m in solver.solve(riders, drivers, caps)
+    ]
 
-    for s in supply:
-        for d in demand:
-            G.add_edge(s, d,
-                       capacity=9999,
-                       weight=int(round(euclid_dist(s, d))))
 
-    try:
-        flow = nx.max_flow_min_cost(G, SRC, SNK)
-    except Exception:
-        return []
-
-    moves = []
-    for s in supply:
-        for d in demand:
-            m = int(flow.get(s, {}).get(d, 0))
-            if m > 0:
-                moves.append((s, d, m))
-
-    return moves
+def solve_min_cost_driver_relocation(df, per_hex_out_caps):
+    idx = df["HexID"].map(HEX_INDEX).to_numpy()
+    riders = np.zeros(len(hex_ids), dtype=np.int64)
+    drivers = np.zeros(len(hex_ids), dtype=np.int64)
+    riders[idx] = df["Riders"].to_numpy()
+    drivers[idx] = df["Drivers"].to_numpy()
+
+    # Hexes without an explicit cap may ship their whole surplus
+    caps = np.maximum(drivers - riders, 0)
+    for h, cap in per_hex_out_caps.items():
+        caps[HEX_INDEX[h]] = cap
+
+    return relocate_drivers(riders, drivers, caps)
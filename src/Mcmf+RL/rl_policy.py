@@ -1,11 +1,24 @@
 # rl_policy.py
-import math, random
+import random
 import numpy as np
 from dfinit import MAX_CAP, HIDDEN, LR, hex_ids
 
 n_hex = len(hex_ids)
 n_options = MAX_CAP + 1
 
+
+def categorical_sample(probs):
+    """
+    Inverse-CDF categorical draw along the last axis of probs.
+
+    One uniform per row is compared against the cumulative sums, so any
+    leading batch shape (e.g. (B, n_hex)) is sampled in a single pass.
+    """
+    cdf = np.cumsum(probs, axis=-1)
+    u = np.random.random_sample(probs.shape[:-1] + (1,)) * cdf[..., -1:]
+    idx = (cdf < u).sum(axis=-1)
+    return np.minimum(idx, probs.shape[-1] - 1)
+
 class Policy:
     def __init__(self, state_dim, hidden=HIDDEN, lr=LR, seed=42):
         random.seed(seed)
@@ -25,20 +38,36 @@ class Policy:
         probs /= probs.sum(axis=1, keepdims=True)
         return probs, z, x
 
+    def forward_batch(self, states):
+        """states: (B, state_dim) -> probs (B, n_hex, n_options), z (hidden, B), x (state_dim, B)"""
+        x = np.asarray(states).reshape(len(states), -1).T
+        z = np.tanh(self.w1 @ x + self.b1)
+        logits = (self.w2 @ z + self.b2).T.reshape(-1, n_hex, n_options)
+        probs = np.exp(logits - logits.max(axis=2, keepdims=True))
+        probs /= probs.sum(axis=2, keepdims=True)
+        return probs, z, x
+
+    def sample_batch(self, states, eps=0.0, force_random=False):
+        """
+        Sample per-hex caps for a batch of states in one pass.
+        Returns caps (B, n_hex), logp (B,), probs, z, x.
+        """
+        probs, z, x = self.forward_batch(states)
+        caps = categorical_sample(probs)
+
+        explore = np.random.random_sample(caps.shape) < eps
+        if force_random:
+            explore[:] = True
+        caps[explore] = np.random.randint(n_options, size=int(explore.sum()))
+
+        chosen_p = np.take_along_axis(probs, caps[..., None], axis=2)[..., 0]
+        logp = np.log(chosen_p + 1e-12).sum(axis=1)
+        return caps, logp, probs, z, x
+
     def sample(self, state, eps=0.0, force_random=False):
-        probs, z, x = self.forward(state)
-        caps, logp, chosen = [], 0.0, []
-
-        for i in range(n_hex):
-            if force_random or random.random() < eps:
-                idx = random.randrange(n_options)
-            else:
-                idx = np.random.choice(n_options, p=probs[i])
-            caps.append(idx)
-            chosen.append(idx)
-            logp += math.log(probs[i][idx] + 1e-12)
-
-        return caps, logp, probs, z, x, chosen
+        caps, logp, probs, z, x = self.sample_batch(state[None], eps=eps, force_random=force_random)
+        caps = caps[0].tolist()
+        return caps, float(logp[0]), probs[0], z, x, list(caps)
 
     def update(self, dw1, db1, dw2, db2):
         self.w1 += self.lr * dw1
@@ -5,7 +5,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 
 from dfinit import *
-from mcmf import solve_min_cost_driver_relocation
+from mcmf import relocate_drivers
 from rl_policy import Policy
 
 # ----------------------------
@@ -30,53 +30,66 @@ class Forecaster:
 # Environment
 # ----------------------------
 class HexEnv:
+    """
+    Driver relocation env on integer-indexed NumPy arrays.
+
+    Hex i of the input DataFrame is row i of riders/drivers; `index` maps
+    HexID -> i for moves expressed in hex ids. `df` rebuilds the DataFrame
+    view on demand for reporting.
+    """
     def __init__(self, df, forecaster, seed=0):
-        self.base_df = df.copy()
-        self.df = df.copy()
+        self.hex_ids = list(df["HexID"])
+        self.index = {h: i for i, h in enumerate(self.hex_ids)}
+        self.base_riders = df["Riders"].to_numpy(dtype=np.int64).copy()
+        self.base_drivers = df["Drivers"].to_numpy(dtype=np.int64).copy()
+        self.riders = self.base_riders.copy()
+        self.drivers = self.base_drivers.copy()
         self.forecaster = forecaster
         random.seed(seed)
         np.random.seed(seed)
 
-        for _, r in self.df.iterrows():
-            self.forecaster.update(r.HexID, r.Riders)
+        for h, r in zip(self.hex_ids, self.base_riders):
+            self.forecaster.update(h, r)
+
+    @property
+    def df(self):
+        return pd.DataFrame({
+            "HexID": self.hex_ids,
+            "Riders": self.riders,
+            "Drivers": self.drivers,
+        })
 
     def reset(self):
-        self.df = self.base_df.copy()
+        self.riders = self.base_riders.copy()
+        self.drivers = self.base_drivers.copy()
         return self.state_vector()
 
     def state_vector(self):
-        vec = []
-        for _, r in self.df.iterrows():
-            f = self.forecaster.forecast(r.HexID)
-            vec.extend([
-                r.Riders / 10.0,
-                r.Drivers / 10.0,
-                (r.Drivers - r.Riders) / 10.0,
-                f / 10.0
-            ])
-        return np.array(vec, dtype=np.float32)
+        f = np.array([self.forecaster.forecast(h) for h in self.hex_ids], dtype=np.float64)
+        vec = np.stack([
+            self.riders / 10.0,
+            self.drivers / 10.0,
+            (self.drivers - self.riders) / 10.0,
+            f / 10.0
+        ], axis=1)
+        return vec.ravel().astype(np.float32)
 
     def step(self, moves):
         for s, d, m in moves:
-            avail = int(self.df.loc[self.df.HexID == s, "Drivers"].iloc[0])
-            m = min(avail, m)
-            self.df.loc[self.df.HexID == s, "Drivers"] -= m
-            self.df.loc[self.df.HexID == d, "Drivers"] += m
+            s, d = self.index[s], self.index[d]
+            m = min(int(self.drivers[s]), m)
+            self.drivers[s] -= m
+            self.drivers[d] += m
 
-        self.df["Drivers"] = self.df["Drivers"].clip(lower=0)
+        np.clip(self.drivers, 0, None, out=self.drivers)
 
         # ✅ FIXED riders reset (matches original code)
-        static = self.base_df.set_index("HexID")["Riders"]
-        self.df["Riders"] = self.df["HexID"].map(static)
-
-        balanced = oversupply = undersupply = 0
-        for _, r in self.df.iterrows():
-            if r.Drivers == r.Riders:
-                balanced += 1
-            elif r.Drivers > r.Riders:
-                oversupply += r.Drivers - r.Riders
-            else:
-                undersupply += r.Riders - r.Drivers
+        self.riders = self.base_riders.copy()
+
+        net = self.drivers - self.riders
+        balanced = int(np.count_nonzero(net == 0))
+        oversupply = int(net[net > 0].sum())
+        undersupply = int(-net[net < 0].sum())
 
         reward = (
             W_BALANCED * balanced +
@@ -110,8 +123,7 @@ def train(env, policy):
                 state, eps=eps, force_random=force_random
             )
 
-            per_hex_caps = {hex_ids[i]: caps[i] for i in range(len(hex_ids))}
-            moves = solve_min_cost_driver_relocation(env.df, per_hex_caps)
+            moves = relocate_drivers(env.riders, env.drivers, caps)
 
             move_cost = sum(
                 m * (euclid_dist(s, d) / 1000.0) for s, d, m in moves
@@ -153,8 +165,7 @@ def evaluate(env, policy):
 
     for t in range(12):
         caps, _, _, _, _, _ = policy.sample(state, eps=0.0)
-        per_hex_caps = {hex_ids[i]: caps[i] for i in range(len(hex_ids))}
-        moves = solve_min_cost_driver_relocation(env.df, per_hex_caps)
+        moves = relocate_drivers(env.riders, env.drivers, caps)
 
         move_cost = sum(
             m * (euclid_dist(s, d) / 1000.0) for s, d, m in moves
@@ -0,0 +1,129 @@
+# transport.py
+from collections import OrderedDict
+
+import numpy as np
+
+INF = np.iinfo(np.int64).max // 4
+
+
+def distance_matrix(hexes, dist_fn):
+    """Integer (rounded) pairwise travel cost between hexes, as used for MCMF edge weights."""
+    return np.array(
+        [[int(round(dist_fn(a, b))) for b in hexes] for a in hexes],
+        dtype=np.int64
+    )
+
+
+def min_cost_transport(supply, demand, cost):
+    """
+    Successive shortest paths on dense arrays.
+
+    supply (n_s,), demand (n_d,) and cost (n_s, n_d) are integers; supply -> demand
+    edges are uncapacitated. Ships min(sum(supply), sum(demand)) at minimum total
+    cost and returns the (n_s, n_d) integer flow matrix.
+    """
+    n_s, n_d = cost.shape
+    flow = np.zeros((n_s, n_d), dtype=np.int64)
+    src_res = np.array(supply, dtype=np.int64)
+    snk_res = np.array(demand, dtype=np.int64)
+    cols = np.arange(n_d)
+    rows = np.arange(n_s)
+
+    while src_res.any() and snk_res.any():
+        # Bellman-Ford over the bipartite residual graph, vectorized per sweep.
+        # ds/dd: distance from source to supply/demand nodes
+        # pred_d[d]: supply node feeding d; pred_s[s]: demand node feeding s via a
+        # reverse edge, or -1 when s is fed directly by the source
+        # Predecessors only change on strict improvement so ties cannot form cycles.
+        ds = np.where(src_res > 0, 0, INF)
+        dd = np.full(n_d, INF)
+        pred_s = np.full(n_s, -1)
+        pred_d = np.zeros(n_d, dtype=np.int64)
+        while True:
+            cand = ds[:, None] + cost
+            best_s = cand.argmin(axis=0)
+            dd_fwd = cand[best_s, cols]
+            improved_d = dd_fwd < dd
+            dd = np.where(improved_d, dd_fwd, dd)
+            pred_d = np.where(improved_d, best_s, pred_d)
+
+            back = np.where((flow > 0) & (dd[None, :] < INF // 2), dd[None, :] - cost, INF)
+            best_d = back.argmin(axis=1)
+            ds_back = back[rows, best_d]
+            improved_s = ds_back < ds
+            if not improved_s.any():
+                break
+            ds = np.where(improved_s, ds_back, ds)
+            pred_s = np.where(improved_s, best_d, pred_s)
+
+        reachable = (snk_res > 0) & (dd < INF // 2)
+        if not reachable.any():
+            break
+        d = int(np.argmin(np.where(reachable, dd, INF)))
+
+        # Walk back to the source collecting (s, d, forward?) edges
+        path = []
+        bottleneck = snk_res[d]
+        while True:
+            s = int(pred_d[d])
+            path.append((s, d, True))
+            if pred_s[s] == -1:
+                bottleneck = min(bottleneck, src_res[s])
+                break
+            d = int(pred_s[s])
+            path.append((s, d, False))
+            bottleneck = min(bottleneck, flow[s, d])
+
+        for s, d, forward in path:
+            flow[s, d] += bottleneck if forward else -bottleneck
+        src_res[path[-1][0]] -= bottleneck
+        snk_res[path[0][1]] -= bottleneck
+
+    return flow
+
+
+class TransportSolver:
+    """
+    Capacitated driver relocation over a fixed hex set.
+
+    Solutions are cached per (effective supply, demand) state, where effective
+    supply already folds in the per-hex outbound caps, so repeated
+    (drivers, riders, caps) combinations across steps and episodes are free.
+    """
+    def __init__(self, dist, cache_size=4096):
+        self.dist = np.asarray(dist, dtype=np.int64)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def solve(self, riders, drivers, caps):
+        """
+        riders, drivers, caps are per-hex arrays in hex order.
+        Returns [(src_idx, dst_idx, drivers_moved), ...] in (src, dst) order.
+        """
+        net = np.asarray(drivers, dtype=np.int64) - np.asarray(riders, dtype=np.int64)
+        supply = np.minimum(np.maximum(net, 0), np.maximum(np.asarray(caps, dtype=np.int64), 0))
+        demand = np.maximum(-net, 0)
+
+        key = supply.tobytes() + demand.tobytes()
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return list(self._cache[key])
+        self.misses += 1
+
+        moves = []
+        src_idx = np.nonzero(supply)[0]
+        dst_idx = np.nonzero(demand)[0]
+        if len(src_idx) and len(dst_idx):
+            flow = min_cost_transport(
+                supply[src_idx], demand[dst_idx], self.dist[np.ix_(src_idx, dst_idx)]
+            )
+            for i, j in zip(*np.nonzero(flow)):
+                moves.append((int(src_idx[i]), int(dst_idx[j]), int(flow[i, j])))
+
+        self._cache[key] = moves
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return list(moves)
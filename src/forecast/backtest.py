@@ -0,0 +1,98 @@
+"""
+Rolling-origin backtest of the vectorized forecasters against Prophet.
+
+For each of the last `holdout` weeks, every model is fitted on the weeks
+before it and scored on that week. Reports out-of-sample MAPE and wall-clock
+fit+predict time per model. Prophet is run per series on at most
+`prophet_sample` series so the comparison finishes in reasonable time; its
+runtime is extrapolated to the full series count.
+
+History comes from the MySQL count tables by default; --source=pyramid
+reads hex_pyramid_counts and --source=snapshot the Parquet snapshot (see
+data.HISTORY_SOURCES).
+
+    python backtest.py drivers 2025-07-07 2025-11-17 [--hex] [--source=snapshot]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from data import get_city_history, load_hex_hour_tensors, weekly_slice
+from fast_forecast import MODELS, mape, to_matrix
+from forecast_service import PROPHET_PARAMS, get_engine
+
+
+def load_weekly(engine, entity: str, start_date, end_date, per_hex: bool = False, source: str = "mysql"):
+    """(keys, dates, Y) of same-weekday samples, one row per hour (or hour x hex)."""
+    if per_hex:
+        dates, hex_ids, tensors = load_hex_hour_tensors(engine, start_date, end_date, entities=(entity,),
+                                                        source=source)
+        dates, weekly = weekly_slice(dates, tensors[entity])
+        keys = pd.MultiIndex.from_product([range(24), hex_ids], names=["hour", "hex_id"]).to_frame(index=False)
+        return keys, dates, np.asarray(weekly, dtype=np.float64).reshape(len(dates), -1).T
+
+    history = get_city_history(engine, entity, start_date, end_date, source)
+    offsets = (pd.to_datetime(history["report_date"]) - pd.Timestamp(start_date)).dt.days
+    return to_matrix(history[offsets % 7 == 0], ["hour"])
+
+
+def backtest_fast(Y: np.ndarray, model: str, holdout: int, **params) -> Dict:
+    preds = np.empty((Y.shape[0], holdout))
+    t0 = time.perf_counter()
+    for k in range(holdout):
+        cut = Y.shape[1] - holdout + k
+        preds[:, k] = MODELS[model](**params).fit(Y[:, :cut]).predict()
+    elapsed = time.perf_counter() - t0
+    return {"model": model, "series": Y.shape[0],
+            "mape": float(mape(Y[:, -holdout:], preds)), "seconds": elapsed}
+
+
+def backtest_prophet(Y: np.ndarray, dates: pd.DatetimeIndex, holdout: int,
+                     sample: Optional[int] = 50, seed: int = 0) -> Dict:
+    import logging
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    rows = np.arange(Y.shape[0])
+    if sample is not None and sample < len(rows):
+        rows = np.random.default_rng(seed).choice(rows, size=sample, replace=False)
+
+    preds = np.empty((len(rows), holdout))
+    t0 = time.perf_counter()
+    for i, r in enumerate(rows):
+        for k in range(holdout):
+            cut = Y.shape[1] - holdout + k
+            m = Prophet(**PROPHET_PARAMS)
+            m.fit(pd.DataFrame({"ds": dates[:cut], "y": Y[r, :cut]}))
+            preds[i, k] = m.predict(pd.DataFrame({"ds": dates[cut:cut + 1]}))["yhat"].iloc[0]
+    elapsed = time.perf_counter() - t0
+    return {"model": "prophet", "series": len(rows),
+            "mape": float(mape(Y[rows, -holdout:], preds)), "seconds": elapsed,
+            "seconds_all_series": elapsed * Y.shape[0] / max(len(rows), 1)}
+
+
+def run_backtest(entity: str = "drivers", start_date="2025-07-07", end_date="2025-11-17",
+                 holdout: int = 4, per_hex: bool = False,
+                 prophet_sample: Optional[int] = 50, source: str = "mysql") -> pd.DataFrame:
+    engine = get_engine()
+    _, dates, Y = load_weekly(engine, entity, start_date, end_date, per_hex=per_hex, source=source)
+    print(f"{entity}: {Y.shape[0]} series x {Y.shape[1]} weeks, holdout {holdout}")
+
+    results = [backtest_fast(Y, name, holdout) for name in MODELS]
+    results.append(backtest_prophet(Y, dates, holdout, sample=prophet_sample))
+    df = pd.DataFrame(results)
+    print(df.to_string(index=False))
+    return df
+
+
+if __name__ == "__main__":
+    positional = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sources = [a.split("=", 1)[1] for a in sys.argv[1:] if a.startswith("--source=")]
+    run_backtest(*positional[:3], per_hex="--hex" in sys.argv, source=sources[-1] if sources else "mysql")
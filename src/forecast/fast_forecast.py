@@ -0,0 +1,169 @@
+"""
+Vectorized seasonal forecasters: a fast path alongside Prophet.
+
+Every model works on a (n_series, n_periods) matrix where row i is one
+(hour[, hex]) series sampled once per week (same weekday), so all series are
+fitted and forecast together with a handful of NumPy operations:
+
+- SeasonalNaive : repeat the value one season ago
+- WeeklyEWMA    : exponentially weighted level, like the EWMA Forecaster in
+                  Mcmf+RL/train_and_evaluate.py but over every series at once
+- LaggedRidge   : one pooled ridge regression on the previous `lags` weeks,
+                  fitted on per-series scaled windows
+
+Models expose fit(Y) -> self, predict() -> (n_series,) next-period values
+and in_sample() -> (n_series, n_periods) one-step-ahead fits (NaN where the
+model has no history yet).
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------------------------------------------------------
+# Shaping
+# -----------------------------------------------------------------------------
+def to_matrix(history: pd.DataFrame, key_cols: List[str], date_col: str = "report_date",
+              value_col: str = "count") -> Tuple[pd.DataFrame, pd.DatetimeIndex, np.ndarray]:
+    """
+    Pivot long-format history into (keys, dates, Y) with Y[i, t] the value of
+    series keys.iloc[i] on dates[t]. Missing observations become 0.
+    """
+    wide = history.pivot_table(index=key_cols, columns=date_col, values=value_col,
+                               aggfunc="sum", fill_value=0).sort_index(axis=1)
+    keys = wide.index.to_frame(index=False)
+    dates = pd.DatetimeIndex(pd.to_datetime(wide.columns))
+    return keys, dates, wide.to_numpy(dtype=np.float64)
+
+
+def mape(y_true: np.ndarray, y_pred: np.ndarray, axis=None) -> np.ndarray:
+    """MAPE in percent, same epsilon guard as sklearn's implementation."""
+    eps = np.finfo(np.float64).eps
+    err = np.abs(y_true - y_pred) / np.maximum(np.abs(y_true), eps)
+    return np.nanmean(err, axis=axis) * 100
+
+
+# -----------------------------------------------------------------------------
+# Models
+# -----------------------------------------------------------------------------
+class SeasonalNaive:
+    def __init__(self, season=1):
+        self.season = season
+
+    def fit(self, Y):
+        self.Y = np.asarray(Y, dtype=np.float64)
+        return self
+
+    def predict(self):
+        return self.Y[:, -self.season].copy()
+
+    def in_sample(self):
+        fitted = np.full_like(self.Y, np.nan)
+        fitted[:, self.season:] = self.Y[:, :-self.season]
+        return fitted
+
+
+class WeeklyEWMA:
+    def __init__(self, alpha=0.4):
+        self.alpha = alpha
+
+    def fit(self, Y):
+        Y = np.asarray(Y, dtype=np.float64)
+        # levels[:, t] is the level after observing Y[:, :t]
+        levels = np.full((Y.shape[0], Y.shape[1] + 1), np.nan)
+        level = Y[:, 0].copy()
+        levels[:, 1] = level
+        for t in range(1, Y.shape[1]):
+            level = self.alpha * Y[:, t] + (1 - self.alpha) * level
+            levels[:, t + 1] = level
+        self.levels = levels
+        return self
+
+    def predict(self):
+        return self.levels[:, -1].copy()
+
+    def in_sample(self):
+        return self.levels[:, :-1].copy()
+
+
+class LaggedRidge:
+    """
+    y[t] ~ w . y[t-lags:t] + b, pooled over all series.
+
+    Each window is divided by its series' mean so busy and quiet hexes share
+    one set of weights; forecasts are scaled back per series.
+    """
+    def __init__(self, lags=4, l2=1.0):
+        self.lags = lags
+        self.l2 = l2
+
+    def _design(self, windows, scale):
+        X = windows / scale[:, None, None]
+        return np.concatenate([X, np.ones(X.shape[:-1] + (1,))], axis=-1)
+
+    def fit(self, Y):
+        Y = np.asarray(Y, dtype=np.float64)
+        if Y.shape[1] <= self.lags:
+            raise ValueError(f"LaggedRidge needs more than {self.lags} periods, got {Y.shape[1]}")
+        self.Y = Y
+        self.scale = np.maximum(Y.mean(axis=1), 1.0)
+
+        # windows[i, t] = Y[i, t:t+lags], target Y[i, t+lags]
+        windows = np.lib.stride_tricks.sliding_window_view(Y, self.lags, axis=1)
+        X = self._design(windows[:, :-1], self.scale).reshape(-1, self.lags + 1)
+        y = (Y[:, self.lags:] / self.scale[:, None]).reshape(-1)
+
+        reg = self.l2 * np.eye(self.lags + 1)
+        reg[-1, -1] = 0.0  # leave the intercept unpenalized
+        self.w = np.linalg.solve(X.T @ X + reg, X.T @ y)
+        self._windows = windows
+        return self
+
+    def predict(self):
+        X = self._design(self._windows[:, -1:], self.scale)[:, 0]
+        return np.maximum(X @ self.w, 0.0) * self.scale
+
+    def in_sample(self):
+        fitted = np.full_like(self.Y, np.nan)
+        X = self._design(self._windows[:, :-1], self.scale)
+        fitted[:, self.lags:] = np.maximum(X @ self.w, 0.0) * self.scale[:, None]
+        return fitted
+
+
+MODELS = {
+    "seasonal_naive": SeasonalNaive,
+    "weekly_ewma": WeeklyEWMA,
+    "lagged_ridge": LaggedRidge,
+}
+
+
+# -----------------------------------------------------------------------------
+# Forecast
+# -----------------------------------------------------------------------------
+def forecast_matrix(history: pd.DataFrame, entity: str, key_cols: List[str],
+                    model: str = "weekly_ewma", **params) -> pd.DataFrame:
+    """
+    Fast-path equivalent of forecast_service.forecast_all: forecast the week
+    after the last date for every series in history. Returns one row per
+    series with the same columns as the Prophet path (bounds are the
+    in-sample residual spread, not a posterior interval).
+    """
+    keys, dates, Y = to_matrix(history, key_cols)
+    m = MODELS[model](**params).fit(Y)
+    yhat = m.predict()
+    fitted = m.in_sample()
+
+    resid_sd = np.nan_to_num(np.nanstd(Y - fitted, axis=1))
+    df = keys.copy()
+    df.insert(0, "entity", entity)
+    df["forecast_date"] = (dates[-1] + pd.Timedelta(weeks=1)).date().isoformat()
+    df["yhat"] = yhat
+    df["yhat_lower"] = np.maximum(yhat - 1.28 * resid_sd, 0.0)
+    df["yhat_upper"] = yhat + 1.28 * resid_sd
+    df["mape"] = np.nan_to_num(mape(Y, fitted, axis=1))
+    df["confidence_score"] = 100 - df["mape"]
+    return df
@@ -17,8 +17,9 @@ def forecast_next_monday(df, date_col, value_col):
 
     next_monday_forecast = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(1)
 
+    # future includes the history, so reuse its in-sample rows for MAPE
     y_true = prophet_df["y"]
-    y_pred = m.predict(prophet_df)["yhat"]
+    y_pred = forecast["yhat"].iloc[:len(prophet_df)]
     mape = mean_absolute_percentage_error(y_true, y_pred) * 100
     confidence_score = 100 - mape
 
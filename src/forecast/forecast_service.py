@@ -0,0 +1,243 @@
+"""
+Per-(entity, hour, hex) Prophet forecasting service.
+
+- Loads the whole hex x hour history for an entity in one query, from
+  hex_pyramid_counts by default (source="mysql" reads the fixed-hex wide
+  tables, source="snapshot" the Parquet snapshot)
+- Fits every series in a process pool
+- Caches fitted models + forecasts on disk keyed by a data fingerprint, so
+  only series whose input changed are refit
+- Writes next-period forecasts in bulk into the long hex_forecasts table
+  (read back through the hex-column forecasts view)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from sqlalchemy import create_engine
+
+from data import get_hex_history
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "..", "synthaticTaxiData")
+if DATA_DIR not in sys.path:
+    sys.path.append(DATA_DIR)
+
+from db_utils import create_forecast_table_with_hex_columns  # type: ignore
+from hex_counts import replace_forecasts  # type: ignore
+from schema import HEX_LIST  # type: ignore
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+CACHE_DIR = os.getenv("FORECAST_CACHE_DIR", os.path.join(BASE_DIR, "model_cache"))
+MIN_POINTS = 3
+FORECAST_FREQ = "W-MON"  # forecast period, for Prophet and for all-zero series alike
+PROPHET_PARAMS = {
+    "weekly_seasonality": True,
+    "yearly_seasonality": False,
+    "daily_seasonality": False,
+    "seasonality_mode": "multiplicative",
+}
+
+
+def get_engine():
+    user = os.getenv("MYSQL_USER", "root")
+    password = os.getenv("MYSQL_PASSWORD", "root@123").replace("@", "%40")
+    host = os.getenv("MYSQL_HOST", "localhost")
+    port = os.getenv("MYSQL_PORT", "3306")
+    db = os.getenv("MYSQL_DB", "taxiProduction")
+    return create_engine(f"mysql+pymysql://{user}:{password}@{host}:{port}/{db}")
+
+
+def next_period(last_ds) -> pd.Timestamp:
+    """The first FORECAST_FREQ date after last_ds (the date being forecast)."""
+    return pd.Timestamp(last_ds).normalize() + to_offset(FORECAST_FREQ)
+
+
+def mape(actual, fitted) -> float:
+    """
+    Mean absolute percentage error in percent, over the non-zero actuals
+    only (a zero actual has no percentage error). 0.0 if every actual is 0.
+    """
+    actual = np.asarray(actual, dtype=float)
+    fitted = np.asarray(fitted, dtype=float)
+    nonzero = actual != 0
+    if not nonzero.any():
+        return 0.0
+    return float(np.mean(np.abs((actual[nonzero] - fitted[nonzero]) / actual[nonzero])) * 100)
+
+
+# -----------------------------------------------------------------------------
+# Cache
+# -----------------------------------------------------------------------------
+def series_fingerprint(ds: List[str], y: List[float]) -> str:
+    payload = json.dumps({"params": PROPHET_PARAMS, "freq": FORECAST_FREQ, "ds": ds, "y": y}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def cache_path(entity: str, hour: int, hex_id: str) -> str:
+    return os.path.join(CACHE_DIR, entity, f"{hour:02d}_{hex_id}.json")
+
+
+def load_cached(path: str, fingerprint: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        entry = json.load(f)
+    return entry if entry.get("fingerprint") == fingerprint else None
+
+
+# -----------------------------------------------------------------------------
+# Worker (top-level so it can be pickled by the process pool)
+# -----------------------------------------------------------------------------
+def fit_series(task: Tuple[str, int, str, List[str], List[float], str]) -> Dict:
+    """
+    Fit one series and forecast one week ahead.
+
+    A single predict() over history + next period gives both the in-sample
+    fit (for MAPE) and the forecast, instead of predicting twice.
+    """
+    from prophet import Prophet
+    from prophet.serialize import model_to_json
+
+    entity, hour, hex_id, ds, y, fingerprint = task
+    prophet_df = pd.DataFrame({"ds": pd.to_datetime(ds), "y": y})
+
+    m = Prophet(**PROPHET_PARAMS)
+    m.fit(prophet_df)
+
+    future = pd.DataFrame({"ds": list(prophet_df["ds"]) + [next_period(ds[-1])]})
+    forecast = m.predict(future)
+    next_row = forecast.iloc[-1]
+
+    entry = {
+        "fingerprint": fingerprint,
+        "entity": entity,
+        "hour": hour,
+        "hex_id": hex_id,
+        "forecast_date": next_row["ds"].date().isoformat(),
+        "yhat": float(next_row["yhat"]),
+        "yhat_lower": float(next_row["yhat_lower"]),
+        "yhat_upper": float(next_row["yhat_upper"]),
+        "mape": mape(prophet_df["y"], forecast["yhat"].iloc[:-1]),
+        "model": model_to_json(m),
+    }
+
+    path = cache_path(entity, hour, hex_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(entry, f)
+    return entry
+
+
+# -----------------------------------------------------------------------------
+# Orchestration
+# -----------------------------------------------------------------------------
+def build_tasks(entity: str, history: pd.DataFrame):
+    """
+    Split history into per-(hour, hex) series. Returns (tasks to fit,
+    results served from cache or trivially constant).
+    """
+    tasks, ready = [], []
+    for (hour, hex_id), g in history.groupby(["hour", "hex_id"], sort=True):
+        g = g.sort_values("report_date")
+        ds = [pd.Timestamp(d).date().isoformat() for d in g["report_date"]]
+        y = [float(v) for v in g["count"].fillna(0)]
+        if len(y) < MIN_POINTS:
+            continue
+
+        if not any(y):
+            # Nothing to learn from an all-zero series
+            ready.append({"entity": entity, "hour": int(hour), "hex_id": hex_id,
+                          "forecast_date": next_period(ds[-1]).date().isoformat(), "yhat": 0.0,
+                          "yhat_lower": 0.0, "yhat_upper": 0.0, "mape": 0.0})
+            continue
+
+        fingerprint = series_fingerprint(ds, y)
+        cached = load_cached(cache_path(entity, int(hour), hex_id), fingerprint)
+        if cached is not None:
+            ready.append(cached)
+        else:
+            tasks.append((entity, int(hour), hex_id, ds, y, fingerprint))
+    return tasks, ready
+
+
+def forecast_all(engine, entity: str, start_date, end_date, max_workers: Optional[int] = None,
+                 source: str = "pyramid", hex_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Forecast the week after end_date for every (hour, hex) series of an entity
+    (only the hexes in hex_ids, if given). Returns one row per series with
+    yhat / bounds / mape / confidence_score.
+    """
+    history = get_hex_history(engine, entity, start_date, end_date, source)
+    if hex_ids is not None:
+        history = history[history["hex_id"].isin(set(hex_ids))]
+    # Same-weekday samples only (replaces MOD(DATEDIFF(...), 7) = 0)
+    offsets = (pd.to_datetime(history["report_date"]) - pd.Timestamp(start_date)).dt.days
+    history = history[offsets % 7 == 0]
+
+    tasks, results = build_tasks(entity, history)
+    print(f"{entity}: {len(results)} series from cache, {len(tasks)} to fit")
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results.extend(pool.map(fit_series, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    df = pd.DataFrame([{k: v for k, v in r.items() if k not in ("model", "fingerprint")} for r in results])
+    if not df.empty:
+        df["confidence_score"] = 100 - df["mape"]
+    return df
+
+
+def write_forecasts(engine, forecast_df: pd.DataFrame, table_name: str = "forecasts") -> int:
+    """
+    Bulk-write forecasts into hex_forecasts, one (forecast datetime, hex)
+    row per series; `table_name` is the hex-column view over it. Existing
+    forecasts for the same datetime and hex are replaced.
+    """
+    if forecast_df.empty:
+        return 0
+
+    hex_index = create_forecast_table_with_hex_columns(table_name)
+    df = forecast_df[forecast_df["hex_id"].isin(hex_index.keys())]
+    date_time = pd.to_datetime(df["forecast_date"]) + pd.to_timedelta(df["hour"], unit="h")
+    rows = [
+        (ts.to_pydatetime(), hex_id, None if pd.isna(yhat) else float(yhat))
+        for ts, hex_id, yhat in zip(date_time, df["hex_id"], df["yhat"])
+    ]
+
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        written = replace_forecasts(cursor, rows, hex_index)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    return written
+
+
+def run(entity: str = "drivers", start_date="2025-07-07", end_date="2025-11-17",
+        table_name: str = "forecasts", max_workers: Optional[int] = None,
+        source: str = "pyramid") -> pd.DataFrame:
+    engine = get_engine()
+    # Only the fixed hexes have a column in the forecasts view
+    forecast_df = forecast_all(engine, entity, start_date, end_date, max_workers=max_workers,
+                               source=source, hex_ids=HEX_LIST)
+    written = write_forecasts(engine, forecast_df, table_name)
+    print(f"{entity}: wrote {written} forecast rows into {table_name}")
+    return forecast_df
+
+
+if __name__ == "__main__":
+    run()
@@ -1,6 +1,13 @@
 import aiohttp
+from contextlib import nullcontext
 from typing import Tuple
 
+try:
+    from query_stats import timed  # per-request OSRM accounting in the API
+except ImportError:
+    def timed(kind):
+        return nullcontext()
+
 OSRM_URL = "http://127.0.0.1:5002"
 
 async def osrm_route(
@@ -17,8 +24,9 @@ async def osrm_route(
         "?overview=full&geometries=geojson"
     )
 
-    async with session.get(url, timeout=10) as resp:
-        data = await resp.json()
+    with timed("osrm"):
+        async with session.get(url, timeout=10) as resp:
+            data = await resp.json()
         route = data["routes"][0]
         return (
             route["duration"],
@@ -1,23 +1,30 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Request
+from pydantic import BaseModel, Field
 from datetime import date
+from typing import Optional
 
 from dataApp import aggregate
+from src.routes.job_queue import accepted
+from src.routes.response_cache import AGGREGATE_NAMESPACES
 
 router = APIRouter(prefix="/aggregate", tags=["Aggregation"])
 
 
 class AggregateRequest(BaseModel):
-    target_date: date
+    # Deprecated: every new row is folded whatever its date; only echoed back
+    target_date: Optional[date] = Field(default=None, description="Deprecated and ignored")
+    rebuild: bool = False  # recount everything instead of folding new rows
 
 
-@router.post("")
-def aggregate_route(payload: AggregateRequest):
-    try:
-        aggregate(target_date=payload.target_date)
+@router.post("", status_code=202)
+def aggregate_route(payload: AggregateRequest, request: Request):
+    """Run the incremental aggregation as a background job."""
+    def run(ctx):
+        results = aggregate(target_date=payload.target_date, rebuild=payload.rebuild)
         return {
             "message": "Aggregations completed successfully",
             "date": payload.target_date,
+            "folded_rows": {source: r["rows"] for source, r in results.items()},
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    return accepted(request, "aggregate", run, payload, invalidates=AGGREGATE_NAMESPACES)
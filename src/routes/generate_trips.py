@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Request
 from pydantic import BaseModel, Field
 from datetime import date
 
 from dataApp import generate_trips
+from src.routes.job_queue import accepted
+from src.routes.response_cache import TRIPS_NAMESPACES
 
 router = APIRouter(prefix="/generate-trips", tags=["Trips"])
 
@@ -13,22 +15,26 @@ class GenerateTripsRequest(BaseModel):
     batch_size: int = Field(default=1000, ge=1)
     progress_every: int = Field(default=100, ge=1)
     verbose: bool = False
+    engine: str = Field(default="db", pattern="^(db|sim)$")  # sim: in-memory day, bulk insert
 
 
-@router.post("")
-def generate_trips_route(payload: GenerateTripsRequest):
-    try:
+@router.post("", status_code=202)
+def generate_trips_route(payload: GenerateTripsRequest, request: Request):
+    """Generate trips as a background job; progress advances per committed batch."""
+    def run(ctx):
         generate_trips(
             trip_date=payload.trip_date,
             num_rides=payload.num_rides,
             batch_size=payload.batch_size,
             progress_every=payload.progress_every,
             verbose=payload.verbose,
+            on_commit=lambda done, total: ctx.progress(done, total),
+            engine=payload.engine,
         )
         return {
             "message": "Trips generated successfully",
             "trip_date": payload.trip_date,
             "num_rides": payload.num_rides,
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    return accepted(request, "generate_trips", run, payload, invalidates=TRIPS_NAMESPACES)
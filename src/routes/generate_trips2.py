@@ -1,31 +1,40 @@
 from pydantic import BaseModel
 from datetime import date
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
 import random
 from synthaticTaxiData.trip import create_trips_for_date  # adjust import
+from src.routes.job_queue import accepted
+from src.routes.response_cache import TRIPS_NAMESPACES
 
 router = APIRouter()
 
 class TripRequest(BaseModel):
     dates: list[date]
 
-@router.post("/generate-trips2")
+@router.post("/generate-trips2", status_code=202)
 def generate_trips(
     request: TripRequest,
+    http_request: Request,
     min_trips: int = Query(200, ge=1),
     max_trips: int = Query(250, ge=1),
 ):
-    results = []
+    """Generate trips for each date as a background job; progress is per date."""
+    def run(ctx):
+        results = []
 
-    for trip_date in request.dates:
-        num_trips = random.randint(min_trips, max_trips)
-        create_trips_for_date(trip_date, num_trips)
-        results.append({
-            "date": trip_date,
-            "trips_created": num_trips
-        })
+        for i, trip_date in enumerate(request.dates):
+            ctx.progress(i, len(request.dates), f"generating {trip_date}")
+            num_trips = random.randint(min_trips, max_trips)
+            create_trips_for_date(trip_date, num_trips)
+            results.append({
+                "date": trip_date,
+                "trips_created": num_trips
+            })
 
-    return {
-        "status": "success",
-        "results": results
-    }
+        return {
+            "status": "success",
+            "results": results
+        }
+
+    params = {"dates": request.dates, "min_trips": min_trips, "max_trips": max_trips}
+    return accepted(http_request, "generate_trips2", run, params, invalidates=TRIPS_NAMESPACES)
@@ -107,14 +107,22 @@
 #     }
 
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from datetime import datetime
-from synthaticTaxiData.rider_driver_daily_counts import process_entity as process_daily_entity
-from synthaticTaxiData.rider_driver_hourly_counts import process_entity as process_hourly_entity, compute_hourly_counts, get_connection
+from synthaticTaxiData.async_db import read_daily_counts, read_hourly_counts
+from synthaticTaxiData.incremental_aggregate import fold_all, freshness, refresh_if_stale
+from src.routes.job_queue import accepted
+from src.routes.response_cache import AGGREGATE_NAMESPACES, RIDER_DRIVER_STATS, cached_json_async, invalidate
 
 router = APIRouter(prefix="/rider-driver", tags=["Driver & Rider Stats"])
 
+# Reads below only touch the count tables. They are kept current by
+# /aggregate, by POST /refresh (folds only rows added since the last
+# aggregation; ?rebuild=true runs as a job) and, for a check without side
+# effects, GET /freshness.
+SOURCES = ("riders", "drivers")
+
 # -----------------------------
 # Request schema
 # -----------------------------
@@ -122,81 +130,82 @@ class DateRequest(BaseModel):
     report_date: str  # Format: "YYYY-MM-DD"
 
 
+def parse_report_date(value: str):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
 # ------------------------------------------------
 # DAILY DRIVER + RIDER
 # ------------------------------------------------
+async def cached_daily(request: Request, report_date: str):
+    day = parse_report_date(report_date)
+    return await cached_json_async(request, RIDER_DRIVER_STATS, {"view": "daily", "report_date": day},
+                                   lambda: read_daily_counts(day))
+
+
 @router.post("/daily")
-def get_daily_driver_rider(payload: DateRequest):
-    report_date = datetime.strptime(payload.report_date, "%Y-%m-%d").date()
+async def get_daily_driver_rider(payload: DateRequest, request: Request):
+    return await cached_daily(request, payload.report_date)
 
-    # Compute daily totals using your script
-    for entity in ("riders", "drivers"):
-        process_daily_entity(entity, report_date)
 
-    # Fetch the computed totals from the daily counts table
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
+@router.get("/daily")
+async def get_daily_driver_rider_query(report_date: str, request: Request):
+    return await cached_daily(request, report_date)
 
-    cursor.execute(
-        "SELECT total_count AS driver_total_count FROM driver_daily_counts WHERE report_date = %s",
-        (report_date,),
-    )
-    driver_row = cursor.fetchone()
 
-    cursor.execute(
-        "SELECT total_count AS rider_total_count FROM rider_daily_counts WHERE report_date = %s",
-        (report_date,),
-    )
-    rider_row = cursor.fetchone()
+# ------------------------------------------------
+# HOURLY DRIVER + RIDER
+# ------------------------------------------------
+async def cached_hourly(request: Request, report_date: str):
+    day = parse_report_date(report_date)
+    return await cached_json_async(request, RIDER_DRIVER_STATS, {"view": "hourly", "report_date": day},
+                                   lambda: read_hourly_counts(day))
+
+
+@router.post("/hourly")
+async def get_hourly_driver_rider(payload: DateRequest, request: Request):
+    return await cached_hourly(request, payload.report_date)
 
-    cursor.close()
-    conn.close()
 
-    return {
-        "report_date": report_date.isoformat(),
-        "daily_driver": int(driver_row["driver_total_count"] or 0),
-        "daily_rider": int(rider_row["rider_total_count"] or 0),
-    }
+@router.get("/hourly")
+async def get_hourly_driver_rider_query(report_date: str, request: Request):
+    return await cached_hourly(request, report_date)
 
 
 # ------------------------------------------------
-# HOURLY DRIVER + RIDER
+# Freshness / refresh
 # ------------------------------------------------
-@router.post("/hourly")
-def get_hourly_driver_rider(payload: DateRequest):
-    report_date = datetime.strptime(payload.report_date, "%Y-%m-%d").date()
-
-    # Compute hourly totals using your script
-    for entity in ("riders", "drivers"):
-        process_hourly_entity(entity, report_date)
-
-    # Fetch the computed hourly totals
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(
-        "SELECT hour, total_count AS driver_total_count FROM driver_hourly_counts WHERE report_date = %s ORDER BY hour",
-        (report_date,),
-    )
-    driver_rows = cursor.fetchall()
-
-    cursor.execute(
-        "SELECT hour, total_count AS rider_total_count FROM rider_hourly_counts WHERE report_date = %s ORDER BY hour",
-        (report_date,),
-    )
-    rider_rows = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return {
-        "report_date": report_date.isoformat(),
-        "hourly_driver": [
-            {"hour": int(row["hour"]), "driver_total_count": int(row["driver_total_count"])}
-            for row in driver_rows
-        ],
-        "hourly_rider": [
-            {"hour": int(row["hour"]), "rider_total_count": int(row["rider_total_count"])}
-            for row in rider_rows
-        ],
-    }
+@router.get("/freshness")
+def get_freshness():
+    """Watermark and number of not-yet-aggregated (or moved) rows per source."""
+    status = freshness(SOURCES)
+    return {"stale": any(s["pending_rows"] or s.get("moved_rows") for s in status.values()), "sources": status}
+
+
+def _folded(results):
+    return {source: {"folded_rows": r["rows"], "last_id": r["last_id"], "days": r["days"]}
+            for source, r in results.items()}
+
+
+@router.post("/refresh")
+def refresh_counts(request: Request, rebuild: bool = False):
+    """
+    Fold rider/driver rows newer than the last aggregation into the count
+    tables; sources with nothing new are skipped. rebuild=true recounts
+    from scratch as a background job: it answers 202 with a job id, poll
+    /jobs/{job_id} for the result.
+    """
+    if rebuild:
+        def run(ctx):
+            results = {}
+            for i, source in enumerate(SOURCES):
+                ctx.progress(i, len(SOURCES), f"rebuilding {source}")
+                results.update(fold_all((source,), rebuild=True))
+            return _folded(results)
+
+        return accepted(request, "rebuild_counts", run, {"sources": SOURCES, "rebuild": True},
+                        invalidates=AGGREGATE_NAMESPACES)
+
+    results = refresh_if_stale(SOURCES)
+    invalidate(*AGGREGATE_NAMESPACES)
+    return _folded(results)
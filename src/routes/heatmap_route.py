@@ -37,19 +37,19 @@
 
 # src/routes/heatmap_route.py
 
-from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
-import os
-import shutil
-from pydantic import BaseModel
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from urllib.parse import urlencode
+from pydantic import BaseModel, Field
 
-from synthaticTaxiData.rider_driver_heatmap import map_result_dynamic  # Updated to accept start/end timestamps
+from synthaticTaxiData.rider_driver_heatmap import map_html_dynamic
+from synthaticTaxiData.helperForHeatMap import DEFAULT_ZOOM, H3_RESOLUTION, binned_points
+from synthaticTaxiData.hex_geojson import compact, geometry_collection, hex_aggregates, iter_geojson
+from synthaticTaxiData.demand_supply_cube import get_cube
+from src.routes.response_cache import DEFAULT_TTL, HEATMAP, cached_html, cached_json, store_html
 
 router = APIRouter()
 
-MAP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../map_file")
-os.makedirs(MAP_DIR, exist_ok=True)
-
 
 # -------------------------------
 # Pydantic model for request body
@@ -57,25 +57,128 @@ os.makedirs(MAP_DIR, exist_ok=True)
 class HeatmapRequest(BaseModel):
     start_ts: str  # e.g. "2025-07-07 07:00:00"
     end_ts: str    # e.g. "2025-07-07 08:00:00"
+    zoom: int = Field(DEFAULT_ZOOM, ge=10, le=13)  # initial zoom; picks the heat bin size
 
 
-@router.post("/generate_heatmap", tags=["Heatmap"])
-def generate_heatmap(req: HeatmapRequest):
+def map_params(start_ts: str, end_ts: str, zoom: int):
+    return {"view": "map", "start_ts": start_ts, "end_ts": end_ts, "zoom": zoom}
+
+
+def build_heatmap(start_ts: str, end_ts: str, zoom: int = DEFAULT_ZOOM):
     """
-    Generate rider/driver heatmap for a given time window from JSON body.
+    Generate rider/driver heatmap for a time window. The rendered page is
+    kept in the response cache (no file per window), and map_url points at
+    /heatmap/map for the same window, which re-renders it once evicted.
     """
-    result = map_result_dynamic(req.start_ts, req.end_ts)
-
-    # Move the generated map HTML to MAP_DIR
-    map_src = result["map_file"]
-    map_dest = os.path.join(MAP_DIR, os.path.basename(map_src))
-    if os.path.abspath(map_src) != os.path.abspath(map_dest):
-        shutil.move(map_src, map_dest)
+    result = map_html_dynamic(start_ts, end_ts, zoom=zoom)
+    store_html(HEATMAP, map_params(start_ts, end_ts, zoom), result["html"])
 
     # Full localhost URL
-    local_url = f"http://127.0.0.1:8000/map_file/{os.path.basename(map_dest)}"
+    query = urlencode({"start_ts": start_ts, "end_ts": end_ts, "zoom": zoom})
+    local_url = f"http://127.0.0.1:8000/heatmap/map?{query}"
 
-    return JSONResponse({
+    return {
         "map_url": local_url,
         "hex_stats": result["hex_stats"]
-    })
\ No newline at end of file
+    }
+
+
+@router.post("/generate_heatmap", tags=["Heatmap"])
+def generate_heatmap(req: HeatmapRequest, request: Request):
+    """
+    Generate rider/driver heatmap for a given time window from JSON body.
+    """
+    return cached_json(request, HEATMAP, {"start_ts": req.start_ts, "end_ts": req.end_ts, "zoom": req.zoom},
+                       lambda: build_heatmap(req.start_ts, req.end_ts, req.zoom))
+
+
+@router.get("/generate_heatmap", tags=["Heatmap"])
+def generate_heatmap_query(
+    request: Request,
+    start_ts: str = Query(...),
+    end_ts: str = Query(...),
+    zoom: int = Query(DEFAULT_ZOOM, ge=10, le=13),
+):
+    return cached_json(request, HEATMAP, {"start_ts": start_ts, "end_ts": end_ts, "zoom": zoom},
+                       lambda: build_heatmap(start_ts, end_ts, zoom))
+
+
+@router.get("/map", tags=["Heatmap"])
+def heatmap_page(
+    request: Request,
+    start_ts: str = Query(...),
+    end_ts: str = Query(...),
+    zoom: int = Query(DEFAULT_ZOOM, ge=10, le=13),
+):
+    """The folium page behind generate_heatmap's map_url, served from the cache."""
+    return cached_html(request, HEATMAP, map_params(start_ts, end_ts, zoom),
+                       lambda: map_html_dynamic(start_ts, end_ts, zoom=zoom)["html"])
+
+
+# -------------------------------
+# Data endpoints for map_file/heatmap.html
+# -------------------------------
+GEOMETRY_MAX_AGE = 24 * 3600  # hex geometry never changes
+
+
+@router.get("/hex-counts", tags=["Heatmap"])
+def hex_counts(
+    request: Request,
+    start_ts: str = Query(...),
+    end_ts: str = Query(...),
+    format: str = Query("json", pattern="^(json|geojson)$"),
+    resolution: int = Query(H3_RESOLUTION, ge=6, le=9),
+):
+    """
+    Rider/driver counts per NYC-clipped H3 hex for the window [start_ts, end_ts).
+    resolution picks the pyramid level (6 coarse .. 9 fine). Res-7 windows on
+    15-minute boundaries come from the in-memory cube, other hour-aligned
+    windows from the pre-aggregated pyramid (hours not folded yet from the
+    raw points), the rest from the raw points; all three count alike.
+
+    format=json    : {"hexes": [...], "riders": [...], "drivers": [...]},
+                     cached with ETag; pair with /hex-geometry
+    format=geojson : FeatureCollection with geometry, streamed per feature
+    """
+    if format == "json":
+        params = {"view": "hex_counts", "start_ts": start_ts, "end_ts": end_ts, "resolution": resolution}
+        return cached_json(request, HEATMAP, params,
+                           lambda: compact(hex_aggregates(start_ts, end_ts, resolution, get_cube())))
+
+    return StreamingResponse(
+        iter_geojson(hex_aggregates(start_ts, end_ts, resolution, get_cube())),
+        media_type="application/geo+json",
+        headers={"Cache-Control": f"private, max-age={DEFAULT_TTL}"},
+    )
+
+
+@router.get("/hex-geometry", tags=["Heatmap"])
+def hex_geometry(hexes: str = Query(..., description="comma-separated H3 ids")):
+    """Clipped hex polygons as GeoJSON; independent of time, so long-cacheable."""
+    ids = sorted({h.strip() for h in hexes.split(",") if h.strip()})
+    return JSONResponse(
+        geometry_collection(ids),
+        headers={"Cache-Control": f"public, max-age={GEOMETRY_MAX_AGE}"},
+    )
+
+
+@router.get("/heat-points", tags=["Heatmap"])
+def heat_points(
+    request: Request,
+    start_ts: str = Query(...),
+    end_ts: str = Query(...),
+    zoom: int = Query(DEFAULT_ZOOM, ge=10, le=13),
+):
+    """
+    Rider, driver and net heat layers as [[lat, lon, weight], ...] binned
+    into H3 cells sized for `zoom` (one weighted centroid per cell).
+    """
+    return cached_json(request, HEATMAP, {"view": "heat_points", "start_ts": start_ts, "end_ts": end_ts, "zoom": zoom},
+                       lambda: binned_points(start_ts, end_ts, zoom))
+
+
+@router.get("/cube-status", tags=["Heatmap"])
+def cube_status():
+    """Shape, range and watermarks of this worker's in-memory demand/supply cube."""
+    cube = get_cube()
+    return cube.status() if cube is not None else {"loaded": False}
@@ -0,0 +1,256 @@
+# src/routes/instrumentation.py
+"""
+Request-level performance instrumentation.
+
+instrument_app(app) adds:
+
+- a middleware that, per request, opens a query_stats scope and records
+    taxi_http_request_duration_seconds{method,route,status}  histogram
+    taxi_db_queries_per_request{route}                       histogram
+    taxi_db_queries_total / taxi_db_seconds_total{route}     counters
+    taxi_osrm_requests_total / taxi_osrm_seconds_total{route} counters
+  and echoes the request's own numbers in X-Response-Time-ms,
+  X-DB-Queries, X-DB-Time-ms and X-OSRM-Calls headers
+- GET /metrics in Prometheus text exposition format
+- ?profile=1 on any route: the response body is replaced by a text
+  profile of that request (pyinstrument call tree when installed, else
+  cProfile top functions by cumulative time). Sync endpoints run in the
+  threadpool, so they are wrapped to profile inside their worker thread.
+
+Metrics are per process; with several uvicorn workers each one exposes its
+own series and Prometheus sums them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import io
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+
+import query_stats
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+PROFILE_TOP_N = 40
+
+
+# -----------------------------------------------------------------------------
+# Metrics registry
+# -----------------------------------------------------------------------------
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple, List] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, label_values: Tuple, value: float) -> None:
+        s = self.series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                s[i] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, s in sorted(self.series.items()):
+            base = _labels(self.labels, label_values)
+            for upper, n in zip(self.buckets, s):
+                lines.append(f'{self.name}_bucket{{{base},le="{upper}"}} {n}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {s[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {s[-2]}")
+            lines.append(f"{self.name}_count{{{base}}} {s[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.series: Dict[Tuple, float] = {}
+
+    def inc(self, label_values: Tuple, value: float = 1) -> None:
+        self.series[label_values] = self.series.get(label_values, 0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, v in sorted(self.series.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, label_values)}}} {v}")
+        return lines
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    def esc(v):
+        return str(v).replace("\\", "\\\\").replace('"', '\\"')
+
+    return ",".join(f'{n}="{esc(v)}"' for n, v in zip(names, values))
+
+
+_lock = threading.Lock()
+REQUEST_LATENCY = Histogram(
+    "taxi_http_request_duration_seconds", "Request latency", ("method", "route", "status"), LATENCY_BUCKETS
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "taxi_db_queries_per_request", "SQL statements per request", ("route",), QUERY_COUNT_BUCKETS
+)
+DB_QUERIES = Counter("taxi_db_queries_total", "SQL statements executed", ("route",))
+DB_SECONDS = Counter("taxi_db_seconds_total", "Time spent in SQL execute/fetch", ("route",))
+OSRM_REQUESTS = Counter("taxi_osrm_requests_total", "OSRM route calls", ("route",))
+OSRM_SECONDS = Counter("taxi_osrm_seconds_total", "Time spent in OSRM calls", ("route",))
+METRICS = (REQUEST_LATENCY, DB_QUERIES_PER_REQUEST, DB_QUERIES, DB_SECONDS, OSRM_REQUESTS, OSRM_SECONDS)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, stats: Dict[str, float]) -> None:
+    with _lock:
+        REQUEST_LATENCY.observe((method, route, str(status)), seconds)
+        DB_QUERIES_PER_REQUEST.observe((route,), stats["sql_count"])
+        DB_QUERIES.inc((route,), stats["sql_count"])
+        DB_SECONDS.inc((route,), stats["sql_seconds"])
+        OSRM_REQUESTS.inc((route,), stats["osrm_count"])
+        OSRM_SECONDS.inc((route,), stats["osrm_seconds"])
+
+
+def render_metrics() -> str:
+    with _lock:
+        lines = [line for metric in METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+# -----------------------------------------------------------------------------
+# Profiling
+# -----------------------------------------------------------------------------
+# Reports collected for the current ?profile=1 request (None otherwise)
+_profile_reports: ContextVar[Optional[List[str]]] = ContextVar("profile_reports", default=None)
+
+
+class _RequestProfiler:
+    """pyinstrument when installed, else cProfile; report() returns text."""
+
+    def __init__(self, async_mode: bool = False):
+        if Profiler is not None:
+            self.profiler = Profiler(async_mode="enabled" if async_mode else "disabled")
+        else:
+            self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        if Profiler is not None:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if Profiler is not None:
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        return False
+
+    def report(self) -> str:
+        if Profiler is not None:
+            return self.profiler.output_text(unicode=True, color=False)
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+        return out.getvalue()
+
+
+def _profile_sync_endpoint(fn):
+    """Profile a sync endpoint inside its threadpool thread when requested."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        reports = _profile_reports.get()
+        if reports is None:
+            return fn(*args, **kwargs)
+        prof = _RequestProfiler()
+        try:
+            with prof:
+                return fn(*args, **kwargs)
+        finally:
+            reports.append("endpoint (threadpool):\n" + prof.report())
+
+    return wrapper
+
+
+# -----------------------------------------------------------------------------
+# Wiring
+# -----------------------------------------------------------------------------
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def instrument_app(app: FastAPI) -> None:
+    """Add the middleware and /metrics; call after all routers are included."""
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _profile_sync_endpoint(route.dependant.call)
+
+    @app.middleware("http")
+    async def perf_middleware(request: Request, call_next):
+        profiling = request.query_params.get("profile") == "1"
+        reports_token = _profile_reports.set([] if profiling else None)
+        stats_token = query_stats.start()
+        t0 = time.perf_counter()
+        try:
+            if profiling:
+                with _RequestProfiler(async_mode=True) as prof:
+                    response = await call_next(request)
+                    async for _ in response.body_iterator:
+                        pass
+                reports = [f"event loop:\n{prof.report()}"] + _profile_reports.get()
+            else:
+                response = await call_next(request)
+        except Exception:
+            elapsed = time.perf_counter() - t0
+            observe_request(request.method, _route_label(request), 500, elapsed, query_stats.finish(stats_token))
+            _profile_reports.reset(reports_token)
+            raise
+
+        elapsed = time.perf_counter() - t0
+        stats = query_stats.finish(stats_token)
+        _profile_reports.reset(reports_token)
+        observe_request(request.method, _route_label(request), response.status_code, elapsed, stats)
+        headers = {
+            "X-Response-Time-ms": f"{elapsed * 1000:.1f}",
+            "X-DB-Queries": str(int(stats["sql_count"])),
+            "X-DB-Time-ms": f"{stats['sql_seconds'] * 1000:.1f}",
+            "X-OSRM-Calls": str(int(stats["osrm_count"])),
+        }
+        if profiling:
+            summary = (
+                f"{request.method} {request.url.path} -> {response.status_code} "
+                f"in {elapsed * 1000:.1f} ms, {int(stats['sql_count'])} SQL statements "
+                f"({stats['sql_seconds'] * 1000:.1f} ms), {int(stats['osrm_count'])} OSRM calls "
+                f"({stats['osrm_seconds'] * 1000:.1f} ms)\n\n"
+            )
+            return PlainTextResponse(summary + "\n\n".join(reports), headers=headers)
+
+        response.headers.update(headers)
+        return response
+
+    @app.get("/metrics", tags=["Meta"], include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
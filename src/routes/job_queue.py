@@ -0,0 +1,365 @@
+# src/routes/job_queue.py
+"""
+Background jobs for long-running simulation endpoints.
+
+Heavy endpoints (seed, trip generation, aggregate, run-all, RL training)
+submit their work here and answer 202 with a job id instead of holding a
+request open for minutes. Jobs run on a bounded thread pool per process
+(JOB_WORKERS), and at most JOB_MAX_PENDING jobs may be queued or running
+per process; beyond that submit answers 429.
+
+Job state lives in the background_jobs table, so status, progress and
+results survive the request and can be polled from any uvicorn worker.
+Cancellation is cooperative: it sets cancel_requested, a queued job never
+starts, and a running job stops at its next ctx.progress(...) call.
+Response-cache namespaces passed as `invalidates` are cleared once a job
+that started has ended, whatever its outcome, since a failed or cancelled
+job may still have committed part of its writes.
+
+Each job records the process that owns it (host:pid:token). A process
+that exits with jobs queued or running leaves their rows behind;
+recover_orphans (run at startup) marks the ones on this host whose owner
+is gone as failed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from synthaticTaxiData.db_config import get_connection
+from src.routes.response_cache import invalidate
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "20"))
+
+JOBS_TABLE = """
+CREATE TABLE IF NOT EXISTS background_jobs (
+    job_id CHAR(32) PRIMARY KEY,
+    kind VARCHAR(64) NOT NULL,
+    status ENUM('queued', 'running', 'succeeded', 'failed', 'cancelled') NOT NULL DEFAULT 'queued',
+    params JSON,
+    progress_done INT NOT NULL DEFAULT 0,
+    progress_total INT NULL,
+    message VARCHAR(255) NULL,
+    result JSON NULL,
+    error TEXT NULL,
+    cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+    worker VARCHAR(128) NULL,
+    progress_at DATETIME(6) NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at DATETIME NULL,
+    finished_at DATETIME NULL,
+    KEY idx_jobs_created (created_at)
+) ENGINE=InnoDB;
+"""
+
+JOBS_TABLE_MIGRATIONS = [
+    ("worker", "ALTER TABLE background_jobs ADD COLUMN worker VARCHAR(128) NULL AFTER cancel_requested"),
+    ("progress_at", "ALTER TABLE background_jobs ADD COLUMN progress_at DATETIME(6) NULL AFTER worker"),
+]
+
+JOBS_TABLE_READY = False
+WORKER_TOKEN = uuid.uuid4().hex[:8]
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_futures: Dict[str, Future] = {}
+_futures_lock = threading.Lock()
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# -----------------------------------------------------------------------------
+# Database helpers
+# -----------------------------------------------------------------------------
+def _execute(sql: str, params=()) -> int:
+    """Run one statement in its own connection and commit; returns rowcount."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def ensure_jobs_table() -> None:
+    global JOBS_TABLE_READY
+    if JOBS_TABLE_READY:
+        return
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(JOBS_TABLE)
+        cursor.execute(
+            """
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'background_jobs'
+            """
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        for column, ddl in JOBS_TABLE_MIGRATIONS:
+            if column not in existing:
+                cursor.execute(ddl)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    JOBS_TABLE_READY = True
+
+
+def worker_id() -> str:
+    """host:pid:token of this process; the token tells apart a reused pid."""
+    return f"{socket.gethostname()}:{os.getpid()}:{WORKER_TOKEN}"
+
+
+def _owner_alive(worker: Optional[str]) -> bool:
+    """False when `worker` was a process on this host that is gone."""
+    if not worker:
+        return False
+    host, pid, token = worker.rsplit(":", 2)
+    if host != socket.gethostname():
+        return True  # another host's process; not ours to judge
+    if int(pid) == os.getpid():
+        return token == WORKER_TOKEN
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def recover_orphans() -> int:
+    """
+    Mark queued/running jobs whose owning process has exited as failed
+    (they would otherwise stay queued/running forever). Call at startup;
+    returns the number of jobs marked.
+    """
+    ensure_jobs_table()
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT job_id, worker FROM background_jobs WHERE status IN ('queued', 'running')")
+        orphans = [job_id for job_id, worker in cursor.fetchall() if not _owner_alive(worker)]
+    finally:
+        cursor.close()
+        conn.close()
+    for job_id in orphans:
+        _execute(
+            """
+            UPDATE background_jobs
+            SET status = 'failed', error = 'Worker process exited before the job finished',
+                finished_at = NOW()
+            WHERE job_id = %s AND status IN ('queued', 'running')
+            """,
+            (job_id,),
+        )
+    return len(orphans)
+
+
+def _row_to_job(row: Dict) -> Dict:
+    job = dict(row)
+    for key in ("params", "result"):
+        if isinstance(job[key], (str, bytes)):
+            job[key] = json.loads(job[key])
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    ensure_jobs_table()
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM background_jobs WHERE job_id = %s", (job_id,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    return None if row is None else _row_to_job(row)
+
+
+def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+    ensure_jobs_table()
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if status:
+            cursor.execute(
+                "SELECT * FROM background_jobs WHERE status = %s ORDER BY created_at DESC LIMIT %s",
+                (status, limit),
+            )
+        else:
+            cursor.execute("SELECT * FROM background_jobs ORDER BY created_at DESC LIMIT %s", (limit,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    return [_row_to_job(row) for row in rows]
+
+
+# -----------------------------------------------------------------------------
+# Running jobs
+# -----------------------------------------------------------------------------
+class JobContext:
+    """Handed to the job function for progress reporting and cancellation."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """
+        Record progress; raises JobCancelled if cancellation was requested.
+        One UPDATE does both: it only matches while cancel_requested is 0,
+        and progress_at changes on every call, so 0 rows means cancelled.
+        """
+        updated = _execute(
+            """
+            UPDATE background_jobs
+            SET progress_done = %s, progress_total = COALESCE(%s, progress_total),
+                message = COALESCE(%s, message), progress_at = NOW(6)
+            WHERE job_id = %s AND cancel_requested = 0
+            """,
+            (done, total, message[:255] if message else None, self.job_id),
+        )
+        if not updated:
+            raise JobCancelled(self.job_id)
+
+    def check_cancelled(self) -> None:
+        job = get_job(self.job_id)
+        if job is not None and job["cancel_requested"]:
+            raise JobCancelled(self.job_id)
+
+
+def _finish(job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+    _execute(
+        """
+        UPDATE background_jobs
+        SET status = %s, result = %s, error = %s, finished_at = NOW()
+        WHERE job_id = %s
+        """,
+        (
+            status,
+            json.dumps(jsonable_encoder(result)) if result is not None else None,
+            error,
+            job_id,
+        ),
+    )
+
+
+def _run(job_id: str, fn: Callable[[JobContext], Any], invalidates: Iterable[str]) -> None:
+    started = _execute(
+        """
+        UPDATE background_jobs SET status = 'running', started_at = NOW()
+        WHERE job_id = %s AND status = 'queued' AND cancel_requested = 0
+        """,
+        (job_id,),
+    )
+    if not started:
+        return  # cancelled while queued
+
+    try:
+        result = fn(JobContext(job_id))
+    except JobCancelled:
+        _finish(job_id, "cancelled")
+    except Exception as e:
+        _finish(job_id, "failed", error=f"{e}\n{traceback.format_exc()}")
+    else:
+        try:
+            _finish(job_id, "succeeded", result=result)
+        except Exception as e:
+            # e.g. a result json.dumps cannot encode; never leave the job running
+            _finish(job_id, "failed", error=f"Could not store job result: {e}\n{traceback.format_exc()}")
+    finally:
+        invalidate(*invalidates)
+
+
+def _forget(job_id: str) -> None:
+    with _futures_lock:
+        _futures.pop(job_id, None)
+
+
+def submit(
+    kind: str,
+    fn: Callable[[JobContext], Any],
+    params: Any = None,
+    invalidates: Iterable[str] = (),
+) -> str:
+    """
+    Queue fn(ctx) as a job and return its id. Raises HTTPException(429)
+    when this process already has JOB_MAX_PENDING jobs queued or running.
+    """
+    ensure_jobs_table()
+    with _futures_lock:
+        if len(_futures) >= JOB_MAX_PENDING:
+            raise HTTPException(status_code=429, detail="Too many pending jobs, retry later")
+
+        job_id = uuid.uuid4().hex
+        _execute(
+            "INSERT INTO background_jobs (job_id, kind, params, worker) VALUES (%s, %s, %s, %s)",
+            (job_id, kind, json.dumps(jsonable_encoder(params)), worker_id()),
+        )
+        future = _executor.submit(_run, job_id, fn, tuple(invalidates))
+        _futures[job_id] = future
+    future.add_done_callback(lambda _: _forget(job_id))
+    return job_id
+
+
+def cancel(job_id: str) -> Optional[Dict]:
+    """Request cancellation of a queued or running job; returns its new state."""
+    ensure_jobs_table()
+    _execute(
+        """
+        UPDATE background_jobs SET cancel_requested = 1
+        WHERE job_id = %s AND status IN ('queued', 'running')
+        """,
+        (job_id,),
+    )
+    _execute(
+        """
+        UPDATE background_jobs SET status = 'cancelled', finished_at = NOW()
+        WHERE job_id = %s AND status = 'queued'
+        """,
+        (job_id,),
+    )
+    with _futures_lock:
+        future = _futures.get(job_id)
+    if future is not None:
+        future.cancel()
+    return get_job(job_id)
+
+
+def accepted(
+    request: Request,
+    kind: str,
+    fn: Callable[[JobContext], Any],
+    params: Any = None,
+    invalidates: Iterable[str] = (),
+) -> JSONResponse:
+    """Submit a job and answer 202 with its id and status URL."""
+    job_id = submit(kind, fn, params, invalidates)
+    status_url = str(request.url_for("get_job_status", job_id=job_id))
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "kind": kind, "status": "queued", "status_url": status_url},
+        headers={"Location": status_url},
+    )
@@ -0,0 +1,38 @@
+# src/routes/jobs.py
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from src.routes.job_queue import cancel, get_job, list_jobs
+
+router = APIRouter()
+
+
+@router.get("")
+def list_background_jobs(
+    status: Optional[str] = Query(None, description="queued | running | succeeded | failed | cancelled"),
+    limit: int = Query(50, ge=1, le=500),
+):
+    return {"jobs": list_jobs(status=status, limit=limit)}
+
+
+@router.get("/{job_id}")
+def get_job_status(job_id: str):
+    """Status, progress and (once finished) result or error of a job."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+@router.post("/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    Cancel a queued job, or ask a running one to stop at its next progress
+    checkpoint. Finished jobs are returned unchanged.
+    """
+    job = cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
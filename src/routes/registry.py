@@ -14,6 +14,7 @@ from src.routes.heatmap_route import router as heatmap_router
 from src.routes.sevenMon_rider_driver import router as trip_summary_mondays_router  # new Mondays route
 
 from src.routes.train_group import router as train_group_route
+from src.routes.jobs import router as jobs_router
 
 ROUTE_CONFIG = [
     {
@@ -77,5 +78,10 @@ ROUTE_CONFIG = [
     "router": train_group_route,
     "prefix": "/train",
     "tags": ["Training", "RL"],
-    }
+    },
+    {
+        "router": jobs_router,
+        "prefix": "/jobs",
+        "tags": ["Jobs"],
+    },
 ]
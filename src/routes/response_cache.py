@@ -0,0 +1,219 @@
+# src/routes/response_cache.py
+"""
+TTL response cache for analytics endpoints.
+
+Responses of read endpoints that are pure functions of a historical date
+window are stored as encoded JSON bodies under
+"<namespace>:<canonical request params>". Backends:
+
+- in-process LRU with per-entry TTL (default)
+- Redis-compatible server when RESPONSE_CACHE_REDIS_URL is set and the
+  `redis` package is installed; shared by every worker, so invalidation
+  reaches all of them (with the in-process backend other workers only
+  catch up when their entries expire)
+
+Write paths call invalidate(...) for the namespaces they affect. Every
+cached response carries an ETag (hash of the body) and Cache-Control
+max-age; a request whose If-None-Match matches gets 304 with no body.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+DEFAULT_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL")
+KEY_PREFIX = "taxi:resp:"
+
+# Namespaces
+TRIP_SUMMARY = "trip_summary"
+TRIP_SUMMARY_MONDAYS = "trip_summary_mondays"
+RIDER_DRIVER_STATS = "rider_driver_stats"
+HEATMAP = "heatmap"
+
+# What each write path makes stale
+SEED_NAMESPACES = (HEATMAP,)
+TRIPS_NAMESPACES = (TRIP_SUMMARY, TRIP_SUMMARY_MONDAYS, HEATMAP)
+AGGREGATE_NAMESPACES = (TRIP_SUMMARY, TRIP_SUMMARY_MONDAYS, RIDER_DRIVER_STATS, HEATMAP)
+
+
+# -----------------------------------------------------------------------------
+# Backends
+# -----------------------------------------------------------------------------
+class TTLCache:
+    """Thread-safe LRU whose entries also expire after their TTL."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class RedisCache:
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(KEY_PREFIX + key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(KEY_PREFIX + key, value, ex=ttl)
+
+    def delete_prefix(self, prefix: str) -> None:
+        keys = list(self.client.scan_iter(match=f"{KEY_PREFIX}{prefix}*", count=500))
+        if keys:
+            self.client.delete(*keys)
+
+
+def _make_backend():
+    if REDIS_URL:
+        try:
+            return RedisCache(REDIS_URL)
+        except ImportError:
+            print("RESPONSE_CACHE_REDIS_URL set but `redis` is not installed; using in-process cache")
+    return TTLCache()
+
+
+backend = _make_backend()
+
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+def cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    return f"{namespace}:{json.dumps(jsonable_encoder(params), sort_keys=True)}"
+
+
+def invalidate(*namespaces: str) -> None:
+    """
+    Drop every cached entry of `namespaces`. With the in-process backend
+    this only clears the worker that ran the write; other workers keep
+    serving their entries until the TTL expires. Set
+    RESPONSE_CACHE_REDIS_URL for invalidation that reaches every worker.
+    """
+    for namespace in namespaces:
+        backend.delete_prefix(f"{namespace}:")
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def _store(key: str, value: Any, ttl: int) -> bytes:
+    return _store_body(key, json.dumps(jsonable_encoder(value)).encode(), ttl)
+
+
+def _store_body(key: str, body: bytes, ttl: int) -> bytes:
+    if ttl > 0:
+        backend.set(key, body, ttl)
+    return body
+
+
+def store_html(namespace: str, params: Dict[str, Any], html: str, ttl: int = DEFAULT_TTL) -> None:
+    """Prime the entry cached_html serves for (namespace, params)."""
+    _store_body(cache_key(namespace, params), html.encode(), ttl)
+
+
+def cached_json(
+    request: Request,
+    namespace: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any],
+    ttl: int = DEFAULT_TTL,
+) -> Response:
+    """
+    Serve compute() for (namespace, params) from the cache, filling it on a
+    miss, with ETag / Cache-Control headers and If-None-Match handling.
+    """
+    key = cache_key(namespace, params)
+    body = backend.get(key)
+    hit = body is not None
+    if not hit:
+        body = _store(key, compute(), ttl)
+    return _respond(request, body, hit, ttl)
+
+
+async def cached_json_async(
+    request: Request,
+    namespace: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Awaitable[Any]],
+    ttl: int = DEFAULT_TTL,
+) -> Response:
+    """cached_json for endpoints whose compute() is a coroutine function."""
+    key = cache_key(namespace, params)
+    body = backend.get(key)
+    hit = body is not None
+    if not hit:
+        body = _store(key, await compute(), ttl)
+    return _respond(request, body, hit, ttl)
+
+
+def cached_html(
+    request: Request,
+    namespace: str,
+    params: Dict[str, Any],
+    compute: Callable[[], str],
+    ttl: int = DEFAULT_TTL,
+) -> Response:
+    """
+    cached_json for rendered HTML pages: the page lives only in the cache
+    (evicted with it) instead of as a file, and is re-rendered on a miss.
+    """
+    key = cache_key(namespace, params)
+    body = backend.get(key)
+    hit = body is not None
+    if not hit:
+        body = _store_body(key, compute().encode(), ttl)
+    return _respond(request, body, hit, ttl, media_type="text/html")
+
+
+def _respond(request: Request, body: bytes, hit: bool, ttl: int, media_type: str = "application/json") -> Response:
+    etag = _etag(body)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={ttl}",
+        "X-Cache": "HIT" if hit else "MISS",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from datetime import date
 from dataApp import init_db, seed, generate_trips, aggregate
+from src.routes.job_queue import accepted
+from src.routes.response_cache import AGGREGATE_NAMESPACES, SEED_NAMESPACES, TRIPS_NAMESPACES
 
 router = APIRouter(prefix="/run-all", tags=["Orchestration"])
 
@@ -12,20 +14,25 @@ class RunAllRequest(BaseModel):
     trips: int = 100
 
 
-@router.post("")
-def run_all(payload: RunAllRequest):
-    try:
+@router.post("", status_code=202)
+def run_all(payload: RunAllRequest, request: Request):
+    """Run init -> seed -> trips -> aggregate as one background job."""
+    def run(ctx):
+        ctx.progress(0, 4, "init_db")
         init_db()
+        ctx.progress(1, 4, "seed")
         seed(
             drivers=payload.drivers,
             riders=payload.riders,
             activity_date=payload.activity_date,
         )
+        ctx.progress(2, 4, "generate_trips")
         generate_trips(
             trip_date=payload.activity_date,
             num_rides=payload.trips,
             verbose=True,
         )
+        ctx.progress(3, 4, "aggregate")
         aggregate(target_date=payload.activity_date)
 
         return {
@@ -35,5 +42,6 @@ def run_all(payload: RunAllRequest):
             "riders": payload.riders,
             "trips": payload.trips,
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+    namespaces = SEED_NAMESPACES + TRIPS_NAMESPACES + AGGREGATE_NAMESPACES
+    return accepted(request, "run_all", run, payload, invalidates=namespaces)
@@ -31,12 +31,14 @@
 #         raise HTTPException(status_code=500, detail=str(e))
 
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from datetime import date, timedelta
 import random
 
 from dataApp import seed  # your existing seed function
+from src.routes.job_queue import accepted
+from src.routes.response_cache import SEED_NAMESPACES
 
 router = APIRouter(prefix="/seed", tags=["Seeding"])
 
@@ -85,15 +87,18 @@ def generate_driver_rider_counts():
 # ROUTE (SAME /seed)
 # =====================================================
 
-@router.post("")
-def seed_entities(payload: SeedRequest):
-    try:
-        if payload.start_date > payload.end_date:
-            raise ValueError("start_date must be before or equal to end_date")
+@router.post("", status_code=202)
+def seed_entities(payload: SeedRequest, request: Request):
+    """Seed every Monday in the range as a background job; poll /jobs/{job_id}."""
+    if payload.start_date > payload.end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before or equal to end_date")
 
+    def run(ctx):
+        mondays = list(monday_range(payload.start_date, payload.end_date))
         results = []
 
-        for monday in monday_range(payload.start_date, payload.end_date):
+        for i, monday in enumerate(mondays):
+            ctx.progress(i, len(mondays), f"seeding {monday}")
             drivers, riders = generate_driver_rider_counts()
 
             seed(
@@ -114,5 +119,4 @@ def seed_entities(payload: SeedRequest):
             "details": results,
         }
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return accepted(request, "seed", run, payload, invalidates=SEED_NAMESPACES)
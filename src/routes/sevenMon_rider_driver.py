@@ -1,11 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from datetime import datetime, timedelta, date
-from synthaticTaxiData.db_utils import get_conn
-from synthaticTaxiData.get_trip_summary import (
-    get_daily_driver_count,
-    get_daily_rider_count
-)
+from synthaticTaxiData.async_db import get_trip_summaries
+from src.routes.response_cache import TRIP_SUMMARY_MONDAYS, cached_json_async
 
 router = APIRouter(
     prefix="/trip-summary-mondays",
@@ -34,58 +31,34 @@ def previous_seven_mondays(report_date: date, count: int = 7):
 # -----------------------------
 # Route: Trip Summary for Mondays
 # -----------------------------
-@router.post("/")
-def get_trip_summary_mondays(payload: DateRequest):
-    report_date = datetime.strptime(payload.report_date, "%Y-%m-%d").date()
+async def build_mondays_summary(report_date: date):
     mondays = previous_seven_mondays(report_date, 7)
 
-    result = {}
-
-    conn = get_conn()
-    cursor = conn.cursor(dictionary=True)
-
-    for mon in mondays:
-        trip_query = """
-            SELECT
-                COUNT(*) AS total_trips,
-
-                -- Completed trips: no cancellation attempts
-                SUM(
-                    CASE
-                        WHEN JSON_LENGTH(meta, '$.cancellation_attempts') IS NULL
-                             OR JSON_LENGTH(meta, '$.cancellation_attempts') = 0
-                        THEN 1 ELSE 0
-                    END
-                ) AS completed_trips,
-
-                -- Cancelled trips: at least one cancellation attempt
-                SUM(
-                    CASE
-                        WHEN JSON_LENGTH(meta, '$.cancellation_attempts') > 0
-                        THEN 1 ELSE 0
-                    END
-                ) AS cancelled_trips
-            FROM trips
-            WHERE DATE(start_at) = %s
-        """
-
-        cursor.execute(trip_query, (mon,))
-        trip_result = cursor.fetchone()
-
-        daily_driver = get_daily_driver_count(mon)["driver_total_count"]
-        daily_rider = get_daily_rider_count(mon)["rider_total_count"]
+    summaries = await get_trip_summaries(mondays)
 
-        missed_rides = max(daily_rider - daily_driver, 0)
-
-        result[str(mon)] = {
-            "completed_trips": int(trip_result["completed_trips"] or 0),
-            "cancelled_trips": int(trip_result["cancelled_trips"] or 0),
-            "missed_rides": missed_rides
+    result = {
+        str(mon): {
+            "completed_trips": summaries[mon]["attempt_free_trips"],
+            "cancelled_trips": summaries[mon]["attempt_cancelled_trips"],
+            "missed_rides": summaries[mon]["missed_rides"],
         }
-
-    cursor.close()
-    conn.close()
+        for mon in mondays
+    }
 
     return {
         "trip_summary": result
     }
+
+
+@router.post("/")
+async def get_trip_summary_mondays(payload: DateRequest, request: Request):
+    report_date = datetime.strptime(payload.report_date, "%Y-%m-%d").date()
+    return await cached_json_async(request, TRIP_SUMMARY_MONDAYS, {"report_date": report_date},
+                                   lambda: build_mondays_summary(report_date))
+
+
+@router.get("/")
+async def get_trip_summary_mondays_query(report_date: str, request: Request):
+    parsed = datetime.strptime(report_date, "%Y-%m-%d").date()
+    return await cached_json_async(request, TRIP_SUMMARY_MONDAYS, {"report_date": parsed},
+                                   lambda: build_mondays_summary(parsed))
@@ -1,25 +1,33 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from src.synthaticTaxiData.group_hexes_connected import (
     groups_to_json, groups, RIDER_COUNTS, DRIVER_COUNTS
 )
 from src.synthaticTaxiData.plot_rider_driver import HEXES
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field
 
 from zoneBalance.train import train_single_group
+from src.routes.job_queue import accepted
 
 router = APIRouter()
 
 class TrainGroupRequest(BaseModel):
     group_id: str
+    # k-ring radius for the sparse action space; None trains on every zone pair
+    neighbour_k: Optional[int] = Field(default=None, ge=1, description="Restrict moves to each zone's k-ring")
 
-@router.post("/group")
-def train_group(payload: TrainGroupRequest):
+@router.post("/group", status_code=202)
+def train_group(payload: TrainGroupRequest, request: Request):
     """
-    Train RL model for a single connected hex group.
+    Train RL model for a single connected hex group as a background job;
+    poll /jobs/{job_id} for the results. The group id is validated up front.
     Example JSON:
     {
-        "group_id": "group_1"
+        "group_id": "group_1",
+        "neighbour_k": 1
     }
+    neighbour_k is optional; without it every zone pair is an action.
     """
 
     group_id = payload.group_id
@@ -45,16 +53,22 @@ def train_group(payload: TrainGroupRequest):
     # ✅ Extract numeric ID for trainer
     numeric_group_id = group_id.replace("group_", "")
 
-    try:
+    def run(ctx):
         # Pass cross-group adjacency information for edge hex balancing
         hex_set = set(HEXES)
-        results = train_single_group(
-            group_json, numeric_group_id,
-            all_groups=groups,
-            hex_set=hex_set,
-            rider_counts=RIDER_COUNTS,
-            driver_counts=DRIVER_COUNTS
-        )
+        try:
+            results = train_single_group(
+                group_json, numeric_group_id,
+                all_groups=groups,
+                hex_set=hex_set,
+                rider_counts=RIDER_COUNTS,
+                driver_counts=DRIVER_COUNTS,
+                neighbour_k=payload.neighbour_k,
+                # Reports progress and stops at the next episode once cancelled
+                on_episode=lambda done, total: ctx.progress(done, total, f"episode {done}/{total}")
+            )
+        except KeyError as e:
+            raise RuntimeError(f"Training key error: {str(e)}") from e
 
         return {
             "status": "success",
@@ -64,14 +78,4 @@ def train_group(payload: TrainGroupRequest):
             "results": results
         }
 
-    except KeyError as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Training key error: {str(e)}"
-        )
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Training failed: {str(e)}"
-        )
+    return accepted(request, "train_group", run, payload)
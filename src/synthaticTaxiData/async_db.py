@@ -0,0 +1,191 @@
+"""
+Async MySQL access for the read endpoints.
+
+The summary and count routes await these coroutines on the event loop
+instead of running blocking mysql.connector calls in FastAPI's threadpool
+(40 threads by default), so one worker can hold hundreds of concurrent
+dashboard requests, bounded by the pool size rather than by threads.
+
+Connections come from one aiomysql pool per process, created on first use
+with the same MYSQL_* settings as db_config and closed by close_pool() at
+shutdown:
+    ASYNC_DB_POOL_MIN (default: 1)
+    ASYNC_DB_POOL_MAX (default: 20)
+
+Writes stay on the sync path: schema setup and rebuilding missing
+trip_daily_summary rows run once in a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+from db_utils import get_conn, ensure_trips_schema
+from get_trip_summary import COUNT_TABLES, _as_date, daily_totals_sql, shape_trip_summaries
+from trip_summary import count_days, ensure_summary_table, rollup_rows_sql
+from query_stats import timed
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", "20"))
+
+_pool = None
+_pool_lock: Optional[asyncio.Lock] = None
+SCHEMA_READY = False
+
+
+# -----------------------------------------------------------------------------
+# Pool
+# -----------------------------------------------------------------------------
+async def get_pool():
+    global _pool, _pool_lock
+    if _pool is not None:
+        return _pool
+    if aiomysql is None:
+        raise ImportError("Please install aiomysql: pip install aiomysql")
+
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is None:
+            _pool = await aiomysql.create_pool(
+                host=os.getenv("MYSQL_HOST", "localhost"),
+                port=int(os.getenv("MYSQL_PORT", "3306")),
+                user=os.getenv("MYSQL_USER", "root"),
+                password=os.getenv("MYSQL_PASSWORD", "root@123"),
+                db=os.getenv("MYSQL_DB", "taxiProduction"),
+                minsize=POOL_MIN,
+                maxsize=POOL_MAX,
+                autocommit=True,
+            )
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+
+async def fetch_all(sql: str, params: Sequence = ()) -> List[Dict]:
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            with timed("sql"):
+                await cur.execute(sql, params)
+                return list(await cur.fetchall())
+
+
+async def fetch_one(sql: str, params: Sequence = ()) -> Optional[Dict]:
+    rows = await fetch_all(sql, params)
+    return rows[0] if rows else None
+
+
+def _run_sync(fn, *args):
+    """Run a sync helper on its own mysql.connector connection."""
+    conn = get_conn()
+    try:
+        return fn(conn, *args)
+    finally:
+        conn.close()
+
+
+def _prepare_schema(conn) -> None:
+    ensure_trips_schema(conn)
+    ensure_summary_table(conn)
+
+
+async def ensure_schema() -> None:
+    global SCHEMA_READY
+    if not SCHEMA_READY:
+        await asyncio.to_thread(_run_sync, _prepare_schema)
+        SCHEMA_READY = True
+
+
+# -----------------------------------------------------------------------------
+# Rider / driver counts
+# -----------------------------------------------------------------------------
+async def read_daily_counts(report_date: date) -> Dict:
+    row = await fetch_one(
+        """
+        SELECT
+            (SELECT total_count FROM driver_daily_counts WHERE report_date = %s) AS daily_driver,
+            (SELECT total_count FROM rider_daily_counts WHERE report_date = %s) AS daily_rider
+        """,
+        (report_date, report_date),
+    )
+    return {
+        "report_date": report_date.isoformat(),
+        "daily_driver": int(row["daily_driver"] or 0),
+        "daily_rider": int(row["daily_rider"] or 0),
+    }
+
+
+async def read_hourly_counts(report_date: date) -> Dict:
+    driver_rows, rider_rows = await asyncio.gather(
+        fetch_all(
+            "SELECT hour, total_count FROM driver_hourly_counts WHERE report_date = %s ORDER BY hour",
+            (report_date,),
+        ),
+        fetch_all(
+            "SELECT hour, total_count FROM rider_hourly_counts WHERE report_date = %s ORDER BY hour",
+            (report_date,),
+        ),
+    )
+    return {
+        "report_date": report_date.isoformat(),
+        "hourly_driver": [
+            {"hour": int(row["hour"]), "driver_total_count": int(row["total_count"])}
+            for row in driver_rows
+        ],
+        "hourly_rider": [
+            {"hour": int(row["hour"]), "rider_total_count": int(row["total_count"])}
+            for row in rider_rows
+        ],
+    }
+
+
+# -----------------------------------------------------------------------------
+# Trip summaries
+# -----------------------------------------------------------------------------
+async def read_rollup_days(days: List[date]) -> Dict[date, Dict]:
+    """Async read_days: rollup rows by primary key, missing days counted from trips (no writes)."""
+    rows = {row["report_date"]: row for row in await fetch_all(rollup_rows_sql(len(days)), days)}
+    missing = [d for d in days if d not in rows]
+    if missing:
+        rows.update(await asyncio.to_thread(_run_sync, count_days, missing))
+    return rows
+
+
+async def get_trip_summaries(report_dates: Iterable) -> Dict[date, Dict]:
+    """Async get_trip_summary.get_trip_summaries; the three reads run concurrently."""
+    days = sorted({_as_date(d) for d in report_dates})
+    if not days:
+        return {}
+    await ensure_schema()
+
+    trips, *count_rows = await asyncio.gather(
+        read_rollup_days(days),
+        *(fetch_all(daily_totals_sql(table, len(days)), days) for _, table in COUNT_TABLES),
+    )
+    totals = {
+        entity: {row["report_date"]: int(row["total_count"]) for row in rows}
+        for (entity, _), rows in zip(COUNT_TABLES, count_rows)
+    }
+    return shape_trip_summaries(days, trips, totals)
+
+
+async def get_daily_trip_summary(report_date) -> Dict:
+    return {"report_date": report_date, **(await get_trip_summaries([report_date]))[_as_date(report_date)]}
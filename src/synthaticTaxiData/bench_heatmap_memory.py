@@ -0,0 +1,174 @@
+"""
+Benchmark: peak memory of the heatmap fetch path vs window length.
+
+Fills a scratch table (bench_points: activity_at, lat, lon) with N_POINTS
+synthetic points spread over DAYS days around NYC, then builds the heat
+layers and hex counts for windows of growing length two ways:
+
+- fetchall  : the previous path, fetchall() into a list of dicts, then
+              prepare_points + heat_layers over the full point list
+- streamed  : helperForHeatMap.stream_bins (unbuffered cursor, fetchmany
+              chunks into PointBins) + PointBins.layer
+
+Each case runs in a fresh process and reports its peak RSS (ru_maxrss)
+above an import-only baseline, plus the tracemalloc peak. The streamed
+column should stay flat as the window grows; fetchall grows with it.
+bench_points is dropped at the end.
+
+    python bench_heatmap_memory.py
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import random
+import resource
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+from h3 import h3
+
+from db_config import get_connection
+
+N_POINTS = 2_000_000
+DAYS = 7
+BATCH_SIZE = 10_000
+START = datetime(2025, 7, 7)
+WINDOWS_H = (1, 6, 24, 24 * DAYS)
+RESOLUTION = 8
+TABLE = "bench_points"
+
+
+def fill_table(rng):
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(
+        f"""
+        CREATE TABLE {TABLE} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            activity_at DATETIME NOT NULL,
+            lat DOUBLE,
+            lon DOUBLE,
+            KEY idx_activity_at (activity_at)
+        ) ENGINE=InnoDB
+        """
+    )
+    span = DAYS * 24 * 3600
+    batch = []
+    for _ in range(N_POINTS):
+        batch.append((
+            START + timedelta(seconds=rng.randrange(span)),
+            rng.uniform(40.70, 40.91),
+            rng.uniform(-74.02, -73.80),
+        ))
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(f"INSERT INTO {TABLE} (activity_at, lat, lon) VALUES (%s, %s, %s)", batch)
+            batch = []
+    if batch:
+        cursor.executemany(f"INSERT INTO {TABLE} (activity_at, lat, lon) VALUES (%s, %s, %s)", batch)
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+def bin_points(points, resolution):
+    """
+    The fetchall path's binning: [[lat, lon, weight], ...] collapsed to one
+    weighted centroid per H3 cell after the whole list is in memory.
+    """
+    if not points:
+        return []
+    arr = np.asarray(points, dtype=float)
+    cells = [h3.geo_to_h3(lat, lon, resolution) for lat, lon in arr[:, :2]]
+    _, inverse = np.unique(cells, return_inverse=True)
+
+    n = np.bincount(inverse)
+    lat = np.bincount(inverse, weights=arr[:, 0]) / n
+    lon = np.bincount(inverse, weights=arr[:, 1]) / n
+    weight = np.bincount(inverse, weights=arr[:, 2])
+
+    keep = weight != 0
+    return np.column_stack([lat[keep].round(6), lon[keep].round(6), weight[keep]]).tolist()
+
+
+def heat_layers(rider_points, driver_points, resolution):
+    """Binned rider, driver and net (+1 rider / -1 driver) layers from full point lists."""
+    net_points = [[lat, lon, 1] for lat, lon, _ in rider_points] + [[lat, lon, -1] for lat, lon, _ in driver_points]
+    return {
+        "riders": bin_points(rider_points, resolution),
+        "drivers": bin_points(driver_points, resolution),
+        "net": bin_points(net_points, resolution),
+    }
+
+
+def run_fetchall(start_ts, end_ts):
+    from helperForHeatMap import prepare_points
+
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(f"SELECT lat, lon FROM {TABLE} WHERE activity_at BETWEEN %s AND %s", (start_ts, end_ts))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    points, _ = prepare_points(rows)
+    layers = heat_layers(points, [], RESOLUTION)
+    return len(points), len(layers["riders"])
+
+
+def run_streamed(start_ts, end_ts):
+    from helperForHeatMap import stream_bins
+
+    bins = stream_bins(TABLE, start_ts, end_ts, RESOLUTION)
+    return bins.n, len(bins.layer())
+
+
+def measure(case, start_ts, end_ts, queue):
+    """Child process: run one case, report (rows, bins, seconds, peak RSS MB, tracemalloc MB)."""
+    import helperForHeatMap  # noqa: F401  (imports count towards the baseline)
+
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows, bins = {"fetchall": run_fetchall, "streamed": run_streamed}[case](start_ts, end_ts)
+    elapsed = time.perf_counter() - t0
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((rows, bins, elapsed, (peak_rss - base_rss) / 1024, traced_peak / 1e6))
+
+
+def run_case(ctx, case, start_ts, end_ts):
+    queue = ctx.Queue()
+    proc = ctx.Process(target=measure, args=(case, start_ts, end_ts, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    ctx = mp.get_context("spawn")
+    print(f"Filling {TABLE} with {N_POINTS:,} points over {DAYS} days...")
+    fill_table(random.Random(0))
+    try:
+        print(f"{'window':>8s} {'case':>9s} {'rows':>10s} {'bins':>6s} {'time':>8s} {'RSS+':>9s} {'traced':>9s}")
+        for hours in WINDOWS_H:
+            start_ts = START.strftime("%Y-%m-%d %H:%M:%S")
+            end_ts = (START + timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+            for case in ("fetchall", "streamed"):
+                rows, bins, elapsed, rss_mb, traced_mb = run_case(ctx, case, start_ts, end_ts)
+                print(f"{hours:>7d}h {case:>9s} {rows:>10,d} {bins:>6d} {elapsed:>7.2f}s "
+                      f"{rss_mb:>7.1f}MB {traced_mb:>7.1f}MB")
+    finally:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: hex-as-column wide table vs long-format hex_counts at 1k hexes.
+
+Writes DAYS x 24 hours of synthetic counts for N_HEXES hexes into scratch
+tables of both shapes, then times:
+- write      : load every day (wide: one row per hour, long: one row per
+               non-zero (hour, hex))
+- read hex   : one hex's full hourly series
+- read day   : every hex for one day
+
+Scratch tables (bench_wide, bench_long) are dropped at the end; the real
+hex_counts / hex_dim tables are not touched.
+
+    python bench_hex_counts.py
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import date, timedelta
+
+from db_config import get_connection
+
+N_HEXES = 1_000
+DAYS = 28
+FILL_RATE = 0.3  # share of (hour, hex) cells with a non-zero count
+BATCH_SIZE = 10_000
+
+
+def timed(label, fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    print(f"{label:<24s} {time.perf_counter() - t0:8.3f}s")
+    return result
+
+
+def synthetic_day(rng):
+    return [
+        [rng.randint(1, 40) if rng.random() < FILL_RATE else 0 for _ in range(N_HEXES)]
+        for _ in range(24)
+    ]
+
+
+def create_tables(cursor):
+    columns = ",\n    ".join(f"h_{k} INT DEFAULT 0" for k in range(N_HEXES))
+    cursor.execute("DROP TABLE IF EXISTS bench_wide")
+    cursor.execute("DROP TABLE IF EXISTS bench_long")
+    cursor.execute(
+        f"""
+        CREATE TABLE bench_wide (
+            report_date DATE NOT NULL,
+            hour TINYINT NOT NULL,
+            {columns},
+            PRIMARY KEY (report_date, hour)
+        ) ENGINE=InnoDB
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE bench_long (
+            report_date DATE NOT NULL,
+            hour TINYINT NOT NULL,
+            hex_idx SMALLINT UNSIGNED NOT NULL,
+            count INT NOT NULL,
+            PRIMARY KEY (report_date, hour, hex_idx),
+            KEY idx_hex_series (hex_idx, report_date, hour)
+        ) ENGINE=InnoDB
+        """
+    )
+
+
+def write_wide(conn, days):
+    cursor = conn.cursor()
+    cols = ", ".join(f"h_{k}" for k in range(N_HEXES))
+    params = ", ".join(["%s"] * (N_HEXES + 2))
+    for day, grid in days:
+        cursor.executemany(
+            f"INSERT INTO bench_wide (report_date, hour, {cols}) VALUES ({params})",
+            [(day, hour, *row) for hour, row in enumerate(grid)],
+        )
+    conn.commit()
+    cursor.close()
+
+
+def write_long(conn, days):
+    cursor = conn.cursor()
+    sql = "INSERT INTO bench_long (report_date, hour, hex_idx, count) VALUES (%s, %s, %s, %s)"
+    batch = []
+    for day, grid in days:
+        for hour, row in enumerate(grid):
+            batch.extend((day, hour, k, n) for k, n in enumerate(row) if n)
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+    conn.commit()
+    cursor.close()
+
+
+def read(conn, sql, params=()):
+    cursor = conn.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return len(rows)
+
+
+def main() -> None:
+    rng = random.Random(0)
+    start = date(2025, 7, 7)
+    days = [(start + timedelta(days=d), synthetic_day(rng)) for d in range(DAYS)]
+    probe_hex, probe_day = N_HEXES // 2, start + timedelta(days=DAYS // 2)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        create_tables(cursor)
+        conn.commit()
+        print(f"{N_HEXES} hexes x {DAYS} days x 24 hours, fill rate {FILL_RATE:.0%}")
+
+        timed("wide write", write_wide, conn, days)
+        timed("long write", write_long, conn, days)
+
+        timed("wide read hex series", read, conn,
+              f"SELECT report_date, hour, h_{probe_hex} FROM bench_wide")
+        timed("long read hex series", read, conn,
+              "SELECT report_date, hour, count FROM bench_long WHERE hex_idx = %s", (probe_hex,))
+
+        timed("wide read day", read, conn,
+              "SELECT * FROM bench_wide WHERE report_date = %s", (probe_day,))
+        timed("long read day", read, conn,
+              "SELECT hour, hex_idx, count FROM bench_long WHERE report_date = %s", (probe_day,))
+
+        for table in ("bench_wide", "bench_long"):
+            cursor.execute(
+                """
+                SELECT DATA_LENGTH + INDEX_LENGTH FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                """,
+                (table,),
+            )
+            print(f"{table + ' size':<24s} {cursor.fetchone()[0] / 1e6:8.1f}MB")
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS bench_wide")
+        cursor.execute("DROP TABLE IF EXISTS bench_long")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
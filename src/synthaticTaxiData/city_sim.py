@@ -0,0 +1,412 @@
+"""
+Discrete-event, in-memory simulation of a day of trips.
+
+trip.create_trips_for_date does several MySQL round trips per trip (random
+rider, driver search, insert, match logs, update). simulate_day instead
+loads riders and drivers once, then runs the whole day in memory:
+
+- a heap of (time, seq, kind, payload) events: REQUEST at each
+  trip_datetime_array timestamp, TRIP_END when a matched driver drops
+  off (the driver becomes available again at the drop point)
+- driver / rider positions and driver availability in NumPy arrays
+- DriverGrid, a lat/lon grid spatial index of available drivers with
+  cells of MAX_PICKUP_DISTANCE_KM, so a driver search looks at the 3x3
+  cells around the pickup
+- riders, timings, distance, fare and quality for every request drawn
+  up front in one helpers.build_trip_blueprints batch; the loop only runs
+  the match / cancel / rematch rules of trip.create_test_trip
+
+Unlike the DB path, a driver on a trip cannot be matched again until the
+trip ends. Match logs and driver updates carry simulated time, not the
+wall clock.
+
+The result is exported in bulk at the end: export_mysql writes it with
+executemany in one transaction per batch of trips (with their match logs
+and daily-summary delta, as create_trips_for_date does), and
+export_parquet writes one Parquet file per table (needs pyarrow).
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from math import ceil, cos, radians
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from h3 import h3
+
+from db_utils import (
+    H3_RES,
+    MATCH_LOG_TABLE,
+    ensure_match_log_table,
+    ensure_trips_schema,
+    get_conn,
+)
+from helpers import blueprint_rows, build_trip_blueprints, trip_datetime_array
+from trip import CANCELLATION_PROBABILITY, CANCELLATION_REASONS, MAX_PICKUP_DISTANCE_KM
+from trip_summary import TripSummaryAccumulator, ensure_summary_table
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+REQUEST = 0
+TRIP_END = 1
+EXPORT_BATCH_SIZE = 5000
+EARTH_RADIUS_KM = 6371.0
+
+TRIP_COLUMNS = (
+    "trip_id", "request_id", "rider_id", "driver_id",
+    "status", "requested_at", "matched_at", "start_at", "end_at",
+    "pickup_lat", "pickup_lon", "drop_lat", "drop_lon",
+    "pickup_distance_km", "ride_distance_km", "ride_duration_min",
+    "wait_time_min", "fare", "cancellation_reason",
+    "match_quality", "created_at", "meta",
+)
+MATCH_LOG_COLUMNS = (
+    "trip_id", "ts", "driver_id", "rider_id",
+    "distance_km", "match_status",
+    "matcher_version", "reward_estimate", "response_time_ms",
+)
+
+
+def haversine_km_array(lat, lon, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """helpers.haversine_km from one point to many."""
+    lat1, lon1 = radians(lat), radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+# -----------------------------------------------------------------------------
+# Spatial index
+# -----------------------------------------------------------------------------
+class DriverGrid:
+    """Available drivers bucketed into ~cell_km lat/lon cells."""
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell_km: float = MAX_PICKUP_DISTANCE_KM):
+        self.lats = lats
+        self.lons = lons
+        ref_lat = float(np.mean(lats)) if len(lats) else 40.7
+        self.dlat = cell_km / 111.0
+        self.dlon = cell_km / (111.0 * cos(radians(ref_lat)))
+        self.cells: Dict[Tuple[int, int], Set[int]] = {}
+        self.where: Dict[int, Tuple[int, int]] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(lat // self.dlat), int(lon // self.dlon)
+
+    def add(self, i: int) -> None:
+        cell = self._cell(self.lats[i], self.lons[i])
+        self.cells.setdefault(cell, set()).add(i)
+        self.where[i] = cell
+
+    def remove(self, i: int) -> None:
+        cell = self.where.pop(i)
+        members = self.cells[cell]
+        members.discard(i)
+        if not members:
+            del self.cells[cell]
+
+    def within(self, lat: float, lon: float, km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(driver indexes, distances) of available drivers within km."""
+        ci, cj = self._cell(lat, lon)
+        reach_i = ceil(km / (self.dlat * 111.0))
+        reach_j = ceil(km / (self.dlon * 111.0 * cos(radians(lat))))
+        candidates = [
+            i
+            for di in range(-reach_i, reach_i + 1)
+            for dj in range(-reach_j, reach_j + 1)
+            for i in self.cells.get((ci + di, cj + dj), ())
+        ]
+        if not candidates:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        idx = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        dist = haversine_km_array(lat, lon, self.lats[idx], self.lons[idx])
+        near = dist <= km
+        return idx[near], dist[near]
+
+
+# -----------------------------------------------------------------------------
+# Simulation
+# -----------------------------------------------------------------------------
+@dataclass
+class SimulationResult:
+    target_date: date
+    trips: List[Tuple] = field(default_factory=list)        # TRIP_COLUMNS order
+    match_logs: List[Tuple] = field(default_factory=list)   # MATCH_LOG_COLUMNS order
+    driver_updates: Dict[str, Tuple] = field(default_factory=dict)  # driver_id -> (lat, lon, h3, at)
+
+    def stats(self) -> Dict:
+        completed = sum(1 for t in self.trips if t[4] == "completed")
+        return {
+            "date": self.target_date.isoformat(),
+            "trips": len(self.trips),
+            "completed": completed,
+            "cancelled": len(self.trips) - completed,
+            "match_logs": len(self.match_logs),
+            "drivers_moved": len(self.driver_updates),
+        }
+
+
+def load_fleet(conn) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """Riders and drivers as column arrays (ids, lat, lon), one query each."""
+    fleet = []
+    cur = conn.cursor()
+    try:
+        for table, id_col in (("riders", "rider_id"), ("drivers", "driver_id")):
+            cur.execute(f"SELECT {id_col}, lat, lon FROM {table} WHERE lat IS NOT NULL AND lon IS NOT NULL")
+            rows = cur.fetchall()
+            fleet.append({
+                "ids": np.array([r[0] for r in rows], dtype=object),
+                "lat": np.array([r[1] for r in rows], dtype=float),
+                "lon": np.array([r[2] for r in rows], dtype=float),
+            })
+    finally:
+        cur.close()
+    return fleet[0], fleet[1]
+
+
+def simulate_day(
+    target_date: date,
+    num_rides: int,
+    riders: Dict[str, np.ndarray],
+    drivers: Dict[str, np.ndarray],
+    *,
+    max_rematch_attempts: int = 2,
+    matcher_version: str = "sim-v1",
+    retry_on_cancel: bool = True,
+    seed: Optional[int] = None,
+) -> SimulationResult:
+    """Simulate num_rides requests on target_date against in-memory riders/drivers."""
+    if not len(riders["ids"]):
+        raise ValueError("No riders to simulate; seed riders first")
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+
+    # Every request's rider and blueprint are drawn up front, in one batch
+    rider_idx = np_rng.integers(0, len(riders["ids"]), size=num_rides)
+    pickups = np.column_stack([riders["lat"][rider_idx], riders["lon"][rider_idx]])
+    blueprints = blueprint_rows(build_trip_blueprints(
+        num_rides, pickups, trip_datetime_array(target_date, num_rides, np_rng), rng=np_rng
+    ))
+
+    d_lat = drivers["lat"].copy()
+    d_lon = drivers["lon"].copy()
+    grid = DriverGrid(d_lat, d_lon)
+    for i in range(len(d_lat)):
+        grid.add(i)
+
+    result = SimulationResult(target_date)
+    events: List[Tuple] = []
+    seq = 0
+    for n, blueprint in enumerate(blueprints):
+        events.append((blueprint["requested_at"], seq, REQUEST, n))
+        seq += 1
+    heapq.heapify(events)
+
+    while events:
+        now, _, kind, payload = heapq.heappop(events)
+
+        if kind == TRIP_END:
+            i, lat, lon = payload
+            d_lat[i], d_lon[i] = lat, lon
+            grid.add(i)
+            result.driver_updates[drivers["ids"][i]] = (lat, lon, h3.geo_to_h3(lat, lon, H3_RES), now)
+            continue
+
+        blueprint = blueprints[payload]
+        rider_id = riders["ids"][rider_idx[payload]]
+        pickup_lat, pickup_lon = pickups[payload].tolist()
+        trip_id = str(uuid.uuid4())
+        response_time_ms = int((blueprint["matched_at"] - blueprint["requested_at"]).total_seconds() * 1000)
+
+        cancellations = []
+        success, driver_id, pickup_distance_km, final_reason = False, None, None, None
+        for attempt in range(1, max_rematch_attempts + 2):
+            idx, dist = grid.within(pickup_lat, pickup_lon, MAX_PICKUP_DISTANCE_KM)
+            if not len(idx):
+                driver, driver_id, reason = None, None, "no drivers available"
+            else:
+                k = rng.randrange(len(idx))
+                driver, driver_id = int(idx[k]), drivers["ids"][idx[k]]
+                pickup_distance_km = round(float(dist[k]), 2)
+                reason = rng.choice(CANCELLATION_REASONS) if rng.random() < CANCELLATION_PROBABILITY else None
+                result.match_logs.append((
+                    trip_id, blueprint["matched_at"], driver_id, rider_id,
+                    blueprint["distance_km"], "cancelled" if reason else "completed",
+                    matcher_version, blueprint["match_quality"], response_time_ms,
+                ))
+
+            if reason is None:
+                success = True
+                grid.remove(driver)
+                heapq.heappush(events, (blueprint["end_at"], seq, TRIP_END,
+                                        (driver, blueprint["drop_lat"], blueprint["drop_lon"])))
+                seq += 1
+                break
+
+            cancellations.append({
+                "attempt": attempt,
+                "driver_id": driver_id,
+                "reason": reason,
+                "timestamp": blueprint["matched_at"].isoformat(),
+            })
+            final_reason = reason
+            if not retry_on_cancel or attempt > max_rematch_attempts:
+                break
+
+        result.trips.append((
+            trip_id, str(uuid.uuid4()), rider_id, driver_id,
+            "completed" if success else "cancelled",
+            blueprint["requested_at"], blueprint["matched_at"], blueprint["start_at"], blueprint["end_at"],
+            pickup_lat, pickup_lon, blueprint["drop_lat"], blueprint["drop_lon"],
+            pickup_distance_km if success else None,
+            blueprint["distance_km"] if success else None,
+            blueprint["ride_duration_min"] if success else None,
+            blueprint["total_wait"],
+            blueprint["fare"] if success else None,
+            None if success else final_reason,
+            blueprint["match_quality"],
+            datetime.utcnow(),
+            json.dumps({"cancellation_attempts": cancellations}),
+        ))
+
+    return result
+
+
+# -----------------------------------------------------------------------------
+# Export
+# -----------------------------------------------------------------------------
+def _batches(rows: List, size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def batch_summary(trips: List[Tuple]) -> TripSummaryAccumulator:
+    """trip_daily_summary deltas of some TRIP_COLUMNS rows."""
+    col = {name: i for i, name in enumerate(TRIP_COLUMNS)}
+    summary = TripSummaryAccumulator()
+    for t in trips:
+        summary.add(
+            t[col["start_at"]].date(),
+            cancellation_reason=t[col["cancellation_reason"]],
+            cancel_attempts=len(json.loads(t[col["meta"]])["cancellation_attempts"]),
+            wait_time_min=t[col["wait_time_min"]],
+            fare=t[col["fare"]],
+            pickup_distance_km=t[col["pickup_distance_km"]],
+        )
+    return summary
+
+
+def export_mysql(
+    result: SimulationResult,
+    conn=None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    on_commit: Optional[Callable[[int, int], None]] = None,
+) -> None:
+    """
+    Bulk-insert the result, one transaction per batch of trips: the trips,
+    their match logs and their trip_daily_summary delta commit together,
+    then on_commit(done, total) runs. The final drivers' positions go in
+    the last batch's transaction. A failed or stopped export keeps the
+    batches committed so far, each complete.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_conn()
+    cur = conn.cursor()
+    try:
+        ensure_trips_schema(conn)
+        ensure_match_log_table(conn)
+        ensure_summary_table(conn)
+
+        trip_sql = (
+            f"INSERT INTO trips ({', '.join(TRIP_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(TRIP_COLUMNS))})"
+        )
+        log_sql = (
+            f"INSERT INTO {MATCH_LOG_TABLE} ({', '.join(MATCH_LOG_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * len(MATCH_LOG_COLUMNS))})"
+        )
+        logs_by_trip: Dict[str, List[Tuple]] = {}
+        for log in result.match_logs:
+            logs_by_trip.setdefault(log[0], []).append(log)
+        updates = [(lat, lon, cell, at, driver_id) for driver_id, (lat, lon, cell, at) in result.driver_updates.items()]
+
+        batches = list(_batches(result.trips, batch_size)) or [[]]
+        done = 0
+        for n, batch in enumerate(batches, 1):
+            if batch:
+                cur.executemany(trip_sql, batch)
+            logs = [log for t in batch for log in logs_by_trip.get(t[0], ())]
+            for log_batch in _batches(logs, batch_size):
+                cur.executemany(log_sql, log_batch)
+            if n == len(batches):
+                for update_batch in _batches(updates, batch_size):
+                    cur.executemany(
+                        "UPDATE drivers SET lat=%s, lon=%s, current_h3=%s, last_update_at=%s WHERE driver_id=%s",
+                        update_batch,
+                    )
+            batch_summary(batch).flush(conn)
+            conn.commit()
+            done += len(batch)
+            if on_commit:
+                on_commit(done, len(result.trips))
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        if own_conn:
+            conn.close()
+
+
+def export_parquet(result: SimulationResult, directory: str) -> Dict[str, str]:
+    """Write trips and match logs as <directory>/<table>_<date>.parquet; returns the paths."""
+    import pandas as pd
+
+    os.makedirs(directory, exist_ok=True)
+    day = result.target_date.isoformat()
+    paths = {}
+    for table, columns, rows in (
+        ("trips", TRIP_COLUMNS, result.trips),
+        ("trip_match_logs", MATCH_LOG_COLUMNS, result.match_logs),
+    ):
+        path = os.path.join(directory, f"{table}_{day}.parquet")
+        pd.DataFrame.from_records(rows, columns=columns).to_parquet(path, index=False)
+        paths[table] = path
+    return paths
+
+
+def simulate_trips_for_date(
+    target_date: date,
+    num_rides: int,
+    *,
+    parquet_dir: Optional[str] = None,
+    seed: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    on_commit: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    Simulate a day and export it: to MySQL by default (like
+    create_trips_for_date), or to Parquet files when parquet_dir is given.
+    """
+    conn = get_conn()
+    try:
+        riders, drivers = load_fleet(conn)
+        result = simulate_day(target_date, num_rides, riders, drivers, seed=seed)
+        if parquet_dir:
+            stats = {**result.stats(), "files": export_parquet(result, parquet_dir)}
+        else:
+            export_mysql(result, conn, batch_size=batch_size, on_commit=on_commit)
+            stats = result.stats()
+    finally:
+        conn.close()
+    print(f"Simulated {stats['trips']} trips for {target_date} ({stats['completed']} completed)")
+    return stats
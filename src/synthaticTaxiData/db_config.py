@@ -8,11 +8,16 @@ project can run locally without extra wiring:
     MYSQL_USER (default: root)
     MYSQL_PASSWORD (default: password)
     MYSQL_DB (default: taxi)
+
+Connections are wrapped so statements run during an API request are
+counted and timed (see query_stats).
 """
 
 import os
 import mysql.connector
 
+from query_stats import InstrumentedConnection
+
 
 def get_connection():
     """
@@ -21,13 +26,13 @@ def get_connection():
     Using dictionary=True so callers can treat rows like dicts, similar to the
     previous sqlite3.Row behaviour.
     """
-    return mysql.connector.connect(
+    return InstrumentedConnection(mysql.connector.connect(
         host=os.getenv("MYSQL_HOST", "localhost"),
         port=int(os.getenv("MYSQL_PORT", "3306")),
         user=os.getenv("MYSQL_USER", "root"),
         password=os.getenv("MYSQL_PASSWORD", "root@123"),
         database=os.getenv("MYSQL_DB", "taxiProduction"),
         autocommit=False,
-    )
+    ))
 
 
@@ -4,9 +4,10 @@ Database helpers for taxi simulation scripts (MySQL).
 import random
 from datetime import datetime
 
-from schema import TRIP_MATCH_LOGS_TABLE
+from schema import DRIVERS_MIGRATIONS, TRIP_MATCH_LOGS_TABLE, TRIPS_MIGRATIONS
 from helpers import bbox_for_distance, haversine_km
 from db_config import get_connection
+from hex_counts import ensure_forecast_view
 
 try:
     from h3 import h3
@@ -16,6 +17,8 @@ except ImportError:
 H3_RES = 7
 MATCH_LOG_TABLE = "trip_match_logs"
 MATCH_LOG_TABLE_READY = False
+TRIPS_SCHEMA_READY = False
+DRIVERS_SCHEMA_READY = False
 
 
 def get_conn():
@@ -40,6 +43,59 @@ def ensure_match_log_table(conn):
     MATCH_LOG_TABLE_READY = True
 
 
+def _apply_migrations(conn, table, migrations):
+    """Run the (kind, name, ddl) migrations whose column/index `table` lacks."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (table,),
+    )
+    existing = {("column", row[0]) for row in cur.fetchall()}
+    cur.execute(
+        """
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (table,),
+    )
+    existing |= {("index", row[0]) for row in cur.fetchall()}
+
+    for kind, name, ddl in migrations:
+        if (kind, name) not in existing:
+            cur.execute(ddl)
+    conn.commit()
+    cur.close()
+
+
+def ensure_trips_schema(conn):
+    """
+    Apply TRIPS_MIGRATIONS (generated columns, indexes) that an existing
+    trips table is missing. Checked once per process.
+    """
+    global TRIPS_SCHEMA_READY
+    if TRIPS_SCHEMA_READY:
+        return
+
+    _apply_migrations(conn, "trips", TRIPS_MIGRATIONS)
+    TRIPS_SCHEMA_READY = True
+
+
+def ensure_drivers_schema(conn):
+    """
+    Apply DRIVERS_MIGRATIONS (row_updated_at and the indexes) that an
+    existing drivers table is missing. Checked once per process.
+    """
+    global DRIVERS_SCHEMA_READY
+    if DRIVERS_SCHEMA_READY:
+        return
+
+    _apply_migrations(conn, "drivers", DRIVERS_MIGRATIONS)
+    DRIVERS_SCHEMA_READY = True
+
+
 def fetch_one_rider(conn):
     cur = conn.cursor(dictionary=True)
     cur.execute("SELECT * FROM riders ORDER BY RAND() LIMIT 1")
@@ -182,42 +238,26 @@ def update_driver_location(conn, driver_id, lat, lon, *, commit=True):
         "last_update_at": now
     }
 
-def create_forecast_table_with_hex_columns():
+def create_forecast_table_with_hex_columns(table_name="forecasts"):
     """
-    Dynamically create a forecasts table where each hex_id from h3_hexes becomes a column.
-    Column name = original hex_id.
+    Ensure the long-format hex_forecasts table and a `table_name` view that
+    presents it with one column per hex_id from h3_hexes (column name =
+    original hex_id). Returns {hex_id: hex_idx}.
     """
     conn = get_conn()
     cursor = conn.cursor()
 
-    # 1. Fetch all hex_ids
-    cursor.execute("SELECT hex_id FROM h3_hexes ORDER BY id")
-    hex_ids = [row[0] for row in cursor.fetchall()]
+    try:
+        cursor.execute("SELECT hex_id FROM h3_hexes ORDER BY id")
+        hex_ids = [row[0] for row in cursor.fetchall()]
+
+        if not hex_ids:
+            raise ValueError("No hex_ids found in h3_hexes table.")
 
-    if not hex_ids:
+        hex_index = ensure_forecast_view(cursor, hex_ids, table_name)
+        conn.commit()
+    finally:
         cursor.close()
         conn.close()
-        raise ValueError("No hex_ids found in h3_hexes table.")
-
-    # 2. Build columns: use hex_id as column name
-    hex_columns = ",\n".join([f"`{hex_id}` DOUBLE" for hex_id in hex_ids])
-
-    # 3. Create forecasts table
-    create_table_sql = f"""
-    CREATE TABLE IF NOT EXISTS forecasts (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        Date_time DATETIME NOT NULL,
-        {hex_columns},
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """
-
-    cursor.execute(create_table_sql)
-    conn.commit()
-
-    cursor.close()
-    conn.close()
 
-    # Return mapping (hex_id -> hex_id column name)
-    hex_column_map = {hex_id: hex_id for hex_id in hex_ids}
-    return hex_column_map
+    return hex_index
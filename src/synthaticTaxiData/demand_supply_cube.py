@@ -0,0 +1,393 @@
+"""
+In-memory rider / driver counts per 15-minute bucket and H3 res-7 hex.
+
+DemandSupplyCube keeps one int32 array
+
+    counts[bucket, hex_idx, entity]     entity 0 = riders, 1 = drivers
+
+for a rolling range of CUBE_DAYS days, so a hex-count query over any
+[start_ts, end_ts) on bucket boundaries is a slice-sum over axis 0 instead
+of a per-request point scan.
+
+- load() reads the last CUBE_DAYS days (up to the newest activity, but
+  never past now) once, at startup; after that append() folds only rows above the cube's
+  own id watermark per table, like incremental_aggregate.
+- query() calls append() at most every CUBE_REFRESH_SECONDS, so newly
+  inserted rows show up without a reload.
+- Points are counted with the heatmap's semantics (inside NYC_POLYGON,
+  see hex_geojson.nyc_hex). New hexes get the next hex_idx.
+- Like the raw point scan, a driver counts at its current position: the
+  cube remembers the cell it counted each driver row in, and every
+  append() re-reads the drivers whose row_updated_at moved since the last
+  one (held back MOVE_LAG for late commits) and moves their count.
+- Windows are half-open, [start_ts, end_ts), as on the pyramid and raw
+  hex-count paths.
+- When appended rows run past the end of the range, the window rolls
+  forward and the oldest buckets are dropped. Rows timestamped after now
+  never move the window: they wait until their bucket starts.
+- An append reads the database without holding the cube lock; queries
+  keep answering from the current counts until the new rows are applied.
+
+Like the other process caches, each uvicorn worker holds its own cube:
+    CUBE_DAYS                (default: 14; 0 disables the cube)
+    CUBE_REFRESH_SECONDS     (default: 5)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from db_config import get_connection
+from db_utils import ensure_drivers_schema
+from hex_geojson import nyc_hex
+from helperForHeatMap import H3_RESOLUTION
+from incremental_aggregate import SOURCE_CONFIG, settled_high_water, stream_rows
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+CUBE_DAYS = int(os.getenv("CUBE_DAYS", "14"))
+CUBE_REFRESH_SECONDS = float(os.getenv("CUBE_REFRESH_SECONDS", "5"))
+BUCKET = timedelta(minutes=15)
+BUCKETS_PER_DAY = int(timedelta(days=1) / BUCKET)
+ENTITIES = ("riders", "drivers")
+MOVING = "drivers"  # rows whose lat/lon are updated in place
+MOVE_LAG = timedelta(seconds=60)
+
+
+def _parse(ts) -> datetime:
+    return ts if isinstance(ts, datetime) else datetime.fromisoformat(str(ts))
+
+
+def _bucket_floor(ts: datetime) -> datetime:
+    return ts.replace(minute=ts.minute - ts.minute % 15, second=0, microsecond=0)
+
+
+def is_bucket_aligned(ts) -> bool:
+    ts = _parse(ts)
+    return ts == _bucket_floor(ts)
+
+
+class DemandSupplyCube:
+    def __init__(self, days: int = CUBE_DAYS, resolution: int = H3_RESOLUTION):
+        self.days = days
+        self.resolution = resolution
+        self.lock = threading.RLock()  # guards the counts; held only to read or apply them
+        self.append_lock = threading.Lock()  # one load/append at a time, across its DB reads
+        self.origin: Optional[datetime] = None  # start of bucket 0
+        self.counts = np.zeros((0, 0, len(ENTITIES)), dtype=np.int32)
+        self.hex_ids: List[str] = []
+        self.hex_index: Dict[str, int] = {}
+        self.last_ids = {entity: 0 for entity in ENTITIES}
+        self.cells: Dict[int, Tuple[datetime, int]] = {}  # MOVING row id -> (bucket start, hex_idx)
+        self.future: Dict[Tuple[int, int], Tuple[datetime, int]] = {}  # (entity, row id) -> (ts, hex_idx)
+        self.moved_since: Optional[datetime] = None
+        self.appended_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self.origin is not None
+
+    @property
+    def max_buckets(self) -> int:
+        return self.days * BUCKETS_PER_DAY
+
+    # -------------------------------------------------------------------------
+    # Load / append
+    # -------------------------------------------------------------------------
+    def load(self) -> Dict:
+        """(Re)build the cube from the last `days` days of activity up to now."""
+        with self.append_lock:
+            conn = get_connection()
+            ensure_drivers_schema(conn)
+            cursor = conn.cursor()
+            try:
+                newest = []
+                for entity in ENTITIES:
+                    cursor.execute(f"SELECT MAX({SOURCE_CONFIG[entity]['time_col']}) FROM {entity}")
+                    newest.append(cursor.fetchone()[0])
+                cursor.execute("SELECT NOW(6)")
+                now = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+                conn.close()
+
+            newest = [ts for ts in newest if ts is not None]
+            horizon = _bucket_floor(now) + BUCKET
+            end = min(_bucket_floor(max(newest)) + BUCKET, horizon) if newest else horizon
+            with self.lock:
+                self.origin = end - self.max_buckets * BUCKET
+                self.counts = np.zeros((self.max_buckets, 0, len(ENTITIES)), dtype=np.int32)
+                self.hex_ids, self.hex_index = [], {}
+                self.last_ids = {entity: 0 for entity in ENTITIES}
+                self.cells = {}
+                self.future = {}
+                self.moved_since = now - MOVE_LAG
+            return self._append()
+
+    def append(self) -> Dict:
+        """
+        Fold rows above the per-table watermark and re-place moved drivers;
+        returns {entity: rows, "moved": drivers re-placed}.
+        """
+        if not self.loaded:
+            raise RuntimeError("DemandSupplyCube.load() has not run")
+        with self.append_lock:
+            return self._append()
+
+    def _append(self) -> Dict:
+        """
+        append() with append_lock held. The database is read without
+        self.lock, so queries keep answering from the current counts; the
+        lock is only taken to snapshot the watermarks and to apply the rows.
+        """
+        with self.lock:
+            last_ids, moved_since, origin = dict(self.last_ids), self.moved_since, self.origin
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT NOW(6)")
+            now = cursor.fetchone()[0]
+            new_rows = {entity: self._fetch_new(cursor, entity, last_ids[entity], origin) for entity in ENTITIES}
+            moved_rows = self._fetch_moved(cursor, moved_since, last_ids[MOVING], origin)
+        finally:
+            cursor.close()
+            conn.close()
+
+        horizon = _bucket_floor(now) + BUCKET  # rows at or after it are not counted yet
+        folded = {}
+        with self.lock:
+            for e, entity in enumerate(ENTITIES):
+                hi, rows = new_rows[entity]
+                folded[entity] = self._fold(e, entity, rows, horizon)
+                self.last_ids[entity] = hi
+            folded["moved"] = self._apply_moves(moved_rows, horizon)
+            self._release_future(horizon)
+            self.moved_since = now - MOVE_LAG
+            self.appended_at = time.monotonic()
+        return folded
+
+    def _located(self, rows) -> List[Tuple[int, datetime, Optional[str]]]:
+        """(id, ts, hex or None outside NYC) for (id, ts, lat, lon) rows."""
+        return [
+            (row_id, ts, None if lat is None or lon is None else nyc_hex(lat, lon, self.resolution))
+            for row_id, ts, lat, lon in rows
+        ]
+
+    def _fetch_new(self, cursor, entity: str, lo: int, origin: datetime):
+        """(new watermark, located rows with id in (lo, watermark])."""
+        cfg = SOURCE_CONFIG[entity]
+        hi, _ = settled_high_water(cursor, entity, lo)
+        if hi <= lo:
+            return lo, []
+        cursor.execute(
+            f"""
+            SELECT id, {cfg["time_col"]}, {cfg["lat_col"]}, {cfg["lon_col"]}
+            FROM {entity}
+            WHERE id > %s AND id <= %s
+              AND {cfg["time_col"]} >= %s
+            """,
+            (lo, hi, origin),
+        )
+        return hi, self._located(stream_rows(cursor))
+
+    def _fetch_moved(self, cursor, since: datetime, last_id: int, origin: datetime):
+        """Located MOVING rows up to last_id written at or after `since`."""
+        cfg = SOURCE_CONFIG[MOVING]
+        cursor.execute(
+            f"""
+            SELECT id, {cfg["time_col"]}, {cfg["lat_col"]}, {cfg["lon_col"]}
+            FROM {MOVING}
+            WHERE row_updated_at >= %s AND id <= %s
+              AND {cfg["time_col"]} >= %s
+            """,
+            (since, last_id, origin),
+        )
+        return self._located(stream_rows(cursor))
+
+    def _index(self, h: Optional[str]) -> Optional[int]:
+        """hex_idx of a hex (registering a new one), None for None."""
+        if h is None:
+            return None
+        if h not in self.hex_index:
+            self.hex_index[h] = len(self.hex_ids)
+            self.hex_ids.append(h)
+        return self.hex_index[h]
+
+    def _fold(self, e: int, entity: str, rows, horizon: datetime) -> int:
+        """
+        Count located rows. Rows timestamped at or after `horizon` (the
+        future) wait in self.future until their bucket starts, instead of
+        rolling the window past now.
+        """
+        placed = []
+        for row_id, ts, h in rows:
+            idx = self._index(h)
+            if idx is None:
+                continue
+            if ts >= horizon:
+                self.future[(e, row_id)] = (ts, idx)
+            else:
+                placed.append((row_id, ts, idx))
+        return self._add(e, entity, placed)
+
+    def _release_future(self, horizon: datetime) -> None:
+        """Count the waiting future rows whose bucket has started."""
+        due = sorted(key for key, (ts, _) in self.future.items() if ts < horizon)
+        for e, entity in enumerate(ENTITIES):
+            placed = [(row_id, *self.future[(f, row_id)]) for f, row_id in due if f == e]
+            self._add(e, entity, placed)
+        for key in due:
+            del self.future[key]
+
+    def _add(self, e: int, entity: str, placed: List[Tuple[int, datetime, int]]) -> int:
+        if not placed:
+            return 0
+        buckets = []
+        for row_id, ts, idx in placed:
+            if entity == MOVING:
+                self.cells[row_id] = (_bucket_floor(ts), idx)
+            buckets.append((ts - self.origin) // BUCKET)
+
+        buckets = self._fit(np.asarray(buckets, dtype=np.int64))
+        hexes = np.asarray([idx for _, _, idx in placed], dtype=np.int64)
+        keep = buckets >= 0  # rows that fell off the front of a rolled window
+        np.add.at(self.counts[:, :, e], (buckets[keep], hexes[keep]), 1)
+        return int(keep.sum())
+
+    def _apply_moves(self, rows, horizon: datetime) -> int:
+        """Move the count of every already-folded driver whose position changed."""
+        e = ENTITIES.index(MOVING)
+        moved = 0
+        for row_id, ts, h in rows:
+            idx = self._index(h)
+            waiting = self.future.pop((e, row_id), None)
+            if idx is not None and ts >= horizon:
+                self.future[(e, row_id)] = (ts, idx)  # still in the future: counted on release
+                moved += waiting != (ts, idx)
+                continue
+            new = None if idx is None else (_bucket_floor(ts), idx)
+            old = self.cells.get(row_id)
+            if new == old:
+                continue
+            self._grow_hexes()
+            if old is not None:
+                self._bump(old, e, -1)
+                del self.cells[row_id]
+            if new is not None:
+                self._bump(new, e, 1)
+                self.cells[row_id] = new
+            moved += 1
+        return moved
+
+    def _bump(self, cell: Tuple[datetime, int], e: int, delta: int) -> None:
+        bucket = (cell[0] - self.origin) // BUCKET
+        if 0 <= bucket < self.counts.shape[0]:
+            self.counts[bucket, cell[1], e] += delta
+
+    def _grow_hexes(self) -> None:
+        n_buckets, n_hex, n_ent = self.counts.shape
+        if len(self.hex_ids) > n_hex:
+            grown = np.zeros((n_buckets, len(self.hex_ids), n_ent), dtype=np.int32)
+            grown[:, :n_hex] = self.counts
+            self.counts = grown
+
+    def _fit(self, buckets: np.ndarray) -> np.ndarray:
+        """Grow the hex axis for new hexes and roll the window past the newest bucket."""
+        self._grow_hexes()
+        n_buckets = self.counts.shape[0]
+        shift = int(buckets.max()) + 1 - n_buckets
+        if shift > 0:
+            rolled = np.zeros_like(self.counts)
+            if shift < n_buckets:
+                rolled[:-shift] = self.counts[shift:]
+            self.counts = rolled
+            self.origin += shift * BUCKET
+            self.cells = {k: v for k, v in self.cells.items() if v[0] >= self.origin}
+            buckets = buckets - shift
+        return buckets
+
+    # -------------------------------------------------------------------------
+    # Query
+    # -------------------------------------------------------------------------
+    def covers(self, start_ts, end_ts, resolution: int = H3_RESOLUTION) -> bool:
+        """True when [start_ts, end_ts) is on bucket boundaries inside the range."""
+        if not self.loaded or resolution != self.resolution:
+            return False
+        if not (is_bucket_aligned(start_ts) and is_bucket_aligned(end_ts)):
+            return False
+        with self.lock:
+            end = self.origin + self.counts.shape[0] * BUCKET
+            return self.origin <= _parse(start_ts) <= _parse(end_ts) <= end
+
+    def refresh(self) -> None:
+        """append() when due, unless another thread is already appending."""
+        if time.monotonic() - self.appended_at < CUBE_REFRESH_SECONDS:
+            return
+        if self.append_lock.acquire(blocking=False):
+            try:
+                self._append()
+            finally:
+                self.append_lock.release()
+
+    def query(self, start_ts, end_ts) -> Dict[str, Counter]:
+        """{entity: {hex_id: count}} over the buckets [start_ts, end_ts)."""
+        self.refresh()
+        with self.lock:
+            lo = max((_parse(start_ts) - self.origin) // BUCKET, 0)
+            hi = min((_parse(end_ts) - self.origin) // BUCKET, self.counts.shape[0])
+            totals = self.counts[lo:hi].sum(axis=0, dtype=np.int64) if hi > lo else None
+            result = {}
+            for e, entity in enumerate(ENTITIES):
+                if totals is None:
+                    result[entity] = Counter()
+                    continue
+                nz = np.flatnonzero(totals[:, e])
+                result[entity] = Counter({self.hex_ids[i]: int(totals[i, e]) for i in nz})
+            return result
+
+    def status(self) -> Dict:
+        with self.lock:
+            return {
+                "loaded": self.loaded,
+                "origin": self.origin.isoformat() if self.origin else None,
+                "buckets": int(self.counts.shape[0]),
+                "hexes": len(self.hex_ids),
+                "last_ids": dict(self.last_ids),
+                "tracked_drivers": len(self.cells),
+                "future_rows": len(self.future),
+                "bytes": int(self.counts.nbytes),
+            }
+
+
+# -----------------------------------------------------------------------------
+# Process-wide instance
+# -----------------------------------------------------------------------------
+_cube: Optional[DemandSupplyCube] = None
+_cube_lock = threading.Lock()
+
+
+def get_cube() -> Optional[DemandSupplyCube]:
+    """The loaded process cube, or None when disabled or not loaded yet."""
+    return _cube if _cube is not None and _cube.loaded else None
+
+
+def warm_cube() -> Optional[DemandSupplyCube]:
+    """Create and load the process cube (call once at startup)."""
+    global _cube
+    if CUBE_DAYS <= 0:
+        return None
+    with _cube_lock:
+        if _cube is None:
+            cube = DemandSupplyCube()
+            cube.load()
+            _cube = cube
+    return _cube
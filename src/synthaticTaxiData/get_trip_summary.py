@@ -1,6 +1,8 @@
 import mysql.connector
 import json
-from db_utils import get_conn
+from datetime import date, datetime, timedelta
+from db_utils import get_conn, ensure_trips_schema
+from trip_summary import read_days
 
 # -------------------------------
 # Daily counts (JSON-ready)
@@ -92,35 +94,79 @@ def get_hourly_rider_counts(report_date):
 # Trip summary (JSON-ready)
 # -------------------------------
 def get_daily_trip_summary(report_date):
-    conn = get_conn()
-    cursor = conn.cursor(dictionary=True)
+    """Trip summary for one day, served from the trip_daily_summary rollup."""
+    return {"report_date": report_date, **get_trip_summaries([report_date])[_as_date(report_date)]}
+
+# -------------------------------
+# Multi-day summary (rollup + one grouped query per count table)
+# -------------------------------
+COUNT_TABLES = (("driver", "driver_hourly_counts"), ("rider", "rider_hourly_counts"))
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def daily_totals_sql(table, n_days):
+    placeholders = ", ".join(["%s"] * n_days)
+    return f"""
+        SELECT report_date, SUM(total_count) AS total_count
+        FROM {table}
+        WHERE report_date IN ({placeholders})
+        GROUP BY report_date
+    """
 
-    trip_query = """
-        SELECT
-            COUNT(*) AS total_trips,
-            SUM(CASE WHEN cancellation_reason IS NULL THEN 1 ELSE 0 END) AS completed_trips,
-            SUM(CASE WHEN cancellation_reason IS NOT NULL OR JSON_EXTRACT(meta, '$.cancellation_attempt') > 0 THEN 1 ELSE 0 END) AS cancelled_trips
-        FROM trips
-        WHERE DATE(start_at) = %s
+
+def shape_trip_summaries(days, trips, totals):
+    """Combine rollup rows and {entity: {date: total}} into per-day summaries."""
+    result = {}
+    for d in days:
+        row = trips[d]
+        daily_driver = totals["driver"].get(d, 0)
+        daily_rider = totals["rider"].get(d, 0)
+        result[d] = {
+            "total_trips": int(row["total_trips"]),
+            "completed_trips": int(row["completed_trips"]),
+            "cancelled_trips": int(row["cancelled_trips"]),
+            "attempt_free_trips": int(row["total_trips"] - row["trips_with_cancel_attempts"]),
+            "attempt_cancelled_trips": int(row["trips_with_cancel_attempts"]),
+            "avg_wait_min": row["avg_wait_min"],
+            "avg_fare": row["avg_fare"],
+            "p95_pickup_distance_km": row["p95_pickup_distance_km"],
+            "daily_driver": daily_driver,
+            "daily_rider": daily_rider,
+            "missed_rides": max(daily_rider - daily_driver, 0),
+        }
+    return result
+
+
+def get_trip_summaries(report_dates):
     """
-    cursor.execute(trip_query, (report_date,))
-    result = cursor.fetchone()
+    {date: summary} for several days on one connection: a primary-key read
+    of trip_daily_summary plus one grouped query per count table.
 
-    # Get daily driver/rider for missed rides
-    daily_driver = get_daily_driver_count(report_date)["driver_total_count"]
-    daily_rider = get_daily_rider_count(report_date)["rider_total_count"]
-    missed_rides = max(daily_rider - daily_driver, 0)
+    completed/cancelled follow /summary/trip-summary (cancellation_reason
+    set or not); attempt_* split the day by whether a trip saw any
+    cancellation attempt, as /trip-summary-mondays reports.
+    """
+    days = sorted({_as_date(d) for d in report_dates})
+    if not days:
+        return {}
+
+    conn = get_conn()
+    ensure_trips_schema(conn)
+    trips = read_days(conn, days)
+
+    cursor = conn.cursor(dictionary=True)
+    totals = {}
+    for entity, table in COUNT_TABLES:
+        cursor.execute(daily_totals_sql(table, len(days)), days)
+        totals[entity] = {row["report_date"]: int(row["total_count"]) for row in cursor.fetchall()}
 
     cursor.close()
     conn.close()
 
-    return {
-        "report_date": report_date,
-        "total_trips": int(result["total_trips"]) if result else 0,
-        "completed_trips": int(result["completed_trips"]) if result else 0,
-        "cancelled_trips": int(result["cancelled_trips"]) if result else 0,
-        "missed_rides": missed_rides
-    }
+    return shape_trip_summaries(days, trips, totals)
 
 # -------------------------------
 # Main block
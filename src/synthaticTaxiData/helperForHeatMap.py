@@ -1,37 +1,72 @@
-import mysql.connector
+import numpy as np
+import shapely
 from shapely.geometry import Point, Polygon
 from h3 import h3
-from collections import defaultdict
+from collections import Counter, defaultdict
 from nyc_polygon import NYC_POLYGON
+from db_config import get_connection
 import folium
 
 H3_RESOLUTION = 7
 FIXED_ZOOM = 12
+CHUNK_SIZE = 10_000  # rows per fetchmany; bounds memory per window
+DEFAULT_CENTER = (40.75, -73.97)
+
+# Map zoom -> H3 resolution of the heat-layer bins (res 7 ~1.2 km, 8 ~460 m,
+# 9 ~170 m edge): finer bins only where the map can show them
+ZOOM_RESOLUTION = {10: 7, 11: 8, 12: 8, 13: 9}
+DEFAULT_ZOOM = 11
+
+shapely.prepare(NYC_POLYGON)  # speeds up the repeated contains tests
+
+
+def in_nyc(lats, lons):
+    """
+    NYC_POLYGON.contains(Point(lon, lat)) for scalars or arrays. The one
+    clip predicate of every heatmap count (PointBins, hex_geojson.nyc_hex
+    and the cube built on it), so the paths agree on edge points.
+    """
+    return shapely.contains_xy(NYC_POLYGON, lons, lats)
+
 # ============================================================
 # 2. Database
 # ============================================================
-def fetch_points(table, start_ts, end_ts):
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="root@123",
-        database="taxiProduction",
-    )
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(
-        f"""
-        SELECT lat, lon
-        FROM {table}
-        WHERE activity_at BETWEEN %s AND %s
-        """,
-        (start_ts, end_ts),
-    )
-    rows = cursor.fetchall()
+def iter_point_chunks(table, start_ts, end_ts, chunk_size=CHUNK_SIZE, end_exclusive=False):
+    """
+    (k, 2) float arrays of [lat, lon] for the window, read from an
+    unbuffered cursor chunk_size rows at a time, so memory stays constant
+    however long the window is. Rows without coordinates are dropped.
+    The window includes end_ts unless end_exclusive ([start_ts, end_ts),
+    as the hex-count pyramid and cube read it).
+    """
+    upper = "<" if end_exclusive else "<="
+    conn = get_connection()
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(
+            f"""
+            SELECT lat, lon
+            FROM {table}
+            WHERE activity_at >= %s AND activity_at {upper} %s
+              AND lat IS NOT NULL AND lon IS NOT NULL
+            """,
+            (start_ts, end_ts),
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield np.asarray(rows, dtype=float)
+    finally:
+        cursor.close()
+        conn.close()
 
-    cursor.close()
-    conn.close()
-    return rows
+
+def fetch_points(table, start_ts, end_ts, end_exclusive=False):
+    """Stream {"lat", "lon"} rows of the window (see iter_point_chunks)."""
+    for chunk in iter_point_chunks(table, start_ts, end_ts, end_exclusive=end_exclusive):
+        for lat, lon in chunk.tolist():
+            yield {"lat": lat, "lon": lon}
 
 # ============================================================
 # 3. Filter + H3 aggregation
@@ -49,16 +84,118 @@ def prepare_points(rows):
 
     return points, hex_counts
 
+
+class PointBins:
+    """
+    Running aggregate of the points inside NYC_POLYGON: H3_RESOLUTION hex
+    counts plus per-cell coordinate sums at the heat-bin resolution. Its
+    size grows with the number of cells, not with the number of points.
+    """
+
+    def __init__(self, resolution):
+        self.resolution = resolution
+        self.hex_counts = Counter()
+        self.cells = defaultdict(lambda: [0.0, 0.0, 0])  # cell -> [lat sum, lon sum, n]
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.n = 0
+
+    def add(self, chunk):
+        inside = chunk[in_nyc(chunk[:, 0], chunk[:, 1])]
+        if not len(inside):
+            return
+        self.lat_sum += float(inside[:, 0].sum())
+        self.lon_sum += float(inside[:, 1].sum())
+        self.n += len(inside)
+
+        hexes = [h3.geo_to_h3(lat, lon, H3_RESOLUTION) for lat, lon in inside.tolist()]
+        self.hex_counts.update(hexes)
+        if self.resolution == H3_RESOLUTION:
+            cells = hexes
+        else:
+            cells = [h3.geo_to_h3(lat, lon, self.resolution) for lat, lon in inside.tolist()]
+
+        keys, inverse = np.unique(cells, return_inverse=True)
+        lat = np.bincount(inverse, weights=inside[:, 0])
+        lon = np.bincount(inverse, weights=inside[:, 1])
+        n = np.bincount(inverse)
+        for key, a, b, c in zip(keys.tolist(), lat.tolist(), lon.tolist(), n.tolist()):
+            acc = self.cells[key]
+            acc[0] += a
+            acc[1] += b
+            acc[2] += c
+
+    def layer(self, sign=1):
+        """Heat layer [[mean lat, mean lon, sign * n], ...]: one weighted centroid per cell."""
+        return [
+            [round(a / c, 6), round(b / c, 6), float(sign * c)]
+            for a, b, c in self.cells.values()
+        ]
+
+
+def stream_bins(table, start_ts, end_ts, resolution=H3_RESOLUTION):
+    """PointBins of a window, fed chunk by chunk from iter_point_chunks."""
+    bins = PointBins(resolution)
+    for chunk in iter_point_chunks(table, start_ts, end_ts):
+        bins.add(chunk)
+    return bins
+
+
+def net_layer(rider_bins, driver_bins):
+    """Per-cell centroid of +1 rider / -1 driver points; cells that cancel out are dropped."""
+    layer = []
+    for cell in set(rider_bins.cells) | set(driver_bins.cells):
+        r = rider_bins.cells.get(cell, (0.0, 0.0, 0))
+        d = driver_bins.cells.get(cell, (0.0, 0.0, 0))
+        weight = r[2] - d[2]
+        if weight == 0:
+            continue
+        n = r[2] + d[2]
+        layer.append([round((r[0] + d[0]) / n, 6), round((r[1] + d[1]) / n, 6), float(weight)])
+    return layer
+
+
+def streamed_layers(rider_bins, driver_bins):
+    """Rider, driver and net heat layers from two PointBins."""
+    return {"riders": rider_bins.layer(), "drivers": driver_bins.layer(), "net": net_layer(rider_bins, driver_bins)}
+
+
+def bins_center(*bins):
+    n = sum(b.n for b in bins)
+    if not n:
+        return DEFAULT_CENTER
+    return sum(b.lat_sum for b in bins) / n, sum(b.lon_sum for b in bins) / n
+
+# ============================================================
+# 3b. Server-side binning for heat layers
+# ============================================================
+def resolution_for_zoom(zoom):
+    zoom = min(max(int(zoom), min(ZOOM_RESOLUTION)), max(ZOOM_RESOLUTION))
+    return ZOOM_RESOLUTION[zoom]
+
+
+def binned_points(start_ts, end_ts, zoom=DEFAULT_ZOOM):
+    """Binned heat layers for a window, sized for the given map zoom."""
+    resolution = resolution_for_zoom(zoom)
+    rider_bins = stream_bins("riders", start_ts, end_ts, resolution)
+    driver_bins = stream_bins("drivers", start_ts, end_ts, resolution)
+    return {"zoom": int(zoom), "resolution": resolution, **streamed_layers(rider_bins, driver_bins)}
+
 # ============================================================
 # 4. Map creation
 # ============================================================
-def create_map(all_points):
-    center_lat = sum(p[0] for p in all_points) / len(all_points)
-    center_lon = sum(p[1] for p in all_points) / len(all_points)
+def create_map(all_points=None, zoom_start=11, center=None):
+    if center is not None:
+        center_lat, center_lon = center
+    elif all_points:
+        center_lat = sum(p[0] for p in all_points) / len(all_points)
+        center_lon = sum(p[1] for p in all_points) / len(all_points)
+    else:
+        center_lat, center_lon = DEFAULT_CENTER
 
     m = folium.Map(
         location=[center_lat, center_lon],
-        zoom_start=11,   # initial zoom
+        zoom_start=zoom_start,   # initial zoom
         min_zoom=10,     # optional
         max_zoom=13,     # 🚫 cannot zoom beyond 13
         tiles="CartoDB Positron",
@@ -4,6 +4,7 @@ Shared helper utilities for trip generation and geometry calculations.
 import random
 from math import radians, cos, sin, asin, sqrt
 
+import numpy as np
 from shapely.geometry import Point, Polygon
 
 # NYC boundary (rough bounding polygon)
@@ -216,3 +217,131 @@ def build_trip_blueprint(pickup_lat, pickup_lon, forced_timestamp=None):
         "fare": fare,
         "match_quality": match_quality
     }
+
+
+# ---------------------------------------------------------
+# Vectorized blueprints (whole batch per NumPy call)
+# ---------------------------------------------------------
+TRIP_TIME_BUCKETS = [
+    (0.30, (time(6, 0),  time(10, 0))),
+    (0.30, (time(18, 0), time(22, 0))),
+    (0.20, (time(10, 0), time(18, 0))),
+    (0.10, (time(22, 0), time(23, 59, 59))),
+    (0.10, (time(0, 0),  time(6, 0))),
+]
+_POLY_XY = np.asarray(NYC_POLYGON.exterior.coords)  # (lat, lon) vertices, closed
+
+
+def contains_points(lats, lons, ring=_POLY_XY):
+    """
+    Vectorized NYC_POLYGON.contains(Point(lat, lon)) (even-odd ray casting).
+    ring: closed (lat, lon) vertices of another polygon to test against.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    inside = np.zeros(lats.shape, dtype=bool)
+    for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+        crosses = (y1 > lons) != (y2 > lons)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_at = x1 + (lons - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (lats < x_at)
+    return inside
+
+
+def generate_drop_points(pickup_lats, pickup_lons, distances_km, rng=None):
+    """
+    generate_drop_point for a batch: every round draws one candidate for each
+    trip still without a drop point and keeps those inside the polygon.
+    """
+    rng = rng or np.random.default_rng()
+    delta = np.asarray(distances_km, dtype=float) / 111.0
+    drop_lats = np.empty(len(delta))
+    drop_lons = np.empty(len(delta))
+    pending = np.arange(len(delta))
+    while len(pending):
+        d = delta[pending]
+        lats = pickup_lats[pending] + rng.uniform(-d, d)
+        lons = pickup_lons[pending] + rng.uniform(-d, d)
+        ok = contains_points(lats, lons)
+        drop_lats[pending[ok]] = lats[ok]
+        drop_lons[pending[ok]] = lons[ok]
+        pending = pending[~ok]
+    return drop_lats, drop_lons
+
+
+def trip_datetime_array(target_date: date, num_trips: int, rng=None):
+    """
+    generate_trip_datetime(randomize_within_bucket=True) as a sorted
+    datetime64[s] array.
+    """
+    rng = rng or np.random.default_rng()
+    counts = [int(num_trips * ratio) for ratio, _ in TRIP_TIME_BUCKETS]
+    counts[0] += num_trips - sum(counts)
+
+    seconds = []
+    for count, (_, (t_start, t_end)) in zip(counts, TRIP_TIME_BUCKETS):
+        start_sec = t_start.hour * 3600 + t_start.minute * 60 + t_start.second
+        end_sec = t_end.hour * 3600 + t_end.minute * 60 + t_end.second
+        if end_sec < start_sec:
+            end_sec += 24 * 3600
+        seconds.append(rng.integers(start_sec, end_sec + 1, size=count) % (24 * 3600))
+
+    offsets = np.sort(np.concatenate(seconds)).astype("timedelta64[s]")
+    return np.datetime64(target_date, "s") + offsets
+
+
+def _minutes(values):
+    return (np.asarray(values) * 60e6).astype("timedelta64[us]")
+
+
+def build_trip_blueprints(n, pickups, requested_at=None, target_date=None, rng=None):
+    """
+    build_trip_blueprint for n trips at once. pickups is an (n, 2) array of
+    (lat, lon); requested_at a datetime64 array (default: trip_datetime_array
+    for target_date, else today). Returns the same keys as
+    build_trip_blueprint, each an array of length n (timestamps as
+    datetime64[us]).
+    """
+    rng = rng or np.random.default_rng()
+    pickups = np.asarray(pickups, dtype=float).reshape(n, 2)
+    if requested_at is None:
+        requested_at = trip_datetime_array(target_date or date.today(), n, rng)
+    requested_at = np.asarray(requested_at, dtype="datetime64[us]")
+
+    distance_km = rng.uniform(3, 22, n).round(2)
+    drop_lat, drop_lon = generate_drop_points(pickups[:, 0], pickups[:, 1], distance_km, rng)
+
+    total_wait = rng.uniform(0, 7, n)
+    request_to_match = total_wait * rng.uniform(0.3, 0.7, n)
+    match_to_start = total_wait - request_to_match
+
+    matched_at = requested_at + _minutes(request_to_match)
+    start_at = matched_at + _minutes(match_to_start)
+
+    ride_duration_min = distance_km / 30.0 * 60.0
+    end_at = start_at + _minutes(ride_duration_min)
+
+    fare = (3 + distance_km * 1.4 + rng.uniform(0, 3, n)).round(2)
+    match_quality = rng.uniform(0.7, 0.99, n).round(4)
+
+    return {
+        "distance_km": distance_km,
+        "drop_lat": drop_lat,
+        "drop_lon": drop_lon,
+        "requested_at": requested_at,
+        "total_wait": total_wait,
+        "request_to_match": request_to_match,
+        "match_to_start": match_to_start,
+        "matched_at": matched_at,
+        "start_at": start_at,
+        "end_at": end_at,
+        "ride_duration_min": ride_duration_min,
+        "fare": fare,
+        "match_quality": match_quality,
+    }
+
+
+def blueprint_rows(blueprints):
+    """Per-trip dicts (plain Python values) from build_trip_blueprints output."""
+    columns = {key: values.tolist() for key, values in blueprints.items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
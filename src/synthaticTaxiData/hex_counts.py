@@ -0,0 +1,297 @@
+"""
+Long-format H3 count store.
+
+One narrow fact table replaces the hex-as-column tables:
+
+    hex_counts(entity, report_date, hour, hex_idx, count)
+
+clustered on (entity, report_date, hour, hex_idx), with hex ids mapped to
+SMALLINT indices through hex_dim. Adding or dropping hexes never needs DDL
+on the fact table, and one hex's series is an index range read instead of
+a scan over wide rows. Only non-zero counts are stored.
+
+The wide tables (rider_hex_hourly_fixed, trip_daily_hex_counts, ...) live
+on as views with the same name and columns, built by conditional
+aggregation over hex_counts; daily views sum the hourly rows. Forecasts get
+the same treatment: hex_forecasts(forecast_at, hex_idx, yhat) behind a
+`forecasts` view.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+BATCH_SIZE = 10_000
+LEGACY_SUFFIX = "_legacy"
+
+HEX_DIM_TABLE = """
+CREATE TABLE IF NOT EXISTS hex_dim (
+    hex_idx SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    hex_id VARCHAR(32) NOT NULL UNIQUE
+) ENGINE=InnoDB;
+"""
+
+HEX_COUNTS_TABLE = """
+CREATE TABLE IF NOT EXISTS hex_counts (
+    entity ENUM('trips', 'riders', 'drivers') NOT NULL,
+    report_date DATE NOT NULL,
+    hour TINYINT NOT NULL,
+    hex_idx SMALLINT UNSIGNED NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (entity, report_date, hour, hex_idx),
+    KEY idx_hex_series (entity, hex_idx, report_date, hour)
+) ENGINE=InnoDB;
+"""
+
+HEX_FORECASTS_TABLE = """
+CREATE TABLE IF NOT EXISTS hex_forecasts (
+    forecast_at DATETIME NOT NULL,
+    hex_idx SMALLINT UNSIGNED NOT NULL,
+    yhat DOUBLE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (forecast_at, hex_idx)
+) ENGINE=InnoDB;
+"""
+
+# Wide tables kept as views: name -> (entity, hourly, date column, hour column)
+WIDE_VIEWS = {
+    "rider_hex_hourly_fixed": ("riders", True, "report_date", "hour"),
+    "drivers_hex_hourly_fixed": ("drivers", True, "report_date", "hour"),
+    "rider_hex_daily_fixed": ("riders", False, "report_date", None),
+    "drivers_hex_daily_fixed": ("drivers", False, "report_date", None),
+    "trip_hourly_hex_counts": ("trips", True, "trip_date", "trip_hour"),
+    "rider_hourly_hex_counts": ("riders", True, "trip_date", "trip_hour"),
+    "driver_hourly_hex_counts": ("drivers", True, "trip_date", "trip_hour"),
+    "trip_daily_hex_counts": ("trips", False, "trip_date", None),
+    "rider_daily_hex_counts": ("riders", False, "trip_date", None),
+    "driver_daily_hex_counts": ("drivers", False, "trip_date", None),
+}
+
+
+def _values(row) -> list:
+    return list(row.values()) if isinstance(row, dict) else list(row)
+
+
+# -----------------------------------------------------------------------------
+# Schema management
+# -----------------------------------------------------------------------------
+def create_tables(cursor) -> None:
+    for ddl in (HEX_DIM_TABLE, HEX_COUNTS_TABLE, HEX_FORECASTS_TABLE):
+        cursor.execute(ddl)
+
+
+def _hex_dim(cursor) -> Dict[str, int]:
+    cursor.execute("SELECT hex_id, hex_idx FROM hex_dim")
+    return {h: int(idx) for h, idx in (_values(r) for r in cursor.fetchall())}
+
+
+def hex_index_map(cursor, hex_ids: Iterable[str]) -> Dict[str, int]:
+    """
+    Return {hex_id: hex_idx}, registering any hex not yet in hex_dim. Only
+    the missing hexes are inserted: every INSERT IGNORE attempt consumes an
+    AUTO_INCREMENT value, and hex_idx is a SMALLINT.
+    """
+    hex_ids = list(hex_ids)
+    mapping = _hex_dim(cursor)
+    missing = list(dict.fromkeys(h for h in hex_ids if h not in mapping))
+    if missing:
+        cursor.executemany("INSERT IGNORE INTO hex_dim (hex_id) VALUES (%s)", [(h,) for h in missing])
+        mapping = _hex_dim(cursor)
+    return {h: mapping[h] for h in hex_ids}
+
+
+def table_type(cursor, name: str) -> Optional[str]:
+    """'BASE TABLE', 'VIEW' or None if the name does not exist."""
+    cursor.execute(
+        """
+        SELECT TABLE_TYPE FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (name,),
+    )
+    row = cursor.fetchone()
+    return _values(row)[0] if row else None
+
+
+def wide_view_sql(name: str, hex_index: Dict[str, int]) -> str:
+    entity, hourly, date_col, hour_col = WIDE_VIEWS[name]
+    columns = ",\n        ".join(
+        f"SUM(IF(hex_idx = {idx}, count, 0)) AS h_{h}" for h, idx in hex_index.items()
+    )
+    if hourly:
+        keys = f"report_date AS {date_col}, hour AS {hour_col}"
+        group = "report_date, hour"
+    else:
+        keys = f"report_date AS {date_col}"
+        group = "report_date"
+    return f"""
+    CREATE OR REPLACE VIEW {name} AS
+    SELECT {keys},
+        {columns}
+    FROM hex_counts
+    WHERE entity = '{entity}'
+    GROUP BY {group}
+    """
+
+
+def column_names(cursor, name: str) -> set:
+    cursor.execute(
+        """
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """,
+        (name,),
+    )
+    return {_values(r)[0] for r in cursor.fetchall()}
+
+
+def ensure_wide_view(cursor, name: str, hex_ids: Sequence[str]) -> Dict[str, int]:
+    """
+    Make `name` a compatibility view over hex_counts with one h_<hex> column
+    per hex_ids entry. A legacy wide table of that name is migrated (hourly
+    tables only; daily tables are derivable from the hourly ones) and
+    renamed to <name>_legacy first. Returns the hex index map.
+
+    This is schema setup: CREATE VIEW is DDL and commits implicitly, so it
+    is skipped when the view already has every column. Write paths only
+    need hex_index_map.
+    """
+    kind = table_type(cursor, name)
+    if kind == "VIEW" and {f"h_{h}" for h in hex_ids} <= column_names(cursor, name):
+        return hex_index_map(cursor, hex_ids)
+
+    create_tables(cursor)
+    hex_index = hex_index_map(cursor, hex_ids)
+    if kind == "BASE TABLE":
+        if WIDE_VIEWS[name][1]:
+            migrate_wide_table(cursor, name, hex_index)
+        cursor.execute(f"RENAME TABLE {name} TO {name}{LEGACY_SUFFIX}")
+    cursor.execute(wide_view_sql(name, hex_index))
+    return hex_index
+
+
+# -----------------------------------------------------------------------------
+# Loading
+# -----------------------------------------------------------------------------
+def bulk_upsert(cursor, rows: Iterable[Tuple[str, date, int, int, int]], additive: bool = False) -> int:
+    """
+    Write (entity, report_date, hour, hex_idx, count) rows in batched
+    multi-row inserts. additive=True adds to existing counts instead of
+    overwriting them.
+    """
+    update = "count + VALUES(count)" if additive else "VALUES(count)"
+    sql = f"""
+    INSERT INTO hex_counts (entity, report_date, hour, hex_idx, count)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE count = {update}
+    """
+    batch: List[Tuple] = []
+    written = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        written += len(batch)
+    return written
+
+
+def replace_day(
+    cursor,
+    entity: str,
+    report_date: date,
+    hourly: Dict[int, Counter],
+    hex_index: Dict[str, int],
+) -> int:
+    """
+    Replace the counts of entity on report_date for the hexes in hex_index
+    with {hour: Counter({hex_id: n})}. Hexes outside hex_index are untouched.
+    """
+    idx_list = ", ".join(str(i) for i in hex_index.values())
+    cursor.execute(
+        f"DELETE FROM hex_counts WHERE entity = %s AND report_date = %s AND hex_idx IN ({idx_list})",
+        (entity, report_date),
+    )
+    return bulk_upsert(
+        cursor,
+        (
+            (entity, report_date, int(hour), hex_index[h], int(n))
+            for hour, counter in hourly.items()
+            for h, n in counter.items()
+            if n and h in hex_index
+        ),
+    )
+
+
+def migrate_wide_table(cursor, table: str, hex_index: Dict[str, int]) -> None:
+    """Copy a legacy hourly wide table into hex_counts, one INSERT ... SELECT per hex column."""
+    entity, _, date_col, hour_col = WIDE_VIEWS[table]
+    present = column_names(cursor, table)
+    for h, idx in hex_index.items():
+        if f"h_{h}" not in present:
+            continue
+        cursor.execute(
+            f"""
+            INSERT INTO hex_counts (entity, report_date, hour, hex_idx, count)
+            SELECT %s, {date_col}, {hour_col}, %s, h_{h}
+            FROM {table}
+            WHERE h_{h} <> 0
+            ON DUPLICATE KEY UPDATE count = VALUES(count)
+            """,
+            (entity, idx),
+        )
+
+
+# -----------------------------------------------------------------------------
+# Forecasts
+# -----------------------------------------------------------------------------
+def ensure_forecast_view(cursor, hex_ids: Sequence[str], name: str = "forecasts") -> Dict[str, int]:
+    """
+    Present hex_forecasts as the legacy forecasts table (Date_time plus one
+    DOUBLE column named after each hex). A legacy table is renamed to
+    <name>_legacy; forecasts are regenerable, so it is not migrated.
+    """
+    create_tables(cursor)
+    hex_index = hex_index_map(cursor, hex_ids)
+    if table_type(cursor, name) == "BASE TABLE":
+        cursor.execute(f"RENAME TABLE {name} TO {name}{LEGACY_SUFFIX}")
+    columns = ",\n        ".join(
+        f"MAX(IF(hex_idx = {idx}, yhat, NULL)) AS `{h}`" for h, idx in hex_index.items()
+    )
+    cursor.execute(
+        f"""
+        CREATE OR REPLACE VIEW {name} AS
+        SELECT forecast_at AS Date_time,
+            {columns},
+            MAX(created_at) AS created_at
+        FROM hex_forecasts
+        GROUP BY forecast_at
+        """
+    )
+    return hex_index
+
+
+def replace_forecasts(cursor, rows: Sequence[Tuple], hex_index: Dict[str, int]) -> int:
+    """
+    Write (forecast_at, hex_id, yhat) rows, replacing any existing forecast
+    for the same (forecast_at, hex).
+    """
+    data = [(ts, hex_index[h], yhat) for ts, h, yhat in rows if h in hex_index]
+    for i in range(0, len(data), BATCH_SIZE):
+        cursor.executemany(
+            """
+            INSERT INTO hex_forecasts (forecast_at, hex_idx, yhat)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE yhat = VALUES(yhat), created_at = CURRENT_TIMESTAMP
+            """,
+            data[i:i + BATCH_SIZE],
+        )
+    return len(data)
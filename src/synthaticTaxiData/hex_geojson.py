@@ -0,0 +1,187 @@
+"""
+Hex aggregates of rider / driver points as compact JSON or GeoJSON.
+
+The data counterpart of rider_driver_heatmap.map_result_dynamic: the same
+NYC-clipped H3 res-7 counts, but returned as data for a client-side map
+(map_file/heatmap.html) instead of a server-rendered folium file.
+
+- hex_geometry(h) clips each hex to NYC_POLYGON once per process and
+  caches the GeoJSON geometry, so a request never redoes the shapely work.
+- Points are assigned to a hex first; the point-in-polygon test only runs
+  for points in hexes that straddle the NYC boundary.
+- iter_geojson yields the FeatureCollection feature by feature, so the
+  API can stream it without building the whole document.
+- Windows on 15-minute boundaries are answered by the in-memory
+  DemandSupplyCube when one is passed in and covers them; other
+  hour-aligned windows are read from hex_pyramid_counts (res 6-9); the
+  rest count the raw points at the requested resolution.
+- All three paths give the same counts: each reads the window as
+  [start_ts, end_ts), clips per point with helperForHeatMap.in_nyc, maps
+  points with geo_to_h3 at the requested resolution and counts drivers at
+  their current position. The pyramid is only as fresh as the last
+  incremental_aggregate fold, so hours with rows the fold has not seen
+  yet (incremental_aggregate.stale_hours) are swapped for a raw count.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from h3 import h3
+from shapely.geometry import Polygon, mapping
+
+import hex_pyramid
+from db_config import get_connection
+from incremental_aggregate import stale_hours
+from nyc_polygon import NYC_POLYGON
+from helperForHeatMap import fetch_points, in_nyc, H3_RESOLUTION
+
+COORD_DECIMALS = 5  # ~1 m; keeps the payload small
+HOUR = timedelta(hours=1)
+
+
+# -----------------------------------------------------------------------------
+# Geometry
+# -----------------------------------------------------------------------------
+def _round_coords(coords):
+    if isinstance(coords[0], (int, float)):
+        return [round(c, COORD_DECIMALS) for c in coords]
+    return [_round_coords(c) for c in coords]
+
+
+@lru_cache(maxsize=None)
+def _hex_shape(h: str) -> Tuple[Optional[Dict], bool]:
+    """(clipped GeoJSON geometry or None, hex lies fully inside NYC_POLYGON)."""
+    boundary = h3.h3_to_geo_boundary(h, geo_json=True)
+    poly = Polygon([(lon, lat) for lon, lat in boundary])
+    if NYC_POLYGON.contains(poly):
+        clipped, inside = poly, True
+    else:
+        clipped, inside = NYC_POLYGON.intersection(poly), False
+    if clipped.is_empty:
+        return None, False
+    geom = mapping(clipped)
+    return {"type": geom["type"], "coordinates": _round_coords(geom["coordinates"])}, inside
+
+
+def hex_geometry(h: str) -> Optional[Dict]:
+    return _hex_shape(h)[0]
+
+
+# -----------------------------------------------------------------------------
+# Aggregation
+# -----------------------------------------------------------------------------
+def nyc_hex(lat: float, lon: float, resolution: int = H3_RESOLUTION) -> Optional[str]:
+    """Hex of a point inside NYC_POLYGON, else None (prepare_points semantics)."""
+    h = h3.geo_to_h3(lat, lon, resolution)
+    geom, inside = _hex_shape(h)
+    if geom is None:
+        return None
+    if inside or in_nyc(lat, lon):
+        return h
+    return None
+
+
+def count_points(rows: Iterable[Dict], resolution: int = H3_RESOLUTION) -> Counter:
+    """{hex_id: count} of the points inside NYC_POLYGON."""
+    counts: Counter = Counter()
+    for r in rows:
+        lat, lon = r["lat"], r["lon"]
+        if lat is None or lon is None:
+            continue
+        h = nyc_hex(lat, lon, resolution)
+        if h is not None:
+            counts[h] += 1
+    return counts
+
+
+def raw_count(entity: str, resolution: int, start_ts, end_ts) -> Counter:
+    """{hex_id: count} of an entity's raw points in [start_ts, end_ts)."""
+    return count_points(fetch_points(entity, start_ts, end_ts, end_exclusive=True), resolution)
+
+
+def raw_counts(resolution: int, start_ts, end_ts) -> Tuple[Counter, Counter]:
+    return tuple(raw_count(entity, resolution, start_ts, end_ts) for entity in ("riders", "drivers"))
+
+
+def read_pyramid(resolution: int, start_ts, end_ts) -> Tuple[Counter, Counter]:
+    """
+    (riders, drivers) from hex_pyramid_counts over the hour-aligned window.
+    Stale hours (rows not folded yet) are counted from the raw points
+    instead; an entity with no current pyramid is counted raw throughout.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        result = []
+        for entity in ("riders", "drivers"):
+            stale = stale_hours(cursor, entity, start_ts, end_ts)
+            if stale is None:
+                result.append(raw_count(entity, resolution, start_ts, end_ts))
+                continue
+            counts = hex_pyramid.read_window(cursor, entity, resolution, start_ts, end_ts)
+            for hour in stale:
+                counts.subtract(hex_pyramid.read_window(cursor, entity, resolution, hour, hour + HOUR))
+                counts.update(raw_count(entity, resolution, hour, hour + HOUR))
+            result.append(Counter({h: n for h, n in counts.items() if n > 0}))
+    finally:
+        cursor.close()
+        conn.close()
+    return tuple(result)
+
+
+def hex_aggregates(start_ts: str, end_ts: str, resolution: int = H3_RESOLUTION, cube=None) -> List[Dict]:
+    """
+    [{hex, riders, drivers, net}] for every hex with activity in the window.
+    cube: an optional loaded DemandSupplyCube, tried first.
+    """
+    if cube is not None and cube.covers(start_ts, end_ts, resolution):
+        counts = cube.query(start_ts, end_ts)
+        riders, drivers = counts["riders"], counts["drivers"]
+    elif hex_pyramid.is_hour_aligned(start_ts, end_ts):
+        riders, drivers = read_pyramid(resolution, start_ts, end_ts)
+    else:
+        riders, drivers = raw_counts(resolution, start_ts, end_ts)
+    return [
+        {"hex": h, "riders": riders[h], "drivers": drivers[h], "net": riders[h] - drivers[h]}
+        for h in sorted(set(riders) | set(drivers))
+    ]
+
+
+def compact(aggregates: List[Dict]) -> Dict:
+    """Column-oriented form: one list per field instead of one object per hex."""
+    return {
+        "hexes": [a["hex"] for a in aggregates],
+        "riders": [a["riders"] for a in aggregates],
+        "drivers": [a["drivers"] for a in aggregates],
+    }
+
+
+def iter_geojson(aggregates: List[Dict]) -> Iterator[bytes]:
+    """Yield a GeoJSON FeatureCollection of the hexes in chunks."""
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+    for a in aggregates:
+        geometry = hex_geometry(a["hex"])
+        if geometry is None:
+            continue
+        feature = {"type": "Feature", "id": a["hex"], "geometry": geometry, "properties": a}
+        yield (b"" if first else b",") + json.dumps(feature, separators=(",", ":")).encode()
+        first = False
+    yield b"]}"
+
+
+def geometry_collection(hexes: Iterable[str]) -> Dict:
+    """FeatureCollection of bare hex geometries (counts-independent, cacheable for long)."""
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": h, "geometry": geom, "properties": {"hex": h}}
+            for h in hexes
+            if (geom := hex_geometry(h)) is not None
+        ],
+    }
@@ -0,0 +1,150 @@
+"""
+Multi-resolution hex pyramid: hourly counts per H3 cell at resolutions 6-9.
+
+Only points inside NYC_POLYGON are counted (helperForHeatMap.in_nyc, the
+heatmap's per-point clip), and each one is indexed with geo_to_h3 at every
+level rather than rolled up with h3_to_parent: H3 children do not tile
+their parent exactly, and a roll-up would put points near a cell edge in a
+different res-7 cell than the raw hex-count scan does. Every level thus
+counts exactly what a per-point scan at that resolution counts. Cells are
+stored as their 64-bit H3 index (BIGINT UNSIGNED), which needs no
+dimension table at any resolution.
+
+    hex_pyramid_counts (entity, resolution, report_date, hour, cell, count)
+
+Unlike hex_counts (res 7, HEX_LIST only, unclipped), the pyramid covers
+every cell with activity inside NYC.
+
+incremental_aggregate folds new rows into the pyramid in the same pass as
+the other counts. Readers (heatmap, hex grouping, forecasting) use
+read_window / the forecast data loader at the resolution they need.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from h3 import h3
+
+from helperForHeatMap import in_nyc
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+RESOLUTIONS = (6, 7, 8, 9)
+BATCH_SIZE = 10_000
+
+PYRAMID_TABLE = """
+CREATE TABLE IF NOT EXISTS hex_pyramid_counts (
+    entity ENUM('trips', 'riders', 'drivers') NOT NULL,
+    resolution TINYINT UNSIGNED NOT NULL,
+    report_date DATE NOT NULL,
+    hour TINYINT NOT NULL,
+    cell BIGINT UNSIGNED NOT NULL,
+    count INT NOT NULL,
+    PRIMARY KEY (entity, resolution, report_date, hour, cell),
+    KEY idx_cell_series (resolution, cell, report_date, hour)
+) ENGINE=InnoDB;
+"""
+
+
+def cell_int(hex_id: str) -> int:
+    return int(hex_id, 16)
+
+
+def cell_str(cell: int) -> str:
+    return format(int(cell), "x")
+
+
+def create_table(cursor) -> None:
+    cursor.execute(PYRAMID_TABLE)
+
+
+# -----------------------------------------------------------------------------
+# Index / write
+# -----------------------------------------------------------------------------
+def point_cells(lat: float, lon: float) -> List[Tuple[int, str]]:
+    """[(resolution, cell)] of a point at every level; [] outside NYC_POLYGON."""
+    if not in_nyc(lat, lon):
+        return []
+    return [(res, h3.geo_to_h3(lat, lon, res)) for res in RESOLUTIONS]
+
+
+def upsert(cursor, entity: str, cells: Counter) -> None:
+    """Add {(resolution, day, hour, cell): n} to the pyramid (additive, like apply_deltas)."""
+    sql = """
+        INSERT INTO hex_pyramid_counts (entity, resolution, report_date, hour, cell, count)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+    """
+    batch = []
+    for (res, day, hour, cell), n in cells.items():
+        batch.append((entity, res, day, hour, cell_int(cell), n))
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+
+
+def clear(cursor, entity: str, start_date=None, end_date=None) -> None:
+    """Delete an entity's counts, or only those of days [start_date, end_date]."""
+    if start_date is None:
+        cursor.execute("DELETE FROM hex_pyramid_counts WHERE entity = %s", (entity,))
+        return
+    cursor.execute(
+        "DELETE FROM hex_pyramid_counts WHERE entity = %s AND report_date BETWEEN %s AND %s",
+        (entity, start_date, end_date),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Read
+# -----------------------------------------------------------------------------
+def _parse(ts) -> datetime:
+    return ts if isinstance(ts, datetime) else datetime.fromisoformat(str(ts))
+
+
+def _hour_floor(ts) -> datetime:
+    return _parse(ts).replace(minute=0, second=0, microsecond=0)
+
+
+def is_hour_aligned(start_ts, end_ts) -> bool:
+    return all(_parse(t) == _hour_floor(t) for t in (start_ts, end_ts))
+
+
+def read_window(cursor, entity: str, resolution: int, start_ts, end_ts) -> Counter:
+    """
+    {hex_id: count} over the hours [start_ts, end_ts) at `resolution`.
+    Timestamps are floored to the hour; the read is a primary-key range scan.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unsupported resolution: {resolution}")
+    start, end = _hour_floor(start_ts), _hour_floor(end_ts)
+    if end <= start:
+        return Counter()
+
+    cursor.execute(
+        """
+        SELECT cell, SUM(count)
+        FROM hex_pyramid_counts
+        WHERE entity = %s AND resolution = %s
+          AND report_date BETWEEN %s AND %s
+          AND (report_date > %s OR hour >= %s)
+          AND (report_date < %s OR hour < %s)
+        GROUP BY cell
+        """,
+        (
+            entity, resolution,
+            start.date(), (end - timedelta(hours=1)).date(),
+            start.date(), start.hour,
+            end.date(), end.hour,
+        ),
+    )
+    return Counter({cell_str(cell): int(n) for cell, n in cursor.fetchall()})
+
+
+def read_windows(cursor, entities: Iterable[str], resolution: int, start_ts, end_ts) -> Dict[str, Counter]:
+    return {entity: read_window(cursor, entity, resolution, start_ts, end_ts) for entity in entities}
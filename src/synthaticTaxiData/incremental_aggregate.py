@@ -0,0 +1,650 @@
+"""
+Incremental (streaming) aggregation of riders, drivers and trips.
+
+Each source table has a high-water mark (last aggregated `id`, plus the
+`created_at` of that row for reference) in aggregation_state. A run reads
+only rows with id in (last_id, hi] through the primary key, counts them
+per day / hour / hex in memory, and folds the deltas into
+
+- rider_daily_counts / driver_daily_counts     (total per day)
+- rider_hourly_counts / driver_hourly_counts   (total per hour)
+- hex_counts                                   (per hour and hex)
+- hex_pyramid_counts                           (per hour and cell, H3 res 6-9)
+
+with additive upserts, so appending a few thousand rows costs O(new rows)
+rather than a rescan of every affected day. hi is MAX(id) unless a lower
+id may still be committed by an open transaction; the watermark then stops
+below it (settled_high_water).
+
+The first run for a source (no state row) bootstraps: it clears that
+entity's counts and folds every row from id 0, after which the counts and
+the watermark agree. Run `bootstrap` again to rebuild a source from
+scratch. A state row written by an older fold (counts_version below
+COUNTS_VERSION, e.g. from before hex_pyramid existed) is rebuilt once on
+its next fold to backfill the new tables.
+
+Drivers move after they are folded (update_driver_location rewrites
+lat/lon), so drivers carry a second watermark on row_updated_at: every
+day (of activity_at) with an already-folded row written since the last
+fold is recounted from the table, the way the old per-day recompute did,
+before the new rows are folded. The scan reaches back MOVE_LAG before the
+last fold so writes that committed late are still seen.
+
+The per-date scripts (store_hrly_count_rid_dri, save_hex_counts_mysql,
+rider_driver_*_counts) recount a day authoritatively without moving the
+watermark; after using them, bootstrap the affected sources.
+recount_from_snapshot does the same for a date range from the Parquet
+snapshot (parquet_snapshot), without touching the source tables.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import mysql.connector
+from h3 import h3
+
+import hex_pyramid
+from db_config import get_connection as mysql_get_connection
+from db_utils import ensure_drivers_schema
+from parquet_snapshot import iter_batches
+from schema import HEX_LIST
+from hex_counts import (
+    WIDE_VIEWS,
+    bulk_upsert,
+    column_names,
+    create_tables as create_hex_tables,
+    ensure_wide_view,
+    hex_index_map,
+)
+from rider_driver_daily_counts import create_daily_table
+from rider_driver_hourly_counts import create_hourly_table
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+H3_RESOLUTION = 7
+BATCH_SIZE = 10_000
+ER_LOCK_NOWAIT = 3572
+# Bump when the fold starts writing a new count table or counts differently;
+# state rows with a lower counts_version are rebuilt once.
+# 1: hex_pyramid_counts. 2: pyramid clipped per point, geo_to_h3 per level.
+COUNTS_VERSION = 2
+# Sources whose rows change after insert; their touched days are recounted
+MOVING_SOURCES = ("drivers",)
+MOVE_LAG = timedelta(seconds=60)
+
+STATE_TABLE = """
+CREATE TABLE IF NOT EXISTS aggregation_state (
+    source_table VARCHAR(64) PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    last_created_at DATETIME NULL,
+    counts_version INT NOT NULL DEFAULT 0,
+    last_moved_at DATETIME(6) NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+"""
+
+STATE_MIGRATIONS = [
+    ("counts_version",
+     "ALTER TABLE aggregation_state ADD COLUMN counts_version INT NOT NULL DEFAULT 0 AFTER last_created_at"),
+    ("last_moved_at",
+     "ALTER TABLE aggregation_state ADD COLUMN last_moved_at DATETIME(6) NULL AFTER counts_version"),
+]
+
+# source table -> columns read and count tables written
+SOURCE_CONFIG = {
+    "riders": {
+        "entity": "riders",
+        "time_col": "activity_at",
+        "lat_col": "lat",
+        "lon_col": "lon",
+        "daily_table": "rider_daily_counts",
+        "hourly_table": "rider_hourly_counts",
+    },
+    "drivers": {
+        "entity": "drivers",
+        "time_col": "activity_at",
+        "lat_col": "lat",
+        "lon_col": "lon",
+        "daily_table": "driver_daily_counts",
+        "hourly_table": "driver_hourly_counts",
+    },
+    "trips": {
+        "entity": "trips",
+        "time_col": "start_at",
+        "lat_col": "pickup_lat",
+        "lon_col": "pickup_lon",
+        "daily_table": None,
+        "hourly_table": None,
+    },
+}
+
+
+# -----------------------------------------------------------------------------
+# Database helpers
+# -----------------------------------------------------------------------------
+def get_connection():
+    return mysql_get_connection()
+
+
+def stream_rows(cursor, batch_size: int = BATCH_SIZE) -> Iterable[Tuple]:
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield row
+
+
+def ensure_state_table(cursor) -> None:
+    cursor.execute(STATE_TABLE)
+    present = column_names(cursor, "aggregation_state")
+    for column, ddl in STATE_MIGRATIONS:
+        if column not in present:
+            cursor.execute(ddl)
+
+
+def create_tables(cursor) -> None:
+    ensure_state_table(cursor)
+    create_hex_tables(cursor)
+    hex_pyramid.create_table(cursor)
+    for cfg in SOURCE_CONFIG.values():
+        if cfg["daily_table"]:
+            create_daily_table(cursor, cfg["daily_table"])
+        if cfg["hourly_table"]:
+            create_hourly_table(cursor, cfg["hourly_table"])
+
+
+# -----------------------------------------------------------------------------
+# Watermark
+# -----------------------------------------------------------------------------
+def lock_watermark(cursor, source: str) -> Optional[Dict]:
+    """
+    Lock the state row of a source for the current transaction and return
+    it as {"last_id", "counts_version", "last_moved_at"}, or None if the
+    source has never been aggregated. The lock serializes concurrent
+    aggregators on the same source; the row is created first (INSERT
+    IGNORE) so that a first run has a row to lock.
+    """
+    cursor.execute(
+        "INSERT IGNORE INTO aggregation_state (source_table, last_id) VALUES (%s, 0)",
+        (source,),
+    )
+    created = cursor.rowcount == 1
+    cursor.execute(
+        """
+        SELECT last_id, counts_version, last_moved_at
+        FROM aggregation_state WHERE source_table = %s FOR UPDATE
+        """,
+        (source,),
+    )
+    last_id, counts_version, last_moved_at = cursor.fetchone()
+    if created:
+        return None
+    return {"last_id": int(last_id), "counts_version": int(counts_version), "last_moved_at": last_moved_at}
+
+
+def source_high_water(cursor, source: str) -> Tuple[int, Optional[object]]:
+    """(MAX(id), created_at of that row) of a source table; (0, None) when empty."""
+    cursor.execute(f"SELECT id, created_at FROM {source} ORDER BY id DESC LIMIT 1")
+    row = cursor.fetchone()
+    return (0, None) if row is None else (int(row[0]), row[1])
+
+
+def gap_settled(cursor, source: str, lo: int, hi: int) -> bool:
+    """
+    True when no row with id in [lo, hi] can still appear: the ids were
+    rolled back or skipped. A row another transaction has inserted but not
+    committed is locked (NOWAIT fails); one committed after this
+    transaction's snapshot is found by the locking read.
+    """
+    try:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM {source} WHERE id BETWEEN %s AND %s FOR SHARE NOWAIT",
+            (lo, hi),
+        )
+    except mysql.connector.errors.DatabaseError as exc:
+        if exc.errno == ER_LOCK_NOWAIT:
+            return False
+        raise
+    return int(cursor.fetchone()[0]) == 0
+
+
+def settled_high_water(cursor, source: str, last_id: int) -> Tuple[int, Optional[object]]:
+    """
+    source_high_water held back below the oldest id that may still be
+    committed. AUTO_INCREMENT ids are assigned at insert, not at commit, so
+    a writer can commit a lower id after MAX(id) was read; folding to
+    MAX(id) would skip that row for good. Every hole in (last_id, MAX(id)]
+    is checked with gap_settled and the watermark stops before the first
+    one that is not settled; those rows are folded by a later run.
+    """
+    hi, hi_created_at = source_high_water(cursor, source)
+    cursor.execute(
+        f"""
+        SELECT prev_id, prev_created_at, id
+        FROM (
+            SELECT id,
+                   LAG(id, 1, %s) OVER (ORDER BY id) AS prev_id,
+                   LAG(created_at) OVER (ORDER BY id) AS prev_created_at
+            FROM {source}
+            WHERE id > %s AND id <= %s
+        ) g
+        WHERE id - prev_id > 1
+        ORDER BY id
+        """,
+        (last_id, last_id, hi),
+    )
+    gaps = cursor.fetchall()
+    for prev_id, prev_created_at, next_id in gaps:
+        if not gap_settled(cursor, source, int(prev_id) + 1, int(next_id) - 1):
+            return int(prev_id), prev_created_at
+    return hi, hi_created_at
+
+
+def save_watermark(cursor, source: str, last_id: int, last_created_at, last_moved_at=None) -> None:
+    cursor.execute(
+        """
+        INSERT INTO aggregation_state (source_table, last_id, last_created_at, counts_version, last_moved_at)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE last_id = VALUES(last_id),
+                                last_created_at = COALESCE(VALUES(last_created_at), last_created_at),
+                                counts_version = VALUES(counts_version),
+                                last_moved_at = VALUES(last_moved_at)
+        """,
+        (source, last_id, last_created_at, COUNTS_VERSION, last_moved_at),
+    )
+
+
+def watermark_status(cursor, source: str) -> Dict:
+    """
+    Watermark of a source and how many rows sit above it (all rows if the
+    source was never aggregated). Both are primary-key reads. For
+    MOVING_SOURCES, moved_rows counts the folded rows written since the
+    last fold (a row_updated_at index range).
+    """
+    ensure_state_table(cursor)
+    cursor.execute(
+        "SELECT last_id, updated_at, last_moved_at FROM aggregation_state WHERE source_table = %s",
+        (source,),
+    )
+    row = cursor.fetchone()
+    last_id, updated_at, last_moved_at = (0, None, None) if row is None else (int(row[0]), row[1], row[2])
+    cursor.execute(f"SELECT COUNT(*) FROM {source} WHERE id > %s", (last_id,))
+    status = {
+        "last_id": last_id,
+        "aggregated_at": updated_at.isoformat() if updated_at else None,
+        "pending_rows": int(cursor.fetchone()[0]),
+    }
+    if source in MOVING_SOURCES:
+        moved = 0
+        if last_moved_at is not None:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {source} WHERE row_updated_at > %s AND id <= %s",
+                (last_moved_at, last_id),
+            )
+            moved = int(cursor.fetchone()[0])
+        status["moved_rows"] = moved
+    return status
+
+
+def stale_hours(cursor, source: str, start, end) -> Optional[List[datetime]]:
+    """
+    Hours in [start, end) holding rows the counts do not reflect yet: rows
+    above the watermark and, for MOVING_SOURCES, folded rows written since
+    the last fold (reaching back MOVE_LAG, like moved_days). None when the
+    source has no counts of the current COUNTS_VERSION at all. Both scans
+    are index ranges (primary key above last_id, row_updated_at).
+    """
+    cfg = SOURCE_CONFIG[source]
+    time_col = cfg["time_col"]
+    cursor.execute(
+        "SELECT last_id, counts_version, last_moved_at FROM aggregation_state WHERE source_table = %s",
+        (source,),
+    )
+    row = cursor.fetchone()
+    if row is None or int(row[1]) < COUNTS_VERSION:
+        return None
+    last_id, last_moved_at = int(row[0]), row[2]
+
+    sql = f"""
+        SELECT DISTINCT DATE({time_col}), HOUR({time_col}) FROM {source}
+        WHERE id > %s AND {time_col} >= %s AND {time_col} < %s
+    """
+    params = [last_id, start, end]
+    if source in MOVING_SOURCES and last_moved_at is not None:
+        sql += f"""
+        UNION
+        SELECT DATE({time_col}), HOUR({time_col}) FROM {source}
+        WHERE row_updated_at >= %s AND id <= %s AND {time_col} >= %s AND {time_col} < %s
+        """
+        params += [last_moved_at - MOVE_LAG, last_id, start, end]
+    cursor.execute(sql, params)
+    return sorted(datetime.combine(day, time(hour)) for day, hour in cursor.fetchall())
+
+
+# -----------------------------------------------------------------------------
+# Fold
+# -----------------------------------------------------------------------------
+def fetch_new_rows(cursor, source: str, lo: int, hi: int) -> None:
+    cfg = SOURCE_CONFIG[source]
+    cursor.execute(
+        f"""
+        SELECT {cfg["time_col"]}, {cfg["lat_col"]}, {cfg["lon_col"]}
+        FROM {source}
+        WHERE id > %s AND id <= %s
+          AND {cfg["time_col"]} IS NOT NULL
+        """,
+        (lo, hi),
+    )
+
+
+def moved_days(cursor, source: str, last_id: int, since) -> List:
+    """
+    Days (of the time column) of rows with id <= last_id, i.e. already
+    folded, that were written at or after since - MOVE_LAG.
+    """
+    cfg = SOURCE_CONFIG[source]
+    cursor.execute(
+        f"""
+        SELECT DISTINCT DATE({cfg["time_col"]})
+        FROM {source}
+        WHERE row_updated_at >= %s AND id <= %s
+          AND {cfg["time_col"]} IS NOT NULL
+        """,
+        (since - MOVE_LAG, last_id),
+    )
+    return sorted(row[0] for row in cursor.fetchall())
+
+
+def fetch_day_rows(cursor, source: str, days: List, last_id: int) -> None:
+    """Select (time, lat, lon) of every row with id <= last_id on one of `days`."""
+    cfg = SOURCE_CONFIG[source]
+    time_col = cfg["time_col"]
+    placeholders = ", ".join(["%s"] * len(days))
+    cursor.execute(
+        f"""
+        SELECT {time_col}, {cfg["lat_col"]}, {cfg["lon_col"]}
+        FROM {source}
+        WHERE id <= %s
+          AND {time_col} >= %s AND {time_col} < %s
+          AND DATE({time_col}) IN ({placeholders})
+        """,
+        (last_id, days[0], days[-1] + timedelta(days=1), *days),
+    )
+
+
+def recount_days(cursor, source: str, days: List, last_id: int, hex_index: Dict[str, int]) -> int:
+    """
+    Replace the counts of `days` with a recount of the rows with
+    id <= last_id on those days; returns the number of rows counted.
+    """
+    for day in days:
+        clear_counts(cursor, source, day, day)
+    fetch_day_rows(cursor, source, days, last_id)
+    daily, hourly, per_hex, cells = count_deltas(cursor)
+    apply_deltas(cursor, source, daily, hourly, per_hex, hex_index, cells)
+    return sum(daily.values())
+
+
+def count_deltas(cursor) -> Tuple[Counter, Counter, Counter, Counter]:
+    """
+    Return (daily {date: n}, hourly {(date, hour): n}, hex {(date, hour, hex_id): n},
+    pyramid cells {(resolution, date, hour, cell): n}).
+    """
+    return count_rows(stream_rows(cursor))
+
+
+def count_rows(rows: Iterable[Tuple]) -> Tuple[Counter, Counter, Counter, Counter]:
+    """count_deltas over any iterable of (timestamp, lat, lon)."""
+    hex_set = set(HEX_LIST)
+    daily: Counter = Counter()
+    hourly: Counter = Counter()
+    per_hex: Counter = Counter()
+    cells: Counter = Counter()
+
+    for ts, lat, lon in rows:
+        day, hour = ts.date(), ts.hour
+        daily[day] += 1
+        hourly[(day, hour)] += 1
+        if lat is None or lon is None:
+            continue
+        hid = h3.geo_to_h3(lat, lon, H3_RESOLUTION)
+        if hid in hex_set:
+            per_hex[(day, hour, hid)] += 1
+        for res, cell in hex_pyramid.point_cells(lat, lon):
+            cells[(res, day, hour, cell)] += 1
+
+    return daily, hourly, per_hex, cells
+
+
+def snapshot_deltas(source: str, start_date, end_date) -> Tuple[Counter, Counter, Counter, Counter]:
+    """
+    count_deltas for [start_date, end_date] read from the source's Parquet
+    snapshot (parquet_snapshot) instead of MySQL, for offline recounts.
+    """
+    cfg = SOURCE_CONFIG[source]
+    columns = [cfg["time_col"], cfg["lat_col"], cfg["lon_col"]]
+
+    def rows():
+        for batch in iter_batches(source, start_date, end_date, columns=columns):
+            ts, lat, lon = (batch.column(c).to_pylist() for c in columns)
+            yield from (row for row in zip(ts, lat, lon) if row[0] is not None)
+
+    return count_rows(rows())
+
+
+def apply_deltas(
+    cursor,
+    source: str,
+    daily: Counter,
+    hourly: Counter,
+    per_hex: Counter,
+    hex_index: Dict[str, int],
+    cells: Optional[Counter] = None,
+) -> None:
+    cfg = SOURCE_CONFIG[source]
+    if cfg["daily_table"] and daily:
+        cursor.executemany(
+            f"""
+            INSERT INTO {cfg["daily_table"]} (report_date, total_count)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE total_count = total_count + VALUES(total_count)
+            """,
+            [(day.isoformat(), n) for day, n in daily.items()],
+        )
+    if cfg["hourly_table"] and hourly:
+        cursor.executemany(
+            f"""
+            INSERT INTO {cfg["hourly_table"]} (report_date, hour, total_count)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE total_count = total_count + VALUES(total_count)
+            """,
+            [(day.isoformat(), hour, n) for (day, hour), n in hourly.items()],
+        )
+    bulk_upsert(
+        cursor,
+        ((cfg["entity"], day, hour, hex_index[hid], n) for (day, hour, hid), n in per_hex.items()),
+        additive=True,
+    )
+    if cells:
+        hex_pyramid.upsert(cursor, cfg["entity"], cells)
+
+
+def clear_counts(cursor, source: str, start_date=None, end_date=None) -> None:
+    """Delete a source's counts, or only those of days [start_date, end_date]."""
+    cfg = SOURCE_CONFIG[source]
+    days, params = "report_date BETWEEN %s AND %s", (start_date, end_date)
+    for table in (cfg["daily_table"], cfg["hourly_table"]):
+        if table and start_date is None:
+            cursor.execute(f"DELETE FROM {table}")
+        elif table:
+            cursor.execute(f"DELETE FROM {table} WHERE {days}", params)
+    if start_date is None:
+        cursor.execute("DELETE FROM hex_counts WHERE entity = %s", (cfg["entity"],))
+    else:
+        cursor.execute(f"DELETE FROM hex_counts WHERE entity = %s AND {days}", (cfg["entity"],) + params)
+    hex_pyramid.clear(cursor, cfg["entity"], start_date, end_date)
+
+
+def fold_source(source: str, rebuild: bool = False) -> Dict:
+    """
+    Fold every row of `source` above its watermark into the count tables and
+    advance the watermark, all in one transaction. rebuild=True (or a source
+    with no watermark yet, or one folded by an older COUNTS_VERSION) clears
+    the entity's counts and folds from id 0. For MOVING_SOURCES the days of
+    already-folded rows written since the last fold are recounted first.
+    Returns {"source", "rows", "last_id", "days", "recounted_days"}.
+    """
+    if source not in SOURCE_CONFIG:
+        raise ValueError(f"Unsupported source: {source}")
+
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    try:
+        if source in MOVING_SOURCES:
+            ensure_drivers_schema(conn)
+        create_tables(cursor)
+        conn.commit()
+
+        state = lock_watermark(cursor, source)
+        if state is None or rebuild or state["counts_version"] < COUNTS_VERSION:
+            clear_counts(cursor, source)
+            state = {"last_id": 0, "last_moved_at": None}
+        last_id = state["last_id"]
+
+        cursor.execute("SELECT NOW(6)")
+        now = cursor.fetchone()[0]
+        hex_index = hex_index_map(cursor, HEX_LIST)
+
+        recounted = []
+        if source in MOVING_SOURCES and last_id and state["last_moved_at"] is not None:
+            recounted = moved_days(cursor, source, last_id, state["last_moved_at"])
+            if recounted:
+                recount_days(cursor, source, recounted, last_id, hex_index)
+
+        hi, hi_created_at = settled_high_water(cursor, source, last_id)
+        daily: Counter = Counter()
+        if hi > last_id:
+            fetch_new_rows(cursor, source, last_id, hi)
+            daily, hourly, per_hex, cells = count_deltas(cursor)
+            apply_deltas(cursor, source, daily, hourly, per_hex, hex_index, cells)
+        save_watermark(cursor, source, max(hi, last_id), hi_created_at,
+                       now if source in MOVING_SOURCES else None)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    return {
+        "source": source,
+        "rows": sum(daily.values()),
+        "last_id": max(hi, last_id),
+        "days": sorted(d.isoformat() for d in daily),
+        "recounted_days": [d.isoformat() for d in recounted],
+    }
+
+
+def recount_from_snapshot(source: str, start_date, end_date) -> Dict:
+    """
+    Recount days [start_date, end_date] of a source from its Parquet
+    snapshot instead of MySQL: the days' counts are cleared and replaced by
+    snapshot_deltas, in one transaction. The watermark is locked (so no
+    fold runs concurrently) but not moved; the snapshot must hold every
+    row of those days, or rows written after it was taken drop out of
+    the counts until the next bootstrap.
+    Returns {"source", "rows", "days"}.
+    """
+    if source not in SOURCE_CONFIG:
+        raise ValueError(f"Unsupported source: {source}")
+
+    daily, hourly, per_hex, cells = snapshot_deltas(source, start_date, end_date)
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        create_tables(cursor)
+        conn.commit()
+
+        lock_watermark(cursor, source)
+        clear_counts(cursor, source, start_date, end_date)
+        hex_index = hex_index_map(cursor, HEX_LIST)
+        apply_deltas(cursor, source, daily, hourly, per_hex, hex_index, cells)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    return {
+        "source": source,
+        "rows": sum(daily.values()),
+        "days": sorted(d.isoformat() for d in daily),
+    }
+
+
+def bootstrap(source: str) -> Dict:
+    """Rebuild a source's counts from scratch and reset its watermark."""
+    return fold_source(source, rebuild=True)
+
+
+def fold_all(sources: Iterable[str] = tuple(SOURCE_CONFIG), rebuild: bool = False) -> Dict[str, Dict]:
+    return {source: fold_source(source, rebuild=rebuild) for source in sources}
+
+
+def freshness(sources: Iterable[str] = tuple(SOURCE_CONFIG)) -> Dict[str, Dict]:
+    """{source: watermark_status} for each source."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        return {source: watermark_status(cursor, source) for source in sources}
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def refresh_if_stale(sources: Iterable[str] = tuple(SOURCE_CONFIG)) -> Dict[str, Dict]:
+    """Fold only the sources that have rows above their watermark or moved rows."""
+    results = {}
+    for source, status in freshness(sources).items():
+        if status["pending_rows"] or status.get("moved_rows"):
+            results[source] = fold_source(source)
+        else:
+            results[source] = {"source": source, "rows": 0, "last_id": status["last_id"], "days": [],
+                               "recounted_days": []}
+    return results
+
+
+def ensure_views() -> None:
+    """Create/refresh every wide compatibility view over hex_counts."""
+    conn = get_connection()
+    cursor = conn.cursor()
+    try:
+        for name in WIDE_VIEWS:
+            ensure_wide_view(cursor, name, HEX_LIST)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+def main() -> None:
+    for source, result in fold_all().items():
+        print(f"{source}: folded {result['rows']} rows up to id {result['last_id']} "
+              f"({', '.join(result['days']) or 'no new days'})")
+
+
+if __name__ == "__main__":
+    main()
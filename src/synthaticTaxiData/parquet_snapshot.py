@@ -0,0 +1,228 @@
+"""
+Columnar Parquet snapshots of riders, drivers, trips and trip_match_logs.
+
+export_snapshot(start_date, end_date) streams each table's rows for the
+date range off an unbuffered (server-side streamed) cursor in fetchmany
+chunks, turns every chunk into an Arrow RecordBatch with a fixed schema,
+and writes it into a hive-partitioned dataset, one partition per day:
+
+    SNAPSHOT_DIR/<table>/date=YYYY-MM-DD/part-0.parquet
+
+The day is taken from the table's time column (SNAPSHOT_TABLES). Days in
+the range are replaced, so re-exporting a range is idempotent.
+
+read_table / iter_batches are the reader API for offline jobs
+(incremental_aggregate.snapshot_deltas, forecast data loaders): they
+prune to the requested date partitions and columns and never touch MySQL.
+
+    SNAPSHOT_DIR (default: <repo>/snapshots)
+
+Needs pyarrow (pip install pyarrow).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(BASE_DIR, "..", "..", "snapshots"))
+FETCH_SIZE = 50_000
+PARTITION = "date"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Please install pyarrow: pip install pyarrow")
+
+
+def _columns(table: str):
+    """[(column, arrow type)] exported for a table; JSON columns as strings."""
+    ts, f64, i64, s = pa.timestamp("us"), pa.float64(), pa.int64(), pa.string()
+    return {
+        "riders": [
+            ("id", i64), ("rider_id", s), ("lat", f64), ("lon", f64),
+            ("activity_at", ts), ("created_at", ts),
+        ],
+        "drivers": [
+            ("id", i64), ("driver_id", s), ("vehicle_id", s), ("status", s), ("current_h3", s),
+            ("lat", f64), ("lon", f64), ("rating", f64),
+            ("activity_at", ts), ("last_update_at", ts), ("created_at", ts),
+        ],
+        "trips": [
+            ("id", i64), ("trip_id", s), ("request_id", s), ("rider_id", s), ("driver_id", s),
+            ("status", s), ("requested_at", ts), ("matched_at", ts), ("start_at", ts), ("end_at", ts),
+            ("pickup_lat", f64), ("pickup_lon", f64), ("drop_lat", f64), ("drop_lon", f64),
+            ("pickup_distance_km", f64), ("ride_distance_km", f64), ("ride_duration_min", f64),
+            ("wait_time_min", f64), ("fare", f64), ("cancellation_reason", s),
+            ("match_quality", f64), ("created_at", ts), ("meta", s),
+        ],
+        "trip_match_logs": [
+            ("match_id", i64), ("trip_id", s), ("ts", ts), ("driver_id", s), ("rider_id", s),
+            ("distance_km", f64), ("match_status", s), ("matcher_version", s),
+            ("reward_estimate", f64), ("response_time_ms", i64),
+        ],
+    }[table]
+
+
+# table -> time column that decides the partition
+SNAPSHOT_TABLES = {
+    "riders": "activity_at",
+    "drivers": "activity_at",
+    "trips": "start_at",
+    "trip_match_logs": "ts",
+}
+
+
+def schema_for(table: str):
+    _require_pyarrow()
+    return pa.schema(_columns(table))
+
+
+def table_dir(table: str, root: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(root, table)
+
+
+def partition_dir(table: str, day: date, root: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(table_dir(table, root), f"{PARTITION}={day.isoformat()}")
+
+
+def _days(start_date: date, end_date: date) -> List[date]:
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+# -----------------------------------------------------------------------------
+# Export
+# -----------------------------------------------------------------------------
+def export_table(conn, table: str, start_date: date, end_date: date, root: str = SNAPSHOT_DIR,
+                 fetch_size: int = FETCH_SIZE) -> Dict[str, int]:
+    """Snapshot one table for [start_date, end_date]; returns {day: rows}."""
+    schema = schema_for(table)
+    time_col = SNAPSHOT_TABLES[table]
+    for day in _days(start_date, end_date):
+        shutil.rmtree(partition_dir(table, day, root), ignore_errors=True)
+
+    cols = ", ".join("CAST(meta AS CHAR) AS meta" if name == "meta" else name for name in schema.names)
+    cur = conn.cursor(buffered=False)
+    writers: Dict[date, "pq.ParquetWriter"] = {}
+    rows_per_day: Dict[str, int] = {}
+    try:
+        cur.execute(
+            f"SELECT {cols} FROM {table} WHERE {time_col} >= %s AND {time_col} < %s",
+            (start_date, end_date + timedelta(days=1)),
+        )
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                schema=schema,
+            )
+            days = pc.cast(batch.column(time_col), pa.date32())
+            for day in pc.unique(days).to_pylist():
+                part = batch.filter(pc.equal(days, pa.scalar(day, pa.date32())))
+                if day not in writers:
+                    os.makedirs(partition_dir(table, day, root), exist_ok=True)
+                    writers[day] = pq.ParquetWriter(
+                        os.path.join(partition_dir(table, day, root), "part-0.parquet"), schema
+                    )
+                writers[day].write_batch(part)
+                rows_per_day[day.isoformat()] = rows_per_day.get(day.isoformat(), 0) + part.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+        cur.close()
+    return dict(sorted(rows_per_day.items()))
+
+
+def export_snapshot(start_date: date, end_date: date, tables: Sequence[str] = tuple(SNAPSHOT_TABLES),
+                    root: str = SNAPSHOT_DIR) -> Dict[str, Dict[str, int]]:
+    """Snapshot every table in `tables` for [start_date, end_date]."""
+    from db_config import get_connection
+
+    _require_pyarrow()
+    conn = get_connection()
+    try:
+        return {table: export_table(conn, table, start_date, end_date, root) for table in tables}
+    finally:
+        conn.close()
+
+
+# -----------------------------------------------------------------------------
+# Read
+# -----------------------------------------------------------------------------
+def _dataset(table: str, root: str):
+    _require_pyarrow()
+    partitioning = ds.partitioning(pa.schema([(PARTITION, pa.date32())]), flavor="hive")
+    schema = schema_for(table).append(pa.field(PARTITION, pa.date32()))
+    return ds.dataset(table_dir(table, root), format="parquet", schema=schema, partitioning=partitioning)
+
+
+def _date_filter(start_date: Optional[date], end_date: Optional[date]):
+    expr = None
+    if start_date is not None:
+        expr = ds.field(PARTITION) >= pa.scalar(start_date, pa.date32())
+    if end_date is not None:
+        upper = ds.field(PARTITION) <= pa.scalar(end_date, pa.date32())
+        expr = upper if expr is None else expr & upper
+    return expr
+
+
+def available_dates(table: str, root: str = SNAPSHOT_DIR) -> List[date]:
+    prefix = f"{PARTITION}="
+    path = table_dir(table, root)
+    if not os.path.isdir(path):
+        return []
+    return sorted(date.fromisoformat(d[len(prefix):]) for d in os.listdir(path) if d.startswith(prefix))
+
+
+def iter_batches(table: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 columns: Optional[Sequence[str]] = None, root: str = SNAPSHOT_DIR,
+                 batch_size: int = FETCH_SIZE) -> Iterator["pa.RecordBatch"]:
+    """Record batches of a snapshot, pruned to the date partitions and columns."""
+    yield from _dataset(table, root).to_batches(
+        columns=list(columns) if columns else None,
+        filter=_date_filter(start_date, end_date),
+        batch_size=batch_size,
+    )
+
+
+def read_table(table: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+               columns: Optional[Sequence[str]] = None, root: str = SNAPSHOT_DIR):
+    """A snapshot table (or its date range / columns) as a pandas DataFrame."""
+    return _dataset(table, root).to_table(
+        columns=list(columns) if columns else None,
+        filter=_date_filter(start_date, end_date),
+    ).to_pandas()
+
+
+# -----------------------------------------------------------------------------
+# Main
+# -----------------------------------------------------------------------------
+def main() -> None:
+    if len(sys.argv) < 3:
+        print("usage: python parquet_snapshot.py START_DATE END_DATE [table ...]")
+        sys.exit(2)
+    start, end = date.fromisoformat(sys.argv[1]), date.fromisoformat(sys.argv[2])
+    tables = sys.argv[3:] or tuple(SNAPSHOT_TABLES)
+    for table, days in export_snapshot(start, end, tables).items():
+        print(f"{table}: {sum(days.values())} rows in {len(days)} day partitions")
+
+
+if __name__ == "__main__":
+    main()
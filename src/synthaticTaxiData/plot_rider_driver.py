@@ -202,11 +202,12 @@
 # AUTO-RUN MODULE: loads DB, builds hexes, map, and exposes data
 # ----------------------------------
 
-import mysql.connector
 import folium
 from h3 import h3
-from shapely.geometry import Polygon, Point
+from shapely.geometry import Polygon
 from .nyc_polygon import NYC_POLYGON, POLY_COORDS
+from .db_config import get_connection
+from .hex_pyramid import read_windows
 
 # -----------------------------
 # Time window
@@ -214,52 +215,28 @@ from .nyc_polygon import NYC_POLYGON, POLY_COORDS
 START_TS = "2025-07-07 07:00:00"
 END_TS   = "2025-07-07 08:00:00"
 
-# -----------------------------
-# MySQL connection
-# -----------------------------
-conn = mysql.connector.connect(
-    host="localhost",
-    user="root",
-    password="root@123",
-    database="taxiProduction",
-)
-cursor = conn.cursor()
-
-cursor.execute(
-    "SELECT lat, lon FROM riders WHERE activity_at BETWEEN %s AND %s",
-    (START_TS, END_TS),
-)
-rider_rows = cursor.fetchall()
-
-cursor.execute(
-    "SELECT lat, lon FROM drivers WHERE activity_at BETWEEN %s AND %s",
-    (START_TS, END_TS),
-)
-driver_rows = cursor.fetchall()
-
-cursor.close()
-conn.close()
-
 # -----------------------------
 # H3 resolution
 # -----------------------------
 resolution = 7
 
 # -----------------------------
-# Convert points to hexes
+# Hex counts from the pre-aggregated pyramid (hours [START_TS, END_TS))
 # -----------------------------
-rider_hex_counts = {}
-driver_hex_counts = {}
-
-for lat, lon in rider_rows:
-    if NYC_POLYGON.contains(Point(lon, lat)):
-        h = h3.geo_to_h3(lat, lon, resolution)
-        rider_hex_counts[h] = rider_hex_counts.get(h, 0) + 1
-
-for lat, lon in driver_rows:
-    if NYC_POLYGON.contains(Point(lon, lat)):
-        h = h3.geo_to_h3(lat, lon, resolution)
-        driver_hex_counts[h] = driver_hex_counts.get(h, 0) + 1
+conn = get_connection()
+cursor = conn.cursor()
+counts = read_windows(cursor, ("riders", "drivers"), resolution, START_TS, END_TS)
+cursor.close()
+conn.close()
+
+
+def _touches_nyc(h):
+    boundary = h3.h3_to_geo_boundary(h, geo_json=True)
+    return NYC_POLYGON.intersects(Polygon([(lon, lat) for lon, lat in boundary]))
+
+
+rider_hex_counts = {h: n for h, n in counts["riders"].items() if _touches_nyc(h)}
+driver_hex_counts = {h: n for h, n in counts["drivers"].items() if _touches_nyc(h)}
 
 # -----------------------------
 # Polygon → intersected hexes
@@ -0,0 +1,120 @@
+"""
+Per-request SQL / OSRM call accounting.
+
+The API middleware opens a stats scope per request (start/finish); every
+statement run through a db_config connection, every async_db query and
+every OSRM call made while the scope is active adds to its count and
+time. The scope lives in a ContextVar, so it follows the request into
+FastAPI's threadpool; outside a request (scripts, background jobs)
+record() is a no-op.
+
+Import this module as `query_stats` (flat, like db_config) so every
+caller shares the same ContextVar.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+_current: ContextVar[Optional[Dict[str, float]]] = ContextVar("query_stats", default=None)
+
+
+def _empty() -> Dict[str, float]:
+    return {"sql_count": 0, "sql_seconds": 0.0, "osrm_count": 0, "osrm_seconds": 0.0}
+
+
+def start() -> Token:
+    return _current.set(_empty())
+
+
+def finish(token: Token) -> Dict[str, float]:
+    stats = _current.get() or _empty()
+    _current.reset(token)
+    return stats
+
+
+def record(kind: str, seconds: float, count: int = 1) -> None:
+    """kind is "sql" or "osrm"."""
+    stats = _current.get()
+    if stats is not None:
+        stats[f"{kind}_count"] += count
+        stats[f"{kind}_seconds"] += seconds
+
+
+@contextmanager
+def timed(kind: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, time.perf_counter() - t0)
+
+
+# -----------------------------------------------------------------------------
+# mysql.connector wrappers
+# -----------------------------------------------------------------------------
+class InstrumentedCursor:
+    """Cursor proxy counting execute/executemany and timing them plus fetches."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        with timed("sql"):
+            return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        with timed("sql"):
+            return self._cursor.executemany(*args, **kwargs)
+
+    def _fetch(self, name, *args):
+        t0 = time.perf_counter()
+        try:
+            return getattr(self._cursor, name)(*args)
+        finally:
+            record("sql", time.perf_counter() - t0, count=0)
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, *args):
+        return self._fetch("fetchmany", *args)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors are InstrumentedCursor."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._conn.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
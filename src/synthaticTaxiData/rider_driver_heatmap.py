@@ -1,10 +1,13 @@
+import os
+import uuid
+
 from folium.plugins import HeatMap
 from shapely.geometry import Polygon
 from h3 import h3
 from nyc_polygon import NYC_POLYGON
 import folium
 
-from helperForHeatMap import fetch_points, prepare_points, create_map
+from helperForHeatMap import DEFAULT_ZOOM, bins_center, create_map, resolution_for_zoom, stream_bins, streamed_layers
 
 # ============================================================
 # 1. Config
@@ -33,11 +36,14 @@ def net_to_color(net, max_abs):
 # ============================================================
 # 5. Heatmap layers
 # ============================================================
-def add_heatmaps(layer_riders, layer_drivers, layer_net, rider_points, driver_points):
-    HeatMap(rider_points, radius=45, blur=75, min_opacity=0.1, gradient=DEMAND_GRADIENT, max_zoom=1).add_to(layer_riders)
-    HeatMap(driver_points, radius=40, blur=75, min_opacity=0.1, gradient=SUPPLY_GRADIENT, max_zoom=1).add_to(layer_drivers)
-    net_points = [[lat, lon, 1] for lat, lon, _ in rider_points] + [[lat, lon, -1] for lat, lon, _ in driver_points]
-    HeatMap(net_points, radius=40, blur=75, min_opacity=0.1, gradient=NET_GRADIENT, max_zoom=1).add_to(layer_net)
+def add_heatmaps(layer_riders, layer_drivers, layer_net, layers):
+    """
+    Heat layers from server-side bins (helperForHeatMap.streamed_layers)
+    rather than every raw point three times; the HTML grows with the bin count.
+    """
+    HeatMap(layers["riders"], radius=45, blur=75, min_opacity=0.1, gradient=DEMAND_GRADIENT, max_zoom=1).add_to(layer_riders)
+    HeatMap(layers["drivers"], radius=40, blur=75, min_opacity=0.1, gradient=SUPPLY_GRADIENT, max_zoom=1).add_to(layer_drivers)
+    HeatMap(layers["net"], radius=40, blur=75, min_opacity=0.1, gradient=NET_GRADIENT, max_zoom=1).add_to(layer_net)
 
 # ============================================================
 # 6. Hex overlay + collect stats
@@ -76,29 +82,49 @@ def add_hex_overlay(layer_net, rider_hex, driver_hex):
 # ============================================================
 # 7. Main
 # ============================================================
-def map_result_dynamic(start_ts, end_ts):
-    rider_rows = fetch_points("riders", start_ts, end_ts)
-    driver_rows = fetch_points("drivers", start_ts, end_ts)
-
-    rider_points, rider_hex = prepare_points(rider_rows)
-    driver_points, driver_hex = prepare_points(driver_rows)
-
-    m = create_map(rider_points + driver_points)
+def build_map(start_ts, end_ts, zoom=DEFAULT_ZOOM):
+    """
+    The folium map and hex stats for a window. Heat layers are binned at
+    the H3 resolution for the initial `zoom`; points are streamed into the
+    bins, so memory does not grow with the window.
+    """
+    resolution = resolution_for_zoom(zoom)
+    rider_bins = stream_bins("riders", start_ts, end_ts, resolution)
+    driver_bins = stream_bins("drivers", start_ts, end_ts, resolution)
+
+    m = create_map(zoom_start=zoom, center=bins_center(rider_bins, driver_bins))
 
     layer_riders = folium.FeatureGroup("Rider Demand", show=True)
     layer_drivers = folium.FeatureGroup("Driver Supply", show=False)
     layer_net = folium.FeatureGroup("Net Demand", show=False)
 
-    add_heatmaps(layer_riders, layer_drivers, layer_net, rider_points, driver_points)
-    hex_stats = add_hex_overlay(layer_net, rider_hex, driver_hex)
+    add_heatmaps(layer_riders, layer_drivers, layer_net, streamed_layers(rider_bins, driver_bins))
+    hex_stats = add_hex_overlay(layer_net, rider_bins.hex_counts, driver_bins.hex_counts)
 
     for layer in [layer_riders, layer_drivers, layer_net]:
         m.add_child(layer)
 
     folium.LayerControl(collapsed=False).add_to(m)
+    return m, hex_stats
+
+
+def map_html_dynamic(start_ts, end_ts, zoom=DEFAULT_ZOOM):
+    """The map for a window rendered to an HTML string; nothing is written to disk."""
+    m, hex_stats = build_map(start_ts, end_ts, zoom)
+    return {"html": m.get_root().render(), "hex_stats": hex_stats}
+
+
+def map_result_dynamic(start_ts, end_ts, map_filename="rider_driver_heatmap.html", zoom=DEFAULT_ZOOM):
+    """
+    Build the map for a window and save it to map_filename. The file is
+    written to a private temp name and renamed into place, so concurrent
+    callers never see (or move) each other's half-written map.
+    """
+    m, hex_stats = build_map(start_ts, end_ts, zoom)
 
-    map_filename = "rider_driver_heatmap.html"
-    m.save(map_filename)
+    tmp_filename = f"{map_filename}.{uuid.uuid4().hex}.tmp"
+    m.save(tmp_filename)
+    os.replace(tmp_filename, map_filename)
     print(f"✅ Saved → {map_filename}")
 
     return {"map_file": map_filename, "hex_stats": hex_stats}
@@ -1,6 +1,7 @@
 """
 Production-ready module to compute DAILY and HOURLY trip, rider, and driver
-counts per fixed H3 hex and store them in MySQL tables.
+counts per fixed H3 hex and store them in the long-format hex_counts table.
+The per-hex wide tables remain readable as views (see hex_counts.py).
 
 Safe to import and reuse.
 """
@@ -14,6 +15,9 @@ import os
 from collections import Counter, defaultdict
 from datetime import datetime, date
 from typing import Dict, Iterable, Tuple, Set
+
+from hex_counts import ensure_wide_view, hex_index_map, replace_day
+
 # -----------------------------------------------------------------------------
 # Configuration
 # -----------------------------------------------------------------------------
@@ -68,49 +72,9 @@ def stream_rows(cursor, batch_size: int = BATCH_SIZE) -> Iterable[Tuple]:
         for row in rows:
             yield row
 
-# -----------------------------------------------------------------------------
-# Schema management
-# -----------------------------------------------------------------------------
-def create_daily_table(cursor, table_name: str) -> None:
-    columns = ",\n    ".join(f"h_{h} INT DEFAULT 0" for h in FIXED_HEX_IDS)
-    cursor.execute(
-        f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            trip_date DATE NOT NULL,
-            {columns},
-            PRIMARY KEY (trip_date)
-        ) ENGINE=InnoDB;
-        """
-    )
-
-
-def create_hourly_table(cursor, table_name: str) -> None:
-    columns = ",\n    ".join(f"h_{h} INT DEFAULT 0" for h in FIXED_HEX_IDS)
-    cursor.execute(
-        f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            trip_date DATE NOT NULL,
-            trip_hour TINYINT NOT NULL,
-            {columns},
-            PRIMARY KEY (trip_date, trip_hour)
-        ) ENGINE=InnoDB;
-        """
-    )
-
 # -----------------------------------------------------------------------------
 # Fetchers
 # -----------------------------------------------------------------------------
-def fetch_trip_daily(cursor, trip_date: date) -> None:
-    cursor.execute(
-        """
-        SELECT pickup_lat, pickup_lon
-        FROM trips
-        WHERE DATE(start_at) = %s
-        """,
-        (trip_date,),
-    )
-
-
 def fetch_trip_hourly(cursor, trip_date: date) -> None:
     cursor.execute(
         """
@@ -122,19 +86,6 @@ def fetch_trip_hourly(cursor, trip_date: date) -> None:
     )
 
 
-def fetch_rider_daily(cursor, trip_date: date) -> None:
-    cursor.execute(
-        """
-        SELECT lat, lon
-        FROM riders
-        WHERE DATE(activity_at) = %s
-          AND lat IS NOT NULL
-          AND lon IS NOT NULL
-        """,
-        (trip_date,),
-    )
-
-
 def fetch_rider_hourly(cursor, trip_date: date) -> None:
     cursor.execute(
         """
@@ -148,19 +99,6 @@ def fetch_rider_hourly(cursor, trip_date: date) -> None:
     )
 
 
-def fetch_driver_daily(cursor, trip_date: date) -> None:
-    cursor.execute(
-        """
-        SELECT lat, lon
-        FROM drivers
-        WHERE DATE(activity_at) = %s
-          AND lat IS NOT NULL
-          AND lon IS NOT NULL
-        """,
-        (trip_date,),
-    )
-
-
 def fetch_driver_hourly(cursor, trip_date: date) -> None:
     cursor.execute(
         """
@@ -176,18 +114,6 @@ def fetch_driver_hourly(cursor, trip_date: date) -> None:
 # -----------------------------------------------------------------------------
 # Counters
 # -----------------------------------------------------------------------------
-def count_daily(cursor) -> Counter:
-    counts: Counter = Counter()
-    for lat, lon in stream_rows(cursor):
-        try:
-            hid = h3.geo_to_h3(lat, lon, H3_RESOLUTION)
-            if hid in FIXED_HEX_IDS_SET:
-                counts[hid] += 1
-        except Exception:
-            continue
-    return counts
-
-
 def count_hourly(cursor) -> Dict[int, Counter]:
     hourly: Dict[int, Counter] = defaultdict(Counter)
     for lat, lon, hour in stream_rows(cursor):
@@ -199,116 +125,95 @@ def count_hourly(cursor) -> Dict[int, Counter]:
             continue
     return hourly
 
-# -----------------------------------------------------------------------------
-# Writers
-# -----------------------------------------------------------------------------
-def upsert_daily(cursor, table: str, trip_date: date, counts: Counter) -> None:
-    cursor.execute(
-        f"INSERT IGNORE INTO {table} (trip_date) VALUES (%s)",
-        (trip_date,),
-    )
-    for h in FIXED_HEX_IDS:
-        cursor.execute(
-            f"UPDATE {table} SET h_{h}=%s WHERE trip_date=%s",
-            (counts.get(h, 0), trip_date),
-        )
-
-
-def upsert_hourly(cursor, table: str, trip_date: date, hourly: Dict[int, Counter]) -> None:
-    for hour in range(24):
-        cursor.execute(
-            f"INSERT IGNORE INTO {table} (trip_date, trip_hour) VALUES (%s, %s)",
-            (trip_date, hour),
-        )
-        for h in FIXED_HEX_IDS:
-            cursor.execute(
-                f"""
-                UPDATE {table}
-                SET h_{h}=%s
-                WHERE trip_date=%s AND trip_hour=%s
-                """,
-                (hourly.get(hour, {}).get(h, 0), trip_date, hour),
-            )
-
 # -----------------------------------------------------------------------------
 # Orchestration
 # -----------------------------------------------------------------------------
-def process_trip_daily(trip_date: date):
+# entity -> (hourly fetcher, daily view, hourly view)
+ENTITY_CONFIG = {
+    "trips": (fetch_trip_hourly, "trip_daily_hex_counts", "trip_hourly_hex_counts"),
+    "riders": (fetch_rider_hourly, "rider_daily_hex_counts", "rider_hourly_hex_counts"),
+    "drivers": (fetch_driver_hourly, "driver_daily_hex_counts", "driver_hourly_hex_counts"),
+}
+
+
+def ensure_views(entity: str, *, daily: bool = True, hourly: bool = True) -> Dict[str, int]:
+    """Create/refresh the wide compatibility views for one entity."""
+    _, daily_view, hourly_view = ENTITY_CONFIG[entity]
     conn = get_connection()
     cur = conn.cursor()
     try:
-        create_daily_table(cur, "trip_daily_hex_counts")
-        fetch_trip_daily(cur, trip_date)
-        upsert_daily(cur, "trip_daily_hex_counts", trip_date, count_daily(cur))
+        hex_index: Dict[str, int] = {}
+        for view, wanted in ((hourly_view, hourly), (daily_view, daily)):
+            if wanted:
+                hex_index = ensure_wide_view(cur, view, FIXED_HEX_IDS)
         conn.commit()
+        return hex_index
     finally:
         cur.close()
         conn.close()
 
 
-def process_trip_hourly(trip_date: date):
+def refresh_counts(entity: str, trip_date: date) -> int:
+    """
+    Recount one day of an entity into hex_counts (hourly grain). The views
+    are schema setup (ensure_views), not part of the write.
+    """
+    fetch = ENTITY_CONFIG[entity][0]
     conn = get_connection()
     cur = conn.cursor()
     try:
-        create_hourly_table(cur, "trip_hourly_hex_counts")
-        fetch_trip_hourly(cur, trip_date)
-        upsert_hourly(cur, "trip_hourly_hex_counts", trip_date, count_hourly(cur))
+        hex_index = hex_index_map(cur, FIXED_HEX_IDS)
+        fetch(cur, trip_date)
+        written = replace_day(cur, entity, trip_date, count_hourly(cur), hex_index)
         conn.commit()
+        return written
     finally:
         cur.close()
         conn.close()
 
 
+def process_trip_daily(trip_date: date):
+    ensure_views("trips", hourly=False)
+    refresh_counts("trips", trip_date)
+
+
+def process_trip_hourly(trip_date: date):
+    refresh_counts("trips", trip_date)
+
+
 def process_rider_daily(trip_date: date):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        create_daily_table(cur, "rider_daily_hex_counts")
-        fetch_rider_daily(cur, trip_date)
-        upsert_daily(cur, "rider_daily_hex_counts", trip_date, count_daily(cur))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+    ensure_views("riders", hourly=False)
+    refresh_counts("riders", trip_date)
 
 
 def process_rider_hourly(trip_date: date):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        create_hourly_table(cur, "rider_hourly_hex_counts")
-        fetch_rider_hourly(cur, trip_date)
-        upsert_hourly(cur, "rider_hourly_hex_counts", trip_date, count_hourly(cur))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+    refresh_counts("riders", trip_date)
 
 
 def process_driver_daily(trip_date: date):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        create_daily_table(cur, "driver_daily_hex_counts")
-        fetch_driver_daily(cur, trip_date)
-        upsert_daily(cur, "driver_daily_hex_counts", trip_date, count_daily(cur))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+    ensure_views("drivers", hourly=False)
+    refresh_counts("drivers", trip_date)
 
 
 def process_driver_hourly(trip_date: date):
-    conn = get_connection()
-    cur = conn.cursor()
-    try:
-        create_hourly_table(cur, "driver_hourly_hex_counts")
-        fetch_driver_hourly(cur, trip_date)
-        upsert_hourly(cur, "driver_hourly_hex_counts", trip_date, count_hourly(cur))
-        conn.commit()
-    finally:
-        cur.close()
-        conn.close()
+    refresh_counts("drivers", trip_date)
+
+
+def process_hourly(trip_date: date):
+    """Recount trips, riders and drivers for one day (one scan per entity)."""
+    for entity in ENTITY_CONFIG:
+        refresh_counts(entity, trip_date)
+
+
+def process_daily(trip_date: date, refresh: bool = False):
+    """
+    Daily views sum the hourly rows, so this only ensures they exist;
+    pass refresh=True to also recount the day.
+    """
+    for entity in ENTITY_CONFIG:
+        ensure_views(entity, hourly=False)
+        if refresh:
+            refresh_counts(entity, trip_date)
 
 # -----------------------------------------------------------------------------
 # Main
@@ -317,14 +222,9 @@ def main():
     TARGET_DATE_STR = "2025-07-07"
     trip_date = datetime.strptime(TARGET_DATE_STR, "%Y-%m-%d").date()
 
-    process_trip_daily(trip_date)
-    process_trip_hourly(trip_date)
-
-    process_rider_daily(trip_date)
-    process_rider_hourly(trip_date)
-
-    process_driver_daily(trip_date)
-    process_driver_hourly(trip_date)
+    for entity in ENTITY_CONFIG:
+        ensure_views(entity)
+    process_hourly(trip_date)
 
     print(f"H3 aggregation completed for {TARGET_DATE_STR}")
 
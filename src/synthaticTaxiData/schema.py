@@ -16,10 +16,36 @@ CREATE TABLE IF NOT EXISTS drivers (
     activity_at DATETIME,
     last_update_at DATETIME,
     created_at DATETIME,
-    meta JSON
+    meta JSON,
+    row_updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    INDEX idx_drivers_row_updated_at (row_updated_at),
+    INDEX idx_drivers_activity_at (activity_at)
 ) ENGINE=InnoDB;
 """
 
+# Brings a drivers table created before the columns/indexes above up to date.
+# row_updated_at is server time of the last write (last_update_at is
+# simulation time), so readers can find moved drivers; activity_at lets the
+# aggregator recount the days they fall on: (kind, name, ALTER)
+DRIVERS_MIGRATIONS = [
+    (
+        "column",
+        "row_updated_at",
+        "ALTER TABLE drivers ADD COLUMN row_updated_at DATETIME(6) NOT NULL "
+        "DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)",
+    ),
+    (
+        "index",
+        "idx_drivers_row_updated_at",
+        "ALTER TABLE drivers ADD INDEX idx_drivers_row_updated_at (row_updated_at)",
+    ),
+    (
+        "index",
+        "idx_drivers_activity_at",
+        "ALTER TABLE drivers ADD INDEX idx_drivers_activity_at (activity_at)",
+    ),
+]
+
 RIDERS_TABLE = """
 CREATE TABLE IF NOT EXISTS riders (
     id INT AUTO_INCREMENT PRIMARY KEY,
@@ -59,10 +85,28 @@ CREATE TABLE IF NOT EXISTS trips (
     cancellation_reason VARCHAR(255),
     match_quality DOUBLE,
     created_at DATETIME,
-    meta JSON
+    meta JSON,
+    cancellation_attempt_count INT AS (COALESCE(JSON_LENGTH(meta, '$.cancellation_attempts'), 0)) STORED,
+    INDEX idx_trips_start_at (start_at)
 ) ENGINE=InnoDB;
 """
 
+# Brings a trips table created before the columns/indexes above up to date:
+# (kind, name, ALTER statement)
+TRIPS_MIGRATIONS = [
+    (
+        "column",
+        "cancellation_attempt_count",
+        "ALTER TABLE trips ADD COLUMN cancellation_attempt_count INT "
+        "AS (COALESCE(JSON_LENGTH(meta, '$.cancellation_attempts'), 0)) STORED",
+    ),
+    (
+        "index",
+        "idx_trips_start_at",
+        "ALTER TABLE trips ADD INDEX idx_trips_start_at (start_at)",
+    ),
+]
+
 TRIP_MATCH_LOGS_TABLE = """
 CREATE TABLE IF NOT EXISTS trip_match_logs (
     match_id INT AUTO_INCREMENT PRIMARY KEY,
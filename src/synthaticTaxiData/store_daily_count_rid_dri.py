@@ -1,24 +1,23 @@
 """
-Production-ready script to compute DAILY H3 counts for riders or drivers
-and store them in fixed-schema MySQL tables.
+Production-ready script to expose DAILY H3 counts for riders or drivers.
+
+Counts live in the long-format hex_counts table (written hourly by
+store_hrly_count_rid_dri); the fixed-schema daily tables are views that sum
+the hourly rows.
 """
 
 from __future__ import annotations
 
 from db_config import get_connection as mysql_get_connection
-from h3 import h3
-from collections import Counter
 from datetime import datetime, date
-from typing import Dict, Iterable
 
 from schema import HEX_LIST
+from hex_counts import ensure_wide_view
+import store_hrly_count_rid_dri
 
 # -----------------------------------------------------------------------------
 # Configuration
 # -----------------------------------------------------------------------------
-H3_RESOLUTION = 7
-BATCH_SIZE = 10_000
-
 ENTITY_CONFIG = {
     "riders": {
         "source_table": "riders",
@@ -38,113 +37,36 @@ def get_connection():
     return mysql_get_connection()
 
 
-def stream_rows(cursor, batch_size: int = BATCH_SIZE) -> Iterable[Dict]:
-    """Stream rows from MySQL cursor safely."""
-    while True:
-        rows = cursor.fetchmany(batch_size)
-        if not rows:
-            break
-        for row in rows:
-            yield row
-
-
-# -----------------------------------------------------------------------------
-# Schema management
-# -----------------------------------------------------------------------------
-def create_daily_table(cursor, table_name: str) -> None:
-    """Create a fixed-schema DAILY H3 table if it does not exist."""
-    columns = ",\n    ".join(f"h_{h} INT DEFAULT 0" for h in HEX_LIST)
-
-    sql = f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
-        report_date DATE NOT NULL,
-        {columns},
-        PRIMARY KEY (report_date)
-    ) ENGINE=InnoDB;
-    """
-    cursor.execute(sql)
-
-
-# -----------------------------------------------------------------------------
-# Core logic
-# -----------------------------------------------------------------------------
-def fetch_daily_positions(cursor, source_table: str, target_date: date) -> None:
-    """Fetch lat/lon rows for a specific date."""
-    cursor.execute(
-        f"""
-        SELECT lat, lon
-        FROM {source_table}
-        WHERE DATE(activity_at) = %s
-        """,
-        (target_date,),
-    )
-
-
-def compute_daily_h3_counts(cursor) -> Counter:
-    """Compute Counter({h3_index: count}) for the day."""
-    counts: Counter = Counter()
-
-    for row in stream_rows(cursor):
-        lat = row["lat"]
-        lon = row["lon"]
-
-        if lat is None or lon is None:
-            continue
-
-        h3_index = h3.geo_to_h3(lat, lon, H3_RESOLUTION)
-        if h3_index in HEX_LIST:
-            counts[h3_index] += 1
-
-    return counts
-
-
-def upsert_daily_counts(
-    cursor,
-    table_name: str,
-    report_date: date,
-    counts: Counter,
-) -> None:
-    """Insert base row and update fixed H3 columns."""
-    cursor.execute(
-        f"INSERT IGNORE INTO {table_name} (report_date) VALUES (%s)",
-        (report_date.isoformat(),),
-    )
-
-    for h in HEX_LIST:
-        cursor.execute(
-            f"""
-            UPDATE {table_name}
-            SET h_{h} = %s
-            WHERE report_date = %s
-            """,
-            (counts.get(h, 0), report_date.isoformat()),
-        )
-
-
 # -----------------------------------------------------------------------------
 # Orchestration
 # -----------------------------------------------------------------------------
-def process_entity(entity: str, target_date: date) -> None:
-    """End-to-end DAILY processing for one entity."""
+def ensure_view(entity: str) -> None:
+    """Create/refresh the daily compatibility view for one entity."""
     if entity not in ENTITY_CONFIG:
         raise ValueError(f"Unsupported entity: {entity}")
 
-    cfg = ENTITY_CONFIG[entity]
-
     conn = get_connection()
     cursor = conn.cursor(dictionary=True)
 
     try:
-        create_daily_table(cursor, cfg["target_table"])
-        fetch_daily_positions(cursor, cfg["source_table"], target_date)
-        counts = compute_daily_h3_counts(cursor)
-        upsert_daily_counts(cursor, cfg["target_table"], target_date, counts)
+        ensure_wide_view(cursor, ENTITY_CONFIG[entity]["target_table"], HEX_LIST)
         conn.commit()
     finally:
         cursor.close()
         conn.close()
 
 
+def process_entity(entity: str, target_date: date, refresh: bool = True) -> None:
+    """
+    End-to-end DAILY processing for one entity. Daily counts are the sum of
+    the hourly hex_counts rows, so this refreshes the day's hourly counts
+    (unless the caller just did, refresh=False) and ensures the view.
+    """
+    ensure_view(entity)
+    if refresh:
+        store_hrly_count_rid_dri.process_entity(entity, target_date)
+
+
 # -----------------------------------------------------------------------------
 # Main entry point
 # -----------------------------------------------------------------------------
@@ -1,6 +1,7 @@
 """
 Production‑ready script to compute hourly H3 counts for riders or drivers
-and store them in fixed‑schema MySQL tables.
+and store them in the long-format hex_counts table. The fixed-schema
+tables remain readable as views (see hex_counts.py).
 """
 
 from __future__ import annotations
@@ -12,6 +13,7 @@ from datetime import datetime, date
 from typing import Dict, Iterable
 
 from schema import HEX_LIST
+from hex_counts import ensure_wide_view, hex_index_map, replace_day
 
 # -----------------------------------------------------------------------------
 # Configuration
@@ -49,24 +51,6 @@ def stream_rows(cursor, batch_size: int = BATCH_SIZE) -> Iterable[Dict]:
             yield row
 
 
-# -----------------------------------------------------------------------------
-# Schema management
-# -----------------------------------------------------------------------------
-def create_hourly_table(cursor, table_name: str) -> None:
-    """Create a fixed‑schema hourly H3 table if it does not exist."""
-    columns = ",\n    ".join(f"h_{h} INT DEFAULT 0" for h in HEX_LIST)
-
-    sql = f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
-        report_date DATE NOT NULL,
-        hour TINYINT NOT NULL,
-        {columns},
-        PRIMARY KEY (report_date, hour)
-    ) ENGINE=InnoDB;
-    """
-    cursor.execute(sql)
-
-
 # -----------------------------------------------------------------------------
 # Core logic
 # -----------------------------------------------------------------------------
@@ -101,36 +85,25 @@ def compute_hourly_h3_counts(cursor) -> Dict[int, Counter]:
     return counts
 
 
-def upsert_hourly_counts(
-    cursor,
-    table_name: str,
-    report_date: date,
-    hourly_counts: Dict[int, Counter],
-) -> None:
-    """Insert base rows and update fixed H3 columns."""
-    for hour, hex_counter in hourly_counts.items():
-        cursor.execute(
-            f"""
-            INSERT IGNORE INTO {table_name} (report_date, hour)
-            VALUES (%s, %s)
-            """,
-            (report_date.isoformat(), hour),
-        )
-
-        for h in HEX_LIST:
-            cursor.execute(
-                f"""
-                UPDATE {table_name}
-                SET h_{h} = %s
-                WHERE report_date = %s AND hour = %s
-                """,
-                (hex_counter.get(h, 0), report_date.isoformat(), hour),
-            )
-
-
 # -----------------------------------------------------------------------------
 # Orchestration
 # -----------------------------------------------------------------------------
+def ensure_view(entity: str) -> None:
+    """Create/refresh the hourly compatibility view for one entity."""
+    if entity not in ENTITY_CONFIG:
+        raise ValueError(f"Unsupported entity: {entity}")
+
+    conn = get_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        ensure_wide_view(cursor, ENTITY_CONFIG[entity]["target_table"], HEX_LIST)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def process_entity(entity: str, target_date: date) -> None:
     """End‑to‑end processing for a single entity (riders or drivers)."""
     if entity not in ENTITY_CONFIG:
@@ -142,10 +115,10 @@ def process_entity(entity: str, target_date: date) -> None:
     cursor = conn.cursor(dictionary=True)
 
     try:
-        create_hourly_table(cursor, cfg["target_table"])
+        hex_index = hex_index_map(cursor, HEX_LIST)
         fetch_hourly_positions(cursor, cfg["source_table"], target_date)
         hourly_counts = compute_hourly_h3_counts(cursor)
-        upsert_hourly_counts(cursor, cfg["target_table"], target_date, hourly_counts)
+        replace_day(cursor, entity, target_date, hourly_counts, hex_index)
         conn.commit()
     finally:
         cursor.close()
@@ -160,6 +133,7 @@ def main() -> None:
     target_date = datetime.strptime(TARGET_DATE_STR, "%Y-%m-%d").date()
 
     for entity in ("riders", "drivers"):
+        ensure_view(entity)
         process_entity(entity, target_date)
         print(f"Hourly H3 counts completed for {entity} on {TARGET_DATE_STR}")
 
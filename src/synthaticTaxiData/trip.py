@@ -13,6 +13,7 @@ from db_utils import (
     update_driver_location
 )
 from helpers import haversine_km, generate_trip_datetime, build_trip_blueprint
+from trip_summary import TripSummaryAccumulator, ensure_summary_table
 
 # ---------------------------------------------------------
 # Constants
@@ -120,13 +121,24 @@ def create_test_trip(
     retry_on_cancel=True,
     conn=None,
     commit=True,
-    verbose=True
+    verbose=True,
+    summary=None
 ):
+    """
+    Create one trip. The trip is added to `summary` (a
+    TripSummaryAccumulator the caller flushes before committing); without
+    one, a private accumulator is flushed here, so callers passing
+    commit=False should pass `summary` too.
+    """
     own_conn = conn is None
+    own_summary = summary is None
+    if own_summary:
+        summary = TripSummaryAccumulator()
     if own_conn:
         conn = get_conn()
 
     try:
+        ensure_summary_table(conn)
         rider = fetch_one_rider(conn)
         rider_id = rider["rider_id"]
         pickup_lat = float(rider["lat"])
@@ -216,7 +228,18 @@ def create_test_trip(
             commit=False
         )
 
+        summary.add(
+            blueprint["start_at"].date(),
+            cancellation_reason=None if success else final_reason,
+            cancel_attempts=len(cancellations),
+            wait_time_min=blueprint["total_wait"],
+            fare=blueprint["fare"] if success else None,
+            pickup_distance_km=pickup_distance_km if success else None,
+        )
+
         if commit:
+            if own_summary:
+                summary.flush(conn)
             conn.commit()
 
         # if verbose:
@@ -238,8 +261,14 @@ def create_trips_for_date(
     num_rides: int,
     batch_size: int = 1000,
     progress_every: int = 100,
-    verbose: bool = False
+    verbose: bool = False,
+    on_commit=None
 ):
+    """
+    Generate num_rides trips on target_date, committing every batch_size.
+    on_commit(done, total) is called after each commit; an exception it
+    raises stops generation with the committed batches kept.
+    """
     print(
         f"\nGenerating {num_rides} trips for {target_date} "
         f"(batch_size={batch_size})"
@@ -247,24 +276,33 @@ def create_trips_for_date(
 
     timestamps = generate_trip_datetime(target_date, num_rides)
     conn = get_conn()
+    summary = TripSummaryAccumulator()
 
     try:
+        ensure_summary_table(conn)
         for i, ts in enumerate(timestamps, 1):
             create_test_trip(
                 forced_timestamp=ts,
                 conn=conn,
                 commit=False,
-                verbose=verbose
+                verbose=verbose,
+                summary=summary
             )
 
             if i % batch_size == 0:
+                summary.flush(conn)
                 conn.commit()
                 print(f"Committed {i}/{num_rides}")
+                if on_commit:
+                    on_commit(i, num_rides)
 
             # if verbose or i % progress_every == 0:
             #     print(f"[{i}/{num_rides}] inserted @ {ts}")
 
+        summary.flush(conn)
         conn.commit()
+        if on_commit:
+            on_commit(num_rides, num_rides)
     finally:
         conn.close()
 
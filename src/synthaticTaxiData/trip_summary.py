@@ -0,0 +1,356 @@
+"""
+trip_daily_summary: one pre-aggregated row per day of trips.
+
+The trip writer adds each finished trip to a TripSummaryAccumulator and
+flushes it on the same connection right before committing, so the rollup
+and the trips it summarizes land in one transaction. Summary endpoints
+then answer with a primary-key read instead of scanning the day's trips.
+
+Averages are kept as running sums/counts; the p95 pickup distance comes
+from a fixed-width histogram (PICKUP_BIN_KM) stored on the row, so it can
+be updated additively too.
+
+Reads never write: a day with no current rollup row (trips written before
+the rollup existed, or a row counted under an older SUMMARY_VERSION) is
+counted from the raw trips for that response only. Such days get their
+row from rebuild_stale_days (run by the aggregation job) or from the first
+flush that touches them. Both lock the day row first (lock_day), so a
+rebuild and a writer of the same day never interleave.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from hex_counts import column_names
+
+# -----------------------------------------------------------------------------
+# Configuration
+# -----------------------------------------------------------------------------
+PICKUP_BIN_KM = 0.05
+PICKUP_BINS = 200  # 0-10 km; anything farther lands in the last bin
+# Bump when a counted definition changes; older rows are recounted by
+# rebuild_stale_days or the next flush of their day, and bypassed on read
+SUMMARY_VERSION = 1
+
+TRIP_DAILY_SUMMARY_TABLE = """
+CREATE TABLE IF NOT EXISTS trip_daily_summary (
+    report_date DATE PRIMARY KEY,
+    total_trips INT NOT NULL DEFAULT 0,
+    completed_trips INT NOT NULL DEFAULT 0,
+    cancelled_trips INT NOT NULL DEFAULT 0,
+    trips_with_cancel_attempts INT NOT NULL DEFAULT 0,
+    wait_sum DOUBLE NOT NULL DEFAULT 0,
+    wait_n INT NOT NULL DEFAULT 0,
+    fare_sum DOUBLE NOT NULL DEFAULT 0,
+    fare_n INT NOT NULL DEFAULT 0,
+    pickup_hist JSON,
+    avg_wait_min DOUBLE,
+    avg_fare DOUBLE,
+    p95_pickup_distance_km DOUBLE,
+    summary_version INT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+"""
+
+SUMMARY_MIGRATIONS = [
+    ("summary_version",
+     "ALTER TABLE trip_daily_summary ADD COLUMN summary_version INT NOT NULL DEFAULT 0 "
+     "AFTER p95_pickup_distance_km"),
+]
+
+SUMMARY_TABLE_READY = False
+
+
+def ensure_summary_table(conn) -> None:
+    global SUMMARY_TABLE_READY
+    if SUMMARY_TABLE_READY:
+        return
+
+    cur = conn.cursor()
+    cur.execute(TRIP_DAILY_SUMMARY_TABLE)
+    present = column_names(cur, "trip_daily_summary")
+    for column, ddl in SUMMARY_MIGRATIONS:
+        if column not in present:
+            cur.execute(ddl)
+    conn.commit()
+    cur.close()
+    SUMMARY_TABLE_READY = True
+
+
+def pickup_bin(km: float) -> int:
+    return min(int(km / PICKUP_BIN_KM), PICKUP_BINS - 1)
+
+
+def p95_from_hist(hist: List[int]) -> Optional[float]:
+    """Upper edge of the histogram bin holding the 95th percentile."""
+    n = sum(hist)
+    if not n:
+        return None
+    target = math.ceil(0.95 * n)
+    running = 0
+    for i, c in enumerate(hist):
+        running += c
+        if running >= target:
+            return round((i + 1) * PICKUP_BIN_KM, 3)
+    return round(PICKUP_BINS * PICKUP_BIN_KM, 3)
+
+
+def _empty_day() -> Dict:
+    return {
+        "total_trips": 0,
+        "completed_trips": 0,
+        "cancelled_trips": 0,
+        "trips_with_cancel_attempts": 0,
+        "wait_sum": 0.0,
+        "wait_n": 0,
+        "fare_sum": 0.0,
+        "fare_n": 0,
+        "pickup_hist": [0] * PICKUP_BINS,
+    }
+
+
+# -----------------------------------------------------------------------------
+# Accumulator
+# -----------------------------------------------------------------------------
+class TripSummaryAccumulator:
+    """Per-day deltas of trips written since the last flush."""
+
+    def __init__(self):
+        self.days: Dict[date, Dict] = defaultdict(_empty_day)
+
+    def add(
+        self,
+        day: date,
+        *,
+        cancellation_reason: Optional[str],
+        cancel_attempts: int,
+        wait_time_min: Optional[float],
+        fare: Optional[float],
+        pickup_distance_km: Optional[float],
+    ) -> None:
+        d = self.days[day]
+        d["total_trips"] += 1
+        d["completed_trips"] += cancellation_reason is None
+        d["cancelled_trips"] += cancellation_reason is not None
+        d["trips_with_cancel_attempts"] += cancel_attempts > 0
+        if wait_time_min is not None:
+            d["wait_sum"] += float(wait_time_min)
+            d["wait_n"] += 1
+        if fare is not None:
+            d["fare_sum"] += float(fare)
+            d["fare_n"] += 1
+        if pickup_distance_km is not None:
+            d["pickup_hist"][pickup_bin(float(pickup_distance_km))] += 1
+
+    def flush(self, conn) -> None:
+        """
+        Merge pending deltas into trip_daily_summary on conn. Does not
+        commit: the caller commits together with the trips, which must
+        already be written on conn. Call ensure_summary_table before
+        writing the trips, since DDL would commit the open transaction.
+
+        A day without a current rollup row may already have trips (written
+        before the rollup existed, or counted under an older
+        SUMMARY_VERSION), so that row is counted from the trips themselves,
+        this transaction's included, instead of the delta.
+        """
+        if not self.days:
+            return
+        cur = conn.cursor(dictionary=True)
+        try:
+            for day, delta in sorted(self.days.items()):
+                merged = lock_day(cur, day)
+                if merged is None:
+                    merged = count_day(cur, day)
+                else:
+                    for key, value in delta.items():
+                        if key == "pickup_hist":
+                            merged[key] = [a + b for a, b in zip(merged[key], value)]
+                        else:
+                            merged[key] += value
+                write_day(cur, day, merged)
+        finally:
+            cur.close()
+        self.days.clear()
+
+
+def lock_day(cur, day: date) -> Optional[Dict]:
+    """
+    Lock the rollup row of `day` for the current transaction and return
+    its totals, or None if the day had no row or one counted under an
+    older SUMMARY_VERSION (the caller recounts it). An empty row is inserted
+    first so there is always a row to lock: writers and rebuilds of the
+    same day then queue on it instead of racing to create it.
+    """
+    cur.execute("INSERT IGNORE INTO trip_daily_summary (report_date) VALUES (%s)", (day,))
+    created = cur.rowcount == 1
+    cur.execute("SELECT * FROM trip_daily_summary WHERE report_date = %s FOR UPDATE", (day,))
+    row = cur.fetchone()
+    if created or row["summary_version"] != SUMMARY_VERSION:
+        return None
+    return _row_to_day(row)
+
+
+def count_day(cur, day: date) -> Dict:
+    """A day's totals recomputed from the raw trips visible to this transaction."""
+    acc = TripSummaryAccumulator()
+    cur.execute(
+        """
+        SELECT cancellation_reason, cancellation_attempt_count,
+               wait_time_min, fare, pickup_distance_km
+        FROM trips
+        WHERE start_at >= %s AND start_at < %s
+        """,
+        (day, day + timedelta(days=1)),
+    )
+    for row in cur.fetchall():
+        acc.add(
+            day,
+            cancellation_reason=row["cancellation_reason"],
+            cancel_attempts=int(row["cancellation_attempt_count"] or 0),
+            wait_time_min=row["wait_time_min"],
+            fare=row["fare"],
+            pickup_distance_km=row["pickup_distance_km"],
+        )
+    return acc.days[day]
+
+
+def _row_to_day(row: Dict) -> Dict:
+    day = {key: row[key] for key in _empty_day() if key != "pickup_hist"}
+    hist = json.loads(row["pickup_hist"]) if row["pickup_hist"] else []
+    day["pickup_hist"] = (hist + [0] * PICKUP_BINS)[:PICKUP_BINS]
+    return day
+
+
+def summary_row(d: Dict) -> Dict:
+    """The served columns of a day's totals (what rollup_rows_sql selects)."""
+    return {
+        "total_trips": d["total_trips"],
+        "completed_trips": d["completed_trips"],
+        "cancelled_trips": d["cancelled_trips"],
+        "trips_with_cancel_attempts": d["trips_with_cancel_attempts"],
+        "avg_wait_min": d["wait_sum"] / d["wait_n"] if d["wait_n"] else None,
+        "avg_fare": d["fare_sum"] / d["fare_n"] if d["fare_n"] else None,
+        "p95_pickup_distance_km": p95_from_hist(d["pickup_hist"]),
+    }
+
+
+def write_day(cur, day: date, d: Dict) -> None:
+    row = summary_row(d)
+    cur.execute(
+        """
+        REPLACE INTO trip_daily_summary (
+            report_date, total_trips, completed_trips, cancelled_trips,
+            trips_with_cancel_attempts, wait_sum, wait_n, fare_sum, fare_n,
+            pickup_hist, avg_wait_min, avg_fare, p95_pickup_distance_km,
+            summary_version
+        ) VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        """,
+        (
+            day,
+            d["total_trips"],
+            d["completed_trips"],
+            d["cancelled_trips"],
+            d["trips_with_cancel_attempts"],
+            d["wait_sum"],
+            d["wait_n"],
+            d["fare_sum"],
+            d["fare_n"],
+            json.dumps(d["pickup_hist"]),
+            row["avg_wait_min"],
+            row["avg_fare"],
+            row["p95_pickup_distance_km"],
+            SUMMARY_VERSION,
+        ),
+    )
+
+
+# -----------------------------------------------------------------------------
+# Backfill / reads
+# -----------------------------------------------------------------------------
+def rebuild_days(conn, days: Iterable[date]) -> None:
+    """
+    Recompute the rollup rows of `days` from the raw trips, one day per
+    transaction. The day row is locked before the trips are read, so a
+    writer flushing the same day waits and then adds its delta on top.
+    """
+    ensure_summary_table(conn)
+    conn.commit()  # read the trips on a snapshot taken after the lock
+    cur = conn.cursor(dictionary=True)
+    try:
+        for day in days:
+            lock_day(cur, day)
+            write_day(cur, day, count_day(cur, day))
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def rebuild_stale_days(conn, all_days: bool = False) -> List[date]:
+    """
+    Rebuild the rollup rows counted under an older SUMMARY_VERSION, or, with
+    all_days, every day that has trips. Returns the days rebuilt. Meant for
+    the aggregation job: the read paths never write.
+    """
+    ensure_summary_table(conn)
+    cur = conn.cursor()
+    if all_days:
+        cur.execute("SELECT DISTINCT DATE(start_at) FROM trips WHERE start_at IS NOT NULL")
+    else:
+        cur.execute(
+            "SELECT report_date FROM trip_daily_summary WHERE summary_version <> %s",
+            (SUMMARY_VERSION,),
+        )
+    days = sorted(row[0] for row in cur.fetchall())
+    cur.close()
+    rebuild_days(conn, days)
+    return days
+
+
+def count_days(conn, days: Iterable[date]) -> Dict[date, Dict]:
+    """Served columns of `days` counted from the raw trips, without writing."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        return {day: summary_row(count_day(cur, day)) for day in days}
+    finally:
+        cur.close()
+
+
+def rollup_rows_sql(n_days: int) -> str:
+    placeholders = ", ".join(["%s"] * n_days)
+    return f"""
+        SELECT report_date, total_trips, completed_trips, cancelled_trips,
+               trips_with_cancel_attempts, avg_wait_min, avg_fare,
+               p95_pickup_distance_km
+        FROM trip_daily_summary
+        WHERE report_date IN ({placeholders}) AND summary_version = {SUMMARY_VERSION}
+    """
+
+
+def read_days(conn, days: Iterable[date]) -> Dict[date, Dict]:
+    """
+    Rollup rows for `days` by primary key. Days with no current rollup row
+    are counted from the raw trips for this call only; nothing is written.
+    """
+    days = sorted(set(days))
+    if not days:
+        return {}
+    ensure_summary_table(conn)
+
+    cur = conn.cursor(dictionary=True)
+    cur.execute(rollup_rows_sql(len(days)), days)
+    rows = {row.pop("report_date"): row for row in cur.fetchall()}
+    cur.close()
+
+    missing = [d for d in days if d not in rows]
+    if missing:
+        rows.update(count_days(conn, missing))
+    return {d: rows[d] for d in days}
@@ -0,0 +1,52 @@
+# tests/conftest.py
+"""
+Put the project on sys.path the way appfastapi/dataApp do, so tests can
+import both `src.*` packages and the flat `synthaticTaxiData` modules.
+src/Mcmf+RL and src/forecast are not packages either; their modules
+import each other flat.
+"""
+
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+DATA_DIR = os.path.join(SRC_DIR, "synthaticTaxiData")
+MCMF_DIR = os.path.join(SRC_DIR, "Mcmf+RL")
+FORECAST_DIR = os.path.join(SRC_DIR, "forecast")
+
+for path in (BASE_DIR, SRC_DIR, DATA_DIR, MCMF_DIR, FORECAST_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def mysql_db(monkeypatch):
+    """
+    Empty core tables in the scratch MySQL database named by MYSQL_TEST_DB
+    (every table and view in it is dropped first). Tests using this fixture
+    are skipped when MYSQL_TEST_DB is not set.
+    """
+    name = os.getenv("MYSQL_TEST_DB")
+    if not name:
+        pytest.skip("set MYSQL_TEST_DB to a scratch MySQL 8 database to run the DB tests")
+    monkeypatch.setenv("MYSQL_DB", name)
+
+    from db_config import get_connection
+    from schema import ALL_TABLES
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT TABLE_NAME, TABLE_TYPE FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()"
+    )
+    for table, kind in cursor.fetchall():
+        cursor.execute(f"DROP {'VIEW' if kind == 'VIEW' else 'TABLE'} IF EXISTS `{table}`")
+    for ddl in ALL_TABLES:
+        cursor.execute(ddl)
+    conn.commit()
+    yield conn
+    cursor.close()
+    conn.close()
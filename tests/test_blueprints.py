@@ -0,0 +1,104 @@
+# tests/test_blueprints.py
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("shapely")
+
+from shapely.geometry import Point
+
+from helpers import (
+    NYC_POLYGON,
+    blueprint_rows,
+    build_trip_blueprint,
+    build_trip_blueprints,
+    contains_points,
+    generate_trip_datetime,
+    random_nyc_point,
+    trip_datetime_array,
+)
+
+DAY = date(2025, 7, 7)
+N = 2_000
+SEED = 7
+BUCKET_STARTS = [0, 6, 10, 18, 22]  # hours where generate_trip_datetime buckets begin
+
+
+def old_and_new(seed=SEED, n=N):
+    """build_trip_blueprint per trip vs one build_trip_blueprints batch, same pickups."""
+    random.seed(seed)
+    pickups = [random_nyc_point() for _ in range(n)]
+    times = generate_trip_datetime(DAY, n)
+    old = [build_trip_blueprint(lat, lon, forced_timestamp=ts) for (lat, lon), ts in zip(pickups, times)]
+
+    rng = np.random.default_rng(seed)
+    new = blueprint_rows(build_trip_blueprints(n, pickups, trip_datetime_array(DAY, n, rng), rng=rng))
+    return pickups, old, new
+
+
+def test_contains_points_is_the_shapely_predicate():
+    rng = np.random.default_rng(SEED)
+    lats = rng.uniform(40.60, 40.95, 5_000)
+    lons = rng.uniform(-74.05, -73.70, 5_000)
+    expected = [NYC_POLYGON.contains(Point(lat, lon)) for lat, lon in zip(lats.tolist(), lons.tolist())]
+    assert contains_points(lats, lons).tolist() == expected
+
+
+def test_batch_is_reproducible_for_a_seed():
+    _, _, first = old_and_new()
+    _, _, second = old_and_new()
+    assert first == second
+
+
+def test_batch_keeps_the_per_trip_rules():
+    pickups, old, new = old_and_new()
+    assert len(new) == len(old) == N
+
+    for rows in (old, new):
+        assert rows[0].keys() == old[0].keys()
+        for (lat, lon), b in zip(pickups, rows):
+            assert 3 <= b["distance_km"] <= 22
+            assert NYC_POLYGON.contains(Point(b["drop_lat"], b["drop_lon"]))
+            reach = b["distance_km"] / 111.0 + 1e-12
+            assert abs(b["drop_lat"] - lat) <= reach and abs(b["drop_lon"] - lon) <= reach
+
+            assert 0 <= b["total_wait"] <= 7
+            assert 0.3 * b["total_wait"] - 1e-9 <= b["request_to_match"] <= 0.7 * b["total_wait"] + 1e-9
+            assert b["request_to_match"] + b["match_to_start"] == pytest.approx(b["total_wait"])
+            assert b["matched_at"] - b["requested_at"] == pytest.approx(
+                timedelta(minutes=b["request_to_match"]), abs=timedelta(microseconds=1)
+            )
+            assert b["end_at"] - b["start_at"] == pytest.approx(
+                timedelta(minutes=b["ride_duration_min"]), abs=timedelta(microseconds=1)
+            )
+            assert b["ride_duration_min"] == pytest.approx(b["distance_km"] * 2)
+
+            assert -0.005 <= b["fare"] - 3 - b["distance_km"] * 1.4 <= 3.005  # fare is rounded
+            assert 0.7 <= b["match_quality"] <= 0.99
+
+
+def test_batch_matches_the_per_trip_distributions():
+    _, old, new = old_and_new()
+
+    for key, tolerance in (("distance_km", 0.75), ("total_wait", 0.25), ("fare", 1.1), ("match_quality", 0.01)):
+        old_mean = np.mean([b[key] for b in old])
+        new_mean = np.mean([b[key] for b in new])
+        assert abs(old_mean - new_mean) < tolerance, key
+
+    # Same bucket mix: identical trip counts per time-of-day bucket
+    def bucket_counts(rows):
+        assert all(b["requested_at"].date() == DAY for b in rows)
+        return Counter(np.searchsorted(BUCKET_STARTS, b["requested_at"].hour, side="right") for b in rows)
+
+    assert bucket_counts(old) == bucket_counts(new)
+
+
+def test_trip_datetime_array_is_sorted_seconds_on_the_day():
+    times = trip_datetime_array(DAY, N, np.random.default_rng(SEED))
+    assert len(times) == N
+    assert (np.diff(times) >= np.timedelta64(0, "s")).all()
+    assert times.min() >= np.datetime64(DAY, "s")
+    assert times.max() < np.datetime64(DAY + timedelta(days=1), "s")
@@ -0,0 +1,111 @@
+# tests/test_demand_supply_cube.py
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("shapely")
+pytest.importorskip("folium")
+pytest.importorskip("mysql.connector")
+
+import demand_supply_cube
+from demand_supply_cube import BUCKET, DemandSupplyCube
+from hex_geojson import nyc_hex
+
+TIMES_SQUARE = (40.7580, -73.9855)
+NOW = datetime(2025, 7, 7, 9, 5)
+
+
+class FakeDB:
+    """get_connection() stand-in that only answers SELECT NOW(6)."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        assert "NOW(6)" in sql
+
+    def fetchone(self):
+        return (self.now,)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def cube(monkeypatch):
+    """A 1-day cube ending at the bucket after NOW, fed by `pending` rows."""
+    db = FakeDB(NOW)
+    pending = {"riders": [], "drivers": []}
+    monkeypatch.setattr(demand_supply_cube, "get_connection", db)
+
+    cube = DemandSupplyCube(days=1)
+    cube.origin = demand_supply_cube._bucket_floor(NOW) + BUCKET - timedelta(days=1)
+    cube.counts = np.zeros((cube.max_buckets, 0, 2), dtype=np.int32)
+    cube.moved_since = NOW
+
+    def fetch_new(cursor, entity, lo, origin):
+        rows, pending[entity] = pending[entity], []
+        return lo + len(rows), cube._located(rows)
+
+    monkeypatch.setattr(cube, "_fetch_new", fetch_new)
+    monkeypatch.setattr(cube, "_fetch_moved", lambda *args: [])
+    return cube, db, pending
+
+
+def riders(cube, start, end):
+    return sum(cube.query(start, end)["riders"].values())
+
+
+def test_future_rows_wait_instead_of_rolling_the_window(cube):
+    cube, db, pending = cube
+    origin = cube.origin
+    pending["riders"] = [(1, NOW, *TIMES_SQUARE), (2, NOW + timedelta(days=3), *TIMES_SQUARE)]
+
+    assert cube.append()["riders"] == 1
+    assert cube.origin == origin
+    assert cube.status()["future_rows"] == 1
+    assert cube.query("2025-07-07 09:00:00", "2025-07-07 09:15:00")["riders"] == {
+        nyc_hex(*TIMES_SQUARE, cube.resolution): 1
+    }
+
+    # Three days on, the row's bucket has started: counted, window rolled to it
+    db.now = NOW + timedelta(days=3)
+    cube.append()
+    assert cube.status()["future_rows"] == 0
+    assert cube.origin == origin + timedelta(days=3)
+    assert riders(cube, "2025-07-10 09:00:00", "2025-07-10 09:15:00") == 1
+
+
+def test_queries_are_answered_while_an_append_reads_the_database(cube, monkeypatch):
+    cube, _, pending = cube
+    pending["riders"] = [(1, NOW, *TIMES_SQUARE)]
+    cube.append()
+
+    reading, answered = threading.Event(), []
+    fetch_new = cube._fetch_new
+
+    def slow_fetch_new(cursor, entity, lo, origin):
+        if entity == "riders":
+            reading.set()
+            worker = threading.Thread(
+                target=lambda: answered.append(riders(cube, "2025-07-07 09:00:00", "2025-07-07 09:15:00"))
+            )
+            worker.start()
+            worker.join(timeout=5)
+        return fetch_new(cursor, entity, lo, origin)
+
+    monkeypatch.setattr(cube, "_fetch_new", slow_fetch_new)
+    pending["riders"] = [(2, NOW, *TIMES_SQUARE)]
+    cube.append()
+
+    assert reading.is_set()
+    assert answered == [1]  # the old counts, without waiting for the append
+    assert riders(cube, "2025-07-07 09:00:00", "2025-07-07 09:15:00") == 2
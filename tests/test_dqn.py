@@ -0,0 +1,49 @@
+# tests/test_dqn.py
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+h3 = pytest.importorskip("h3").h3
+
+from zoneBalance.dqn import DQNAgent
+from zoneBalance.helpers import build_neighbour_actions
+
+
+def test_neighbour_actions_stay_inside_the_k_ring():
+    origin = h3.geo_to_h3(40.7580, -73.9855, 8)
+    zones = [origin] + sorted(h3.hex_ring(origin, 1)) + sorted(h3.hex_ring(origin, 2))
+
+    pairs = build_neighbour_actions(zones, k=1)
+
+    assert pairs == sorted(set(pairs))
+    for f, t in pairs:
+        assert f != t
+        assert h3.h3_distance(zones[f], zones[t]) == 1
+    # the centre reaches all six ring-1 zones
+    assert sum(1 for f, _ in pairs if f == 0) == 6
+
+
+def test_sparse_agent_acts_and_learns_on_allowed_pairs_only():
+    np.random.seed(0)
+    torch.manual_seed(0)
+    pairs = [(0, 1), (1, 2), (2, 3), (3, 0)]
+    agent = DQNAgent(state_size=4, action_pairs=pairs, batch_size=4)
+
+    q = agent.model(torch.zeros(2, 4))
+    assert q.shape == (2, len(pairs))
+
+    state = np.array([-2, 3, 0, 0])  # zone 0 has surplus, zone 1 a deficit
+    for epsilon in (1.0, 0.0):
+        agent.epsilon = epsilon
+        (f, t, num), idx = agent.act(state)
+        assert (f, t, num) == (0, 1, 2)
+        assert agent.idx_to_ft(idx) == (0, 1)
+
+    next_state = np.array([0, 1, 0, 0])
+    for _ in range(agent.batch_size):
+        agent.remember(state, (0, 1, 2), idx, 1.0, next_state, False)
+    agent.replay()
+    assert agent.learn_step_counter == 1
+
+    # no surplus -> deficit pair among the allowed edges
+    assert agent.act(np.array([0, -1, 0, 1]))[1] is None
@@ -0,0 +1,39 @@
+# tests/test_forecast_service.py
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sqlalchemy")
+
+import forecast_service
+from forecast_service import build_tasks, mape, next_period
+
+
+def history(start, y, hex_id="882a100d2bfffff", hour=8):
+    dates = pd.date_range(start, periods=len(y), freq="7D")
+    return pd.DataFrame({"report_date": dates, "hour": hour, "hex_id": hex_id, "count": y})
+
+
+def test_mape_skips_zero_actuals():
+    assert mape([0, 0], [1, 2]) == 0.0
+    assert mape([0, 10, 20], [5, 11, 18]) == pytest.approx(10.0)
+    assert np.isfinite(mape([0, 1], [3, 1]))
+
+
+@pytest.mark.parametrize("start", ["2025-07-07", "2025-07-09"])  # a Monday and a Wednesday
+def test_zero_and_fitted_series_forecast_the_same_date(start, tmp_path, monkeypatch):
+    pytest.importorskip("prophet")
+    monkeypatch.setattr(forecast_service, "CACHE_DIR", str(tmp_path))
+    zeros = history(start, [0.0] * 6, hex_id="zero")
+    counts = history(start, [3.0, 5.0, 4.0, 6.0, 5.0, 7.0], hex_id="busy")
+
+    tasks, ready = build_tasks("drivers", pd.concat([zeros, counts]))
+    assert [r["hex_id"] for r in ready] == ["zero"]
+    assert len(tasks) == 1
+
+    fitted = forecast_service.fit_series(tasks[0])
+    last = counts["report_date"].iloc[-1]
+    assert fitted["forecast_date"] == ready[0]["forecast_date"] == next_period(last).date().isoformat()
+    assert pd.Timestamp(fitted["forecast_date"]) > last
+    assert pd.Timestamp(fitted["forecast_date"]).dayofweek == 0
+    assert np.isfinite(fitted["mape"])
@@ -0,0 +1,67 @@
+# tests/test_forecast_tensors.py
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+sqlalchemy = pytest.importorskip("sqlalchemy")
+pytest.importorskip("h3")
+pytest.importorskip("pyarrow")
+
+import data
+from sqlalchemy import text
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """In-memory hex hourly tables whose hex columns are in different orders."""
+    engine = sqlalchemy.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE rider_hex_hourly_fixed (report_date TEXT, hour INT, h_a INT, h_b INT)"))
+        conn.execute(text("CREATE TABLE drivers_hex_hourly_fixed (h_c INT, h_b INT, report_date TEXT, hour INT, h_a INT)"))
+        conn.execute(text("INSERT INTO rider_hex_hourly_fixed VALUES ('2025-07-07', 8, 1, 2)"))
+        conn.execute(text("INSERT INTO drivers_hex_hourly_fixed VALUES (30, 20, '2025-07-08', 9, 10)"))
+
+    def sqlite_hex_columns(conn, tables):
+        return {t: [r[1] for r in conn.execute(text(f"PRAGMA table_info({t})")) if r[1].startswith("h_")]
+                for t in tables}
+
+    monkeypatch.setattr(data, "hex_columns", sqlite_hex_columns)
+    return engine
+
+
+def test_tensors_follow_column_names_not_positions(engine):
+    dates, hex_ids, tensors = data.fetch_hex_hour_tensors(engine, "2025-07-07", "2025-07-08")
+
+    assert hex_ids == ["a", "b", "c"]
+    assert list(dates.date.astype(str)) == ["2025-07-07", "2025-07-08"]
+    np.testing.assert_array_equal(tensors["riders"][0, 8], [1, 2, 0])  # no h_c column -> 0
+    np.testing.assert_array_equal(tensors["drivers"][1, 9], [10, 20, 30])
+    assert tensors["riders"].sum() == 3 and tensors["drivers"].sum() == 60
+
+
+def test_snapshot_hex_counts_hash_each_coordinate_once(monkeypatch):
+    import parquet_snapshot
+
+    points = pd.DataFrame({
+        "activity_at": pd.to_datetime(["2025-07-07 08:05", "2025-07-07 08:40", "2025-07-07 09:10", "2025-07-07 09:20"]),
+        "lat": [40.7580, 40.7580, 40.7580, 40.6413],
+        "lon": [-73.9855, -73.9855, -73.9855, -73.7781],
+    })
+    monkeypatch.setattr(parquet_snapshot, "read_table", lambda entity, start, end, columns: points[columns])
+    geo_to_h3 = data.h3.geo_to_h3
+    calls = []
+
+    def counting_geo_to_h3(lat, lon, res):
+        calls.append((lat, lon))
+        return geo_to_h3(lat, lon, res)
+
+    monkeypatch.setattr(data.h3, "geo_to_h3", counting_geo_to_h3)
+    df = data.get_snapshot_hex_hourly_counts("drivers", "2025-07-07", "2025-07-07")
+
+    assert len(calls) == 2
+    square, jfk = geo_to_h3(40.7580, -73.9855, 7), geo_to_h3(40.6413, -73.7781, 7)
+    assert sorted(df.itertuples(index=False, name=None)) == sorted([
+        (pd.Timestamp("2025-07-07").date(), 8, square, 2),
+        (pd.Timestamp("2025-07-07").date(), 9, square, 1),
+        (pd.Timestamp("2025-07-07").date(), 9, jfk, 1),
+    ])
@@ -0,0 +1,103 @@
+# tests/test_heatmap_counts.py
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip("shapely")
+pytest.importorskip("folium")
+pytest.importorskip("mysql.connector")
+
+from shapely.geometry import Point
+
+from helperForHeatMap import H3_RESOLUTION, PointBins, in_nyc
+from hex_geojson import count_points
+from nyc_polygon import NYC_POLYGON, POLY_COORDS
+
+
+def sample_points(n=5_000, seed=0):
+    """Random points around NYC plus points on and right next to the boundary."""
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(40.68, 40.93, n)
+    lons = rng.uniform(-74.03, -73.78, n)
+    ring = np.asarray(POLY_COORDS)
+    mids = (ring[:-1] + ring[1:]) / 2
+    edge = np.vstack([ring, mids, mids + 1e-9, mids - 1e-9])
+    return np.vstack([np.column_stack([lats, lons]), edge])
+
+
+def test_in_nyc_is_the_shapely_predicate():
+    points = sample_points()
+    expected = [NYC_POLYGON.contains(Point(lon, lat)) for lat, lon in points.tolist()]
+    assert in_nyc(points[:, 0], points[:, 1]).tolist() == expected
+
+
+def test_point_bins_and_count_points_clip_alike():
+    points = sample_points()
+    bins = PointBins(H3_RESOLUTION)
+    for chunk in np.array_split(points, 7):
+        bins.add(chunk)
+
+    counts = count_points({"lat": lat, "lon": lon} for lat, lon in points.tolist())
+
+    assert dict(bins.hex_counts) == dict(counts)
+    assert bins.n == sum(counts.values())
+
+
+def test_pyramid_levels_match_a_raw_count_at_every_resolution():
+    import incremental_aggregate
+    from hex_pyramid import RESOLUTIONS
+
+    points = sample_points(n=2_000)
+    rows = [(datetime(2025, 7, 7, 8, i % 60), lat, lon) for i, (lat, lon) in enumerate(points.tolist())]
+    *_, cells = incremental_aggregate.count_rows(rows)
+
+    for res in RESOLUTIONS:
+        pyramid = Counter({cell: n for (r, _, _, cell), n in cells.items() if r == res})
+        raw = count_points(({"lat": lat, "lon": lon} for _, lat, lon in rows), res)
+        assert pyramid == raw, res
+
+
+# -----------------------------------------------------------------------------
+# Against MySQL (MYSQL_TEST_DB)
+# -----------------------------------------------------------------------------
+def test_cube_pyramid_and_raw_paths_agree(mysql_db):
+    import incremental_aggregate
+    from db_utils import update_driver_location
+    from demand_supply_cube import DemandSupplyCube
+    from hex_geojson import raw_counts, read_pyramid
+
+    points = sample_points(n=400, seed=1).tolist()
+    cursor = mysql_db.cursor()
+
+    def add(entity, i, lat, lon, hour):
+        ts = datetime(2025, 7, 7, hour, i % 60)
+        cursor.execute(
+            f"INSERT INTO {entity} ({entity[:-1]}_id, lat, lon, activity_at, created_at) VALUES (%s, %s, %s, %s, %s)",
+            (f"{entity}-{i}", lat, lon, ts, ts),
+        )
+
+    for i, (lat, lon) in enumerate(points):
+        add("riders" if i % 2 else "drivers", i, lat, lon, 8 + i % 2)
+    mysql_db.commit()
+    incremental_aggregate.fold_all(("riders", "drivers"))
+
+    # Not folded yet: a moved driver and a new rider
+    cursor.execute("SELECT driver_id FROM drivers ORDER BY id LIMIT 1")
+    update_driver_location(mysql_db, cursor.fetchone()[0], *points[1])
+    add("riders", len(points), *points[3], 9)
+    mysql_db.commit()
+
+    cube = DemandSupplyCube(days=2)
+    cube.load()
+    start_ts, end_ts = "2025-07-07 08:00:00", "2025-07-07 10:00:00"
+    assert cube.covers(start_ts, end_ts, H3_RESOLUTION)
+    from_cube = cube.query(start_ts, end_ts)
+
+    for res in (H3_RESOLUTION, 8):
+        riders, drivers = raw_counts(res, start_ts, end_ts)
+        assert read_pyramid(res, start_ts, end_ts) == (riders, drivers)
+        if res == H3_RESOLUTION:
+            assert (from_cube["riders"], from_cube["drivers"]) == (riders, drivers)
+    cursor.close()
@@ -0,0 +1,62 @@
+# tests/test_heatmap_route.py
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("folium")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import src.routes.heatmap_route as heatmap_route
+from src.routes import response_cache
+
+MAP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "map_file")
+WINDOW = {"start_ts": "2025-07-07 07:00:00", "end_ts": "2025-07-07 08:00:00", "zoom": 11}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    renders = []
+
+    def map_html_dynamic(start_ts, end_ts, zoom):
+        renders.append((start_ts, end_ts, zoom))
+        return {"html": f"<html>{start_ts}|{end_ts}|{zoom}</html>", "hex_stats": [{"hex": "h", "net": 1}]}
+
+    monkeypatch.setattr(heatmap_route, "map_html_dynamic", map_html_dynamic)
+    monkeypatch.setattr(response_cache, "backend", response_cache.TTLCache())
+
+    app = FastAPI()
+    app.include_router(heatmap_route.router, prefix="/heatmap")
+    return TestClient(app), renders
+
+
+def test_map_is_served_from_the_cache_without_a_file(client):
+    client, renders = client
+    files_before = set(os.listdir(MAP_DIR))
+
+    response = client.get("/heatmap/generate_heatmap", params=WINDOW)
+    assert response.status_code == 200
+    map_url = response.json()["map_url"]
+    assert "/heatmap/map?" in map_url
+
+    page = client.get(map_url.replace("http://127.0.0.1:8000", ""))
+    assert page.status_code == 200
+    assert page.headers["content-type"].startswith("text/html")
+    assert page.headers["X-Cache"] == "HIT"
+    assert page.text == "<html>2025-07-07 07:00:00|2025-07-07 08:00:00|11</html>"
+    assert len(renders) == 1
+    assert set(os.listdir(MAP_DIR)) == files_before
+
+
+def test_evicted_map_is_rendered_again(client):
+    client, renders = client
+
+    response_cache.invalidate(response_cache.HEATMAP)
+    page = client.get("/heatmap/map", params=WINDOW)
+
+    assert page.headers["X-Cache"] == "MISS"
+    assert page.text.startswith("<html>2025-07-07 07:00:00")
+    assert len(renders) == 1
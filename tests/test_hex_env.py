@@ -0,0 +1,68 @@
+# tests/test_hex_env.py
+import random
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("matplotlib")
+
+from dfinit import W_BALANCED, W_OVER, W_UNDER, df_init, hex_ids
+from train_and_evaluate import Forecaster, HexEnv
+
+
+class DataFrameHexEnv:
+    """The DataFrame-backed HexEnv.step/state_vector that HexEnv replaced."""
+
+    def __init__(self, df, forecaster):
+        self.base_df = df.copy()
+        self.df = df.copy()
+        self.forecaster = forecaster
+        for _, r in self.df.iterrows():
+            self.forecaster.update(r.HexID, r.Riders)
+
+    def state_vector(self):
+        vec = []
+        for _, r in self.df.iterrows():
+            f = self.forecaster.forecast(r.HexID)
+            vec.extend([r.Riders / 10.0, r.Drivers / 10.0, (r.Drivers - r.Riders) / 10.0, f / 10.0])
+        return np.array(vec, dtype=np.float32)
+
+    def step(self, moves):
+        for s, d, m in moves:
+            avail = int(self.df.loc[self.df.HexID == s, "Drivers"].iloc[0])
+            m = min(avail, m)
+            self.df.loc[self.df.HexID == s, "Drivers"] -= m
+            self.df.loc[self.df.HexID == d, "Drivers"] += m
+        self.df["Drivers"] = self.df["Drivers"].clip(lower=0)
+
+        balanced = oversupply = undersupply = 0
+        for _, r in self.df.iterrows():
+            if r.Drivers == r.Riders:
+                balanced += 1
+            elif r.Drivers > r.Riders:
+                oversupply += r.Drivers - r.Riders
+            else:
+                undersupply += r.Riders - r.Drivers
+        reward = W_BALANCED * balanced + W_OVER * oversupply + W_UNDER * undersupply
+        return self.state_vector(), reward, {
+            "balanced": balanced, "oversupply_amt": oversupply, "undersupply_amt": undersupply,
+        }
+
+
+def test_array_env_matches_dataframe_env():
+    rng = random.Random(7)
+    env = HexEnv(df_init, Forecaster(), seed=0)
+    legacy = DataFrameHexEnv(df_init, Forecaster())
+
+    np.testing.assert_array_equal(env.reset(), legacy.state_vector())
+    for _ in range(20):
+        moves = [(rng.choice(hex_ids), rng.choice(hex_ids), rng.randint(0, 5)) for _ in range(3)]
+        state, reward, info = env.step(moves)
+        legacy_state, legacy_reward, legacy_info = legacy.step(moves)
+
+        np.testing.assert_array_equal(state, legacy_state)
+        assert reward == legacy_reward
+        assert info == legacy_info
+
+    pd.testing.assert_frame_equal(env.df, legacy.df.reset_index(drop=True), check_dtype=False)
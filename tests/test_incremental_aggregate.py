@@ -0,0 +1,97 @@
+# tests/test_incremental_aggregate.py
+from datetime import date, datetime
+
+import pytest
+
+h3 = pytest.importorskip("h3").h3
+pytest.importorskip("mysql.connector")
+pytest.importorskip("pyarrow")
+
+import incremental_aggregate
+from schema import HEX_LIST
+
+DAY = date(2025, 7, 7)
+A, B = HEX_LIST[0], HEX_LIST[1]
+
+
+def test_count_rows_counts_per_day_hour_hex_and_pyramid_cell():
+    lat, lon = h3.h3_to_geo(A)
+    rows = [
+        (datetime(2025, 7, 7, 8, 5), lat, lon),
+        (datetime(2025, 7, 7, 8, 50), lat, lon),
+        (datetime(2025, 7, 7, 9, 0), None, None),  # counted in the totals only
+        (datetime(2025, 7, 8, 0, 0), 0.0, 0.0),  # outside HEX_LIST and NYC
+    ]
+    daily, hourly, per_hex, cells = incremental_aggregate.count_rows(rows)
+
+    assert daily == {DAY: 3, date(2025, 7, 8): 1}
+    assert hourly == {(DAY, 8): 2, (DAY, 9): 1, (date(2025, 7, 8), 0): 1}
+    assert per_hex == {(DAY, 8, A): 2}
+    assert cells == {(res, DAY, 8, h3.geo_to_h3(lat, lon, res)): 2 for res in (6, 7, 8, 9)}
+
+
+# -----------------------------------------------------------------------------
+# Against MySQL (MYSQL_TEST_DB)
+# -----------------------------------------------------------------------------
+def add_driver(cursor, driver_id, hex_id, hour):
+    lat, lon = h3.h3_to_geo(hex_id)
+    cursor.execute(
+        "INSERT INTO drivers (driver_id, lat, lon, activity_at, created_at) VALUES (%s, %s, %s, %s, %s)",
+        (driver_id, lat, lon, datetime(2025, 7, 7, hour, 10), datetime(2025, 7, 7, hour, 10)),
+    )
+
+
+def counts(cursor, entity):
+    cursor.execute(
+        """
+        SELECT d.hex_id, c.hour, c.count FROM hex_counts c JOIN hex_dim d USING (hex_idx)
+        WHERE c.entity = %s ORDER BY d.hex_id, c.hour
+        """,
+        (entity,),
+    )
+    hex_rows = cursor.fetchall()
+    cursor.execute(
+        "SELECT resolution, cell, hour, count FROM hex_pyramid_counts WHERE entity = %s ORDER BY 1, 2, 3",
+        (entity,),
+    )
+    return hex_rows, cursor.fetchall()
+
+
+def test_fold_recounts_moved_drivers_like_a_rebuild(mysql_db):
+    from db_utils import update_driver_location
+
+    cursor = mysql_db.cursor()
+    add_driver(cursor, "d1", A, 8)
+    add_driver(cursor, "d2", A, 8)
+    mysql_db.commit()
+    assert incremental_aggregate.fold_source("drivers")["rows"] == 2
+
+    lat, lon = h3.h3_to_geo(B)
+    update_driver_location(mysql_db, "d1", lat, lon)
+    add_driver(cursor, "d3", B, 9)
+    mysql_db.commit()
+
+    result = incremental_aggregate.fold_source("drivers")
+    assert result["rows"] == 1
+    assert result["recounted_days"] == [DAY.isoformat()]
+    mysql_db.commit()
+    folded = counts(cursor, "drivers")
+    assert folded[0] == [(A, 8, 1), (B, 8, 1), (B, 9, 1)]
+
+    incremental_aggregate.bootstrap("drivers")
+    mysql_db.commit()
+    assert counts(cursor, "drivers") == folded
+
+
+def test_an_empty_source_is_not_rebuilt_on_every_fold(mysql_db):
+    assert incremental_aggregate.fold_source("riders")["rows"] == 0
+
+    cursor = mysql_db.cursor()
+    cursor.execute("INSERT INTO hex_counts (entity, report_date, hour, hex_idx, count) VALUES ('riders', %s, 8, 1, 5)",
+                   (DAY,))
+    mysql_db.commit()
+
+    incremental_aggregate.fold_source("riders")
+    mysql_db.commit()
+    cursor.execute("SELECT count FROM hex_counts WHERE entity = 'riders'")
+    assert cursor.fetchall() == [(5,)]  # watermark exists: no clear-and-refold
@@ -0,0 +1,61 @@
+# tests/test_job_queue.py
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("torch")
+h3 = pytest.importorskip("h3").h3
+
+import src.routes.job_queue as job_queue
+from zoneBalance.train import train_single_group
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Capture job_queue's SQL; the cancel flag decides the UPDATE's rowcount."""
+    executed = []
+    job = {"cancel_requested": False}
+
+    def execute(sql, params=()):
+        executed.append(" ".join(sql.split()))
+        return 0 if job["cancel_requested"] else 1
+
+    monkeypatch.setattr(job_queue, "_execute", execute)
+    monkeypatch.setattr(job_queue, "get_job", lambda job_id: pytest.fail("progress must not read the job back"))
+    return executed, job
+
+
+def test_progress_is_one_update_that_sees_the_cancel_flag(statements):
+    executed, job = statements
+    ctx = job_queue.JobContext("job-1")
+
+    ctx.progress(1, 10, "first")
+    assert len(executed) == 1
+    assert "cancel_requested = 0" in executed[0]
+    assert "progress_at = NOW(6)" in executed[0]
+
+    job["cancel_requested"] = True
+    with pytest.raises(job_queue.JobCancelled):
+        ctx.progress(2, 10)
+    assert len(executed) == 2
+
+
+def test_training_stops_at_the_episode_after_cancel(statements):
+    _, job = statements
+    ctx = job_queue.JobContext("job-1")
+    origin = h3.geo_to_h3(40.7580, -73.9855, 7)
+    zones = [origin] + sorted(h3.hex_ring(origin, 1))[:2]
+    group_json = {"group_1": {"hexes": [
+        {"hex_id": hex_id, "riders": riders, "drivers": drivers}
+        for hex_id, riders, drivers in zip(zones, (6, 0, 2), (0, 5, 3))
+    ]}}
+    episodes = []
+
+    def on_episode(done, total):
+        episodes.append(done)
+        if done == 3:
+            job["cancel_requested"] = True  # POST /jobs/{id}/cancel mid-training
+        ctx.progress(done, total)
+
+    with pytest.raises(job_queue.JobCancelled):
+        train_single_group(group_json, "1", neighbour_k=1, on_episode=on_episode)
+    assert episodes == [1, 2, 3]
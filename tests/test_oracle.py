@@ -0,0 +1,51 @@
+# tests/test_oracle.py
+import itertools
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+h3 = pytest.importorskip("h3").h3
+
+from zoneBalance.helpers import hex_distance_matrix
+from zoneBalance.oracle import Oracle
+
+
+def brute_force_cost(supply, demand, cost):
+    """Cheapest integral plan shipping min(total supply, total demand), by enumeration."""
+    n_s, n_d = len(supply), len(demand)
+    ship = min(sum(supply), sum(demand))
+    best = None
+    for flat in itertools.product(range(max(supply) + 1), repeat=n_s * n_d):
+        x = np.array(flat).reshape(n_s, n_d)
+        if x.sum() != ship or (x.sum(axis=1) > supply).any() or (x.sum(axis=0) > demand).any():
+            continue
+        total = float((x * cost).sum())
+        best = total if best is None else min(best, total)
+    return best
+
+
+@pytest.mark.parametrize("supply, demand", [([3, 1], [2, 2]), ([2, 2], [1, 1]), ([1, 1], [3, 1])])
+def test_min_cost_transport_matches_brute_force(supply, demand):
+    cost = np.array([[1.0, 4.0], [2.0, 1.0]])
+    flow = Oracle.min_cost_transport(supply, demand, cost)
+
+    assert flow.dtype.kind == "i"
+    assert (flow >= 0).all()
+    assert (flow.sum(axis=1) <= supply).all()
+    assert (flow.sum(axis=0) <= demand).all()
+    assert flow.sum() == min(sum(supply), sum(demand))
+    assert (flow * cost).sum() == pytest.approx(brute_force_cost(supply, demand, cost))
+
+
+def test_hex_distance_matrix_counts_grid_steps():
+    origin = h3.geo_to_h3(40.7580, -73.9855, 8)
+    ring1 = sorted(h3.hex_ring(origin, 1))
+    ring2 = sorted(h3.hex_ring(origin, 2))
+
+    cost = hex_distance_matrix([origin], [origin] + ring1 + ring2)
+
+    assert cost.shape == (1, 1 + len(ring1) + len(ring2))
+    assert cost[0, 0] == 0
+    assert (cost[0, 1:1 + len(ring1)] == 1).all()
+    assert (cost[0, 1 + len(ring1):] == 2).all()
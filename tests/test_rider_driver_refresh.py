@@ -0,0 +1,76 @@
+# tests/test_rider_driver_refresh.py
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("aiomysql")
+pytest.importorskip("httpx")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import src.routes.getDailyHrly_rider_drvr as rider_driver
+import src.routes.job_queue as job_queue
+from src.routes import jobs
+
+
+class FakeContext:
+    def __init__(self):
+        self.calls = []
+
+    def progress(self, done, total=None, message=None):
+        self.calls.append((done, total, message))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    submitted = []
+    folds = []
+
+    def submit(kind, fn, params=None, invalidates=()):
+        submitted.append((kind, fn, params, tuple(invalidates)))
+        return "job-1"
+
+    def fold_all(sources, rebuild=False):
+        folds.append((tuple(sources), rebuild))
+        return {s: {"rows": 3, "last_id": 9, "days": ["2025-07-07"]} for s in sources}
+
+    monkeypatch.setattr(job_queue, "submit", submit)
+    monkeypatch.setattr(rider_driver, "fold_all", fold_all)
+    monkeypatch.setattr(rider_driver, "invalidate", lambda *ns: None)
+    monkeypatch.setattr(rider_driver, "refresh_if_stale",
+                        lambda sources: {s: {"rows": 0, "last_id": 9, "days": []} for s in sources})
+
+    app = FastAPI()
+    app.include_router(rider_driver.router)
+    app.include_router(jobs.router, prefix="/jobs")
+    return TestClient(app), submitted, folds
+
+
+def test_rebuild_runs_as_a_job(client):
+    client, submitted, folds = client
+
+    response = client.post("/rider-driver/refresh", params={"rebuild": "true"})
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "job-1"
+    assert response.headers["Location"].endswith("/jobs/job-1")
+    assert folds == []  # nothing was rebuilt inside the request
+
+    kind, fn, params, invalidates = submitted[0]
+    assert kind == "rebuild_counts"
+    ctx = FakeContext()
+    result = fn(ctx)
+    assert folds == [(("riders",), True), (("drivers",), True)]
+    assert [c[:2] for c in ctx.calls] == [(0, 2), (1, 2)]
+    assert result["drivers"] == {"folded_rows": 3, "last_id": 9, "days": ["2025-07-07"]}
+    assert invalidates == rider_driver.AGGREGATE_NAMESPACES
+
+
+def test_incremental_refresh_stays_synchronous(client):
+    client, submitted, _ = client
+
+    response = client.post("/rider-driver/refresh")
+
+    assert response.status_code == 200
+    assert response.json()["riders"] == {"folded_rows": 0, "last_id": 9, "days": []}
+    assert submitted == []
@@ -0,0 +1,51 @@
+# tests/test_rl_policy.py
+import numpy as np
+
+from rl_policy import Policy, categorical_sample, n_hex, n_options
+
+
+def test_categorical_sample_matches_the_distribution():
+    np.random.seed(0)
+    probs = np.array([[0.1, 0.0, 0.6, 0.3], [0.0, 0.0, 0.0, 1.0]])
+    draws = categorical_sample(np.broadcast_to(probs, (20000,) + probs.shape))
+
+    assert draws.shape == (20000, 2)
+    freq = np.stack([np.bincount(draws[:, row], minlength=4) / len(draws) for row in range(2)])
+    np.testing.assert_allclose(freq, probs, atol=0.01)
+    assert (draws[:, 1] == 3).all()  # zero-probability options are never drawn
+
+
+def test_categorical_sample_agrees_with_np_random_choice():
+    """Same distribution as the per-hex np.random.choice loop it replaced."""
+    rng = np.random.default_rng(1)
+    probs = rng.dirichlet(np.ones(n_options), size=n_hex)
+
+    np.random.seed(2)
+    batched = categorical_sample(np.broadcast_to(probs, (5000,) + probs.shape))
+    np.random.seed(3)
+    looped = np.array([[np.random.choice(n_options, p=p) for p in probs] for _ in range(5000)])
+
+    for i in range(n_hex):
+        a = np.bincount(batched[:, i], minlength=n_options) / 5000
+        b = np.bincount(looped[:, i], minlength=n_options) / 5000
+        np.testing.assert_allclose(a, b, atol=0.04)
+
+
+def test_sample_batch_is_consistent_with_single_samples():
+    policy = Policy(state_dim=4 * n_hex)
+    states = np.random.default_rng(4).normal(size=(3, 4 * n_hex)).astype(np.float32)
+
+    probs, _, _ = policy.forward_batch(states)
+    for b in range(3):
+        single, _, _ = policy.forward(states[b])
+        np.testing.assert_allclose(probs[b], single, rtol=1e-12)
+
+    caps, logp, _, _, _ = policy.sample_batch(states)
+    assert caps.shape == (3, n_hex)
+    assert ((0 <= caps) & (caps < n_options)).all()
+    expected = np.log(np.take_along_axis(probs, caps[..., None], axis=2)[..., 0] + 1e-12).sum(axis=1)
+    np.testing.assert_allclose(logp, expected)
+
+    caps, logp, _, _, _, chosen = policy.sample(states[0], force_random=True)
+    assert len(caps) == n_hex and caps == chosen
+    assert isinstance(logp, float)
@@ -0,0 +1,56 @@
+# tests/test_transport.py
+import numpy as np
+import pytest
+
+nx = pytest.importorskip("networkx")
+
+from transport import TransportSolver, min_cost_transport
+
+
+def networkx_cost(supply, demand, cost):
+    """Optimal cost from the networkx max-flow min-cost graph the solver replaced."""
+    G = nx.DiGraph()
+    for i, amt in enumerate(supply):
+        G.add_edge("source", ("s", i), capacity=int(amt), weight=0)
+    for j, need in enumerate(demand):
+        G.add_edge(("d", j), "sink", capacity=int(need), weight=0)
+    for i in range(len(supply)):
+        for j in range(len(demand)):
+            G.add_edge(("s", i), ("d", j), capacity=9999, weight=int(cost[i, j]))
+    flow = nx.max_flow_min_cost(G, "source", "sink")
+    return nx.cost_of_flow(G, flow)
+
+
+def test_min_cost_transport_matches_networkx():
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        n_s, n_d = rng.integers(1, 6, size=2)
+        supply = rng.integers(0, 6, size=n_s)
+        demand = rng.integers(0, 6, size=n_d)
+        cost = rng.integers(0, 50, size=(n_s, n_d))
+
+        flow = min_cost_transport(supply, demand, cost)
+
+        assert (flow >= 0).all()
+        assert (flow.sum(axis=1) <= supply).all()
+        assert (flow.sum(axis=0) <= demand).all()
+        assert flow.sum() == min(supply.sum(), demand.sum())
+        assert int((flow * cost).sum()) == networkx_cost(supply, demand, cost)
+
+
+def test_solver_applies_caps_and_caches_states():
+    dist = np.array([[0, 1, 5], [1, 0, 2], [5, 2, 0]])
+    solver = TransportSolver(dist)
+    riders = [0, 3, 4]
+    drivers = [5, 1, 1]
+
+    moves = solver.solve(riders, drivers, caps=[2, 0, 0])
+    assert sum(m for _, _, m in moves) == 2  # hex 0 may ship only 2 of its 5 spare drivers
+    assert moves == [(0, 1, 2)]  # the nearer deficit is served first
+
+    assert solver.solve(riders, drivers, caps=[2, 0, 0]) == moves
+    assert (solver.hits, solver.misses) == (1, 1)
+
+    uncapped = solver.solve(riders, drivers, caps=[5, 0, 0])
+    assert sorted(uncapped) == [(0, 1, 2), (0, 2, 3)]
+    assert solver.misses == 2
@@ -0,0 +1,76 @@
+# tests/test_trip_summary.py
+import json
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import trip_summary
+from trip_summary import TripSummaryAccumulator, summary_row
+
+DAY = date(2025, 7, 7)
+
+
+def test_cancelled_counts_cancellation_reason_only():
+    acc = TripSummaryAccumulator()
+    acc.add(DAY, cancellation_reason=None, cancel_attempts=0, wait_time_min=4.0, fare=10.0, pickup_distance_km=1.0)
+    acc.add(DAY, cancellation_reason=None, cancel_attempts=2, wait_time_min=6.0, fare=20.0, pickup_distance_km=2.0)
+    acc.add(DAY, cancellation_reason="rider", cancel_attempts=1, wait_time_min=None, fare=None, pickup_distance_km=None)
+
+    row = summary_row(acc.days[DAY])
+    assert row["total_trips"] == 3
+    assert row["completed_trips"] == 2
+    assert row["cancelled_trips"] == 1  # an attempt alone does not cancel the trip
+    assert row["trips_with_cancel_attempts"] == 2
+    assert row["avg_wait_min"] == 5.0
+    assert row["avg_fare"] == 15.0
+    assert row["p95_pickup_distance_km"] == 2.05
+
+
+# -----------------------------------------------------------------------------
+# Against MySQL (MYSQL_TEST_DB)
+# -----------------------------------------------------------------------------
+def add_trip(cursor, trip_id, reason=None, attempts=0):
+    cursor.execute(
+        """
+        INSERT INTO trips (trip_id, start_at, wait_time_min, fare, pickup_distance_km,
+                           cancellation_reason, meta)
+        VALUES (%s, %s, 5, 12, 1.0, %s, %s)
+        """,
+        (trip_id, datetime(2025, 7, 7, 9), reason, json.dumps({"cancellation_attempts": [{}] * attempts})),
+    )
+
+
+def summary_rows(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT report_date, cancelled_trips, summary_version FROM trip_daily_summary")
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.commit()
+    return rows
+
+
+def test_reads_count_missing_days_without_writing(mysql_db, monkeypatch):
+    monkeypatch.setattr(trip_summary, "SUMMARY_TABLE_READY", False)
+    cursor = mysql_db.cursor()
+    add_trip(cursor, "t1")
+    add_trip(cursor, "t2", attempts=1)
+    add_trip(cursor, "t3", reason="driver", attempts=1)
+    mysql_db.commit()
+
+    served = trip_summary.read_days(mysql_db, [DAY, date(2030, 1, 1)])
+    assert served[DAY]["total_trips"] == 3
+    assert served[DAY]["cancelled_trips"] == 1
+    assert served[date(2030, 1, 1)]["total_trips"] == 0
+    assert summary_rows(mysql_db) == []
+
+    # A row from an older definition is bypassed on read, rebuilt by the job
+    trip_summary.rebuild_days(mysql_db, [DAY])
+    cursor.execute("UPDATE trip_daily_summary SET cancelled_trips = 2, summary_version = 0")
+    mysql_db.commit()
+    assert trip_summary.read_days(mysql_db, [DAY])[DAY]["cancelled_trips"] == 1
+
+    assert trip_summary.rebuild_stale_days(mysql_db) == [DAY]
+    assert summary_rows(mysql_db) == [(DAY, 1, trip_summary.SUMMARY_VERSION)]
+    cursor.close()
@@ -6,13 +6,63 @@ import torch.optim as optim
 from collections import deque
 import random
 
+class EdgeQNetwork(nn.Module):
+    """
+    Graph-aware Q head for a sparse (from, to) action list.
+
+    A shared trunk embeds every zone, and Q(from, to) is the dot product of
+    the source and destination embeddings plus a per-edge bias. The Q
+    output is one value per allowed edge instead of zones², but the
+    trunk's last layer still emits state_size * embed_dim values, so the
+    network keeps growing linearly with the number of zones (hidden *
+    zones * embed_dim weights) rather than staying fixed-size.
+    """
+    def __init__(self, state_size, action_from, action_to, hidden=256, embed_dim=16):
+        super().__init__()
+        self.state_size = state_size
+        self.embed_dim = embed_dim
+        self.register_buffer("action_from", torch.as_tensor(action_from, dtype=torch.long))
+        self.register_buffer("action_to", torch.as_tensor(action_to, dtype=torch.long))
+        self.trunk = nn.Sequential(
+            nn.Linear(state_size, hidden),
+            nn.ReLU(),
+            nn.Linear(hidden, hidden),
+            nn.ReLU(),
+            nn.Linear(hidden, state_size * embed_dim)
+        )
+        self.src_proj = nn.Linear(embed_dim, embed_dim)
+        self.dst_proj = nn.Linear(embed_dim, embed_dim)
+        self.edge_bias = nn.Parameter(torch.zeros(len(action_from)))
+
+    def forward(self, x):
+        z = self.trunk(x).view(-1, self.state_size, self.embed_dim)
+        src = self.src_proj(z)[:, self.action_from]
+        dst = self.dst_proj(z)[:, self.action_to]
+        return (src * dst).sum(dim=-1) + self.edge_bias
+
+
 class DQNAgent:
     def __init__(self, state_size, lr=1e-3, gamma=0.95,
                  epsilon=1.0, epsilon_min=0.05, epsilon_decay=0.995,
-                 memory_size=20000, batch_size=128, target_update_freq=200):
+                 memory_size=20000, batch_size=128, target_update_freq=200,
+                 action_pairs=None):
+        """
+        action_pairs: optional list of allowed (from_zone, to_zone) moves, e.g.
+        from helpers.build_neighbour_actions. When given, the agent uses a
+        compact action index over those pairs with an EdgeQNetwork head;
+        otherwise every ordered pair is an action (state_size² outputs).
+        """
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.state_size = state_size
-        self.action_size = state_size * state_size
+        self.sparse = action_pairs is not None
+        if self.sparse:
+            pairs = np.asarray(action_pairs, dtype=np.int64).reshape(-1, 2)
+            self.action_from, self.action_to = pairs[:, 0], pairs[:, 1]
+            self.pair_to_idx = {(int(f), int(t)): i for i, (f, t) in enumerate(pairs)}
+        else:
+            dense = np.arange(state_size * state_size)
+            self.action_from, self.action_to = dense // state_size, dense % state_size
+        self.action_size = len(self.action_from)
         self.lr = lr
         self.gamma = gamma
         self.epsilon = epsilon
@@ -30,6 +80,8 @@ class DQNAgent:
         self.loss_fn = nn.MSELoss()
 
     def build_model(self):
+        if self.sparse:
+            return EdgeQNetwork(self.state_size, self.action_from, self.action_to)
         return nn.Sequential(
             nn.Linear(self.state_size, 256),
             nn.ReLU(),
@@ -40,23 +92,17 @@ class DQNAgent:
 
     # ------------------ Action mapping ------------------
     def ft_to_idx(self, f, t):
+        if self.sparse:
+            return self.pair_to_idx[(int(f), int(t))]
         return f * self.state_size + t
 
     def idx_to_ft(self, idx):
-        f = idx // self.state_size
-        t = idx % self.state_size
-        return int(f), int(t)
+        return int(self.action_from[idx]), int(self.action_to[idx])
 
     # ------------------ Mask invalid actions ------------------
     def action_mask(self, state):
-        mask = np.zeros(self.action_size, dtype=bool)
-        surplus = np.where(state < 0)[0]
-        deficit = np.where(state > 0)[0]
-        for f in surplus:
-            for t in deficit:
-                if f != t:
-                    mask[self.ft_to_idx(f, t)] = True
-        return mask
+        # Works for a single state (N,) or a batch (B, N)
+        return (state[..., self.action_from] < 0) & (state[..., self.action_to] > 0)
 
     # ------------------ Choose action ------------------
     def act(self, state):
@@ -110,17 +156,7 @@ class DQNAgent:
 
         with torch.no_grad():
             next_q_values = self.target_model(next_states_t)
-            B = next_q_values.shape[0]
-            mask = torch.zeros_like(next_q_values, dtype=torch.bool, device=self.device)
-            N = self.state_size
-            for i in range(B):
-                ns = next_states[i]
-                surplus = np.where(ns < 0)[0]
-                deficit = np.where(ns > 0)[0]
-                for f in surplus:
-                    for t in deficit:
-                        if f != t:
-                            mask[i, self.ft_to_idx(f, t)] = True
+            mask = torch.from_numpy(self.action_mask(next_states)).to(self.device)
             next_q_values[~mask] = -1e9
             next_max_q, _ = next_q_values.max(dim=1)
             target_q = rewards_t + (1 - dones_t.float()) * (self.gamma * next_max_q)
@@ -3,6 +3,8 @@ import numpy as np
 import json,uuid
 from h3 import h3
 
+EARTH_RADIUS_KM = 6371.007180918475  # h3lib's authalic radius, as used by h3.point_dist
+
 def generate_dummy_driver_id():
     return uuid.uuid4().hex[:8]  # e.g. "1bd20e76"
 
@@ -64,6 +66,61 @@ def get_cross_group_adjacent_hexes(current_group_hexes, all_groups, hex_set, rid
     return edge_hex_info, adjacent_hex_data, adjacent_hex_list
 
 
+def build_neighbour_actions(zone_hex_ids, k=1):
+    """
+    Allowed relocation moves restricted to each zone's k-ring.
+
+    Parameters:
+    - zone_hex_ids: H3 id per zone index (current group followed by adjacent hexes)
+    - k: ring radius; a move f -> t is allowed when t lies within k_ring(f, k)
+
+    Returns:
+    - sorted list of (from_zone, to_zone) index pairs, f != t
+    """
+    zone_index = {h: i for i, h in enumerate(zone_hex_ids)}
+    pairs = []
+    for f, hex_id in enumerate(zone_hex_ids):
+        for neighbor in h3.k_ring(hex_id, k):
+            t = zone_index.get(neighbor)
+            if t is not None and t != f:
+                pairs.append((f, t))
+    return sorted(pairs)
+
+
+def hex_distance_matrix(from_hexes, to_hexes):
+    """
+    Travel cost between hex centroids, measured in H3 grid steps.
+
+    Uses h3_distance where it is defined and falls back to the haversine
+    distance between centroids divided by the centre-to-centre spacing
+    where h3 cannot compute a grid distance (e.g. across pentagons or
+    between cells too far apart).
+
+    Returns:
+    - float matrix of shape (len(from_hexes), len(to_hexes))
+    """
+    cost = np.full((len(from_hexes), len(to_hexes)), -1.0)
+    for i, a in enumerate(from_hexes):
+        for j, b in enumerate(to_hexes):
+            try:
+                cost[i, j] = h3.h3_distance(a, b)
+            except ValueError:  # h3's H3ValueError: no grid distance between a and b
+                pass
+
+    missing = cost < 0
+    if missing.any():
+        src = np.radians([h3.h3_to_geo(h) for h in from_hexes])
+        dst = np.radians([h3.h3_to_geo(h) for h in to_hexes])
+        dlat = dst[None, :, 0] - src[:, None, 0]
+        dlng = dst[None, :, 1] - src[:, None, 1]
+        a = np.sin(dlat / 2) ** 2 + np.cos(src[:, None, 0]) * np.cos(dst[None, :, 0]) * np.sin(dlng / 2) ** 2
+        km = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+        res = np.array([h3.h3_get_resolution(h) for h in from_hexes])
+        spacing_km = np.sqrt(3) * np.array([h3.edge_length(r, unit="km") for r in res])
+        cost[missing] = (km / spacing_km[:, None])[missing]
+    return cost
+
+
 def performance_score(final_balance, riders, weight_perfect=0.7):
     """
     Calculate performance score of a final driver distribution.
@@ -1,28 +1,77 @@
 # oracle.py
 import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix
+
+from zoneBalance.helpers import hex_distance_matrix
 
 class Oracle:
     @staticmethod
-    def final_balance(env):
+    def min_cost_transport(supply, demand, cost):
+        """
+        Solve the surplus -> deficit transport LP exactly.
+
+        supply[i] drivers can leave surplus zone i, demand[j] drivers are needed
+        in deficit zone j and cost[i, j] is the travel cost per driver. The
+        smaller side is shipped in full, the larger side is capped. Returns an
+        integer flow matrix of shape (len(supply), len(demand)).
+        """
+        supply = np.asarray(supply, dtype=float)
+        demand = np.asarray(demand, dtype=float)
+        n_s, n_d = len(supply), len(demand)
+
+        # x[i, j] flattened row-major -> column i * n_d + j
+        cols = np.arange(n_s * n_d)
+        row_sums = coo_matrix((np.ones(n_s * n_d), (cols // n_d, cols)), shape=(n_s, n_s * n_d))
+        col_sums = coo_matrix((np.ones(n_s * n_d), (cols % n_d, cols)), shape=(n_d, n_s * n_d))
+
+        if supply.sum() <= demand.sum():
+            A_eq, b_eq, A_ub, b_ub = row_sums, supply, col_sums, demand
+        else:
+            A_eq, b_eq, A_ub, b_ub = col_sums, demand, row_sums, supply
+
+        # Dual simplex returns a vertex, which is integral for integer supply/demand
+        res = linprog(
+            np.asarray(cost, dtype=float).ravel(),
+            A_ub=A_ub.tocsr(), b_ub=b_ub,
+            A_eq=A_eq.tocsr(), b_eq=b_eq,
+            bounds=(0, None), method="highs-ds",
+        )
+        if not res.success:
+            raise RuntimeError(f"Oracle transport LP failed: {res.message}")
+
+        return np.rint(res.x).astype(int).reshape(n_s, n_d)
+
+    @staticmethod
+    def final_balance(env, hex_ids=None):
+        """
+        Minimum-cost rebalancing of env in a single solve.
+
+        hex_ids maps zone index -> H3 id (current group followed by adjacent
+        hexes) and is used to price moves by grid distance. Without it every
+        move costs the same and only the number of drivers moved matters.
+        """
         env.dispatch_summary = []
-        while True:
-            surplus_idx = np.where(env.state < 0)[0]
-            deficit_idx = np.where(env.state > 0)[0]
-            if len(surplus_idx) == 0 or len(deficit_idx) == 0:
-                break
-            moved = False
-            for s in surplus_idx:
-                for d in deficit_idx:
-                    if s == d:
-                        continue
-                    if env.state[s] < 0 and env.state[d] > 0:
-                        num = min(-env.state[s], env.state[d])
-                        if num > 0:
-                            env.drivers[s] -= num
-                            env.drivers[d] += num
-                            env.dispatch_summary.append((int(s), int(d), int(num)))
-                            moved = True
-                            env.state = env.riders - env.drivers
-            if not moved:
-                break
+        env.state = env.riders - env.drivers
+        surplus_idx = np.where(env.state < 0)[0]
+        deficit_idx = np.where(env.state > 0)[0]
+        if len(surplus_idx) == 0 or len(deficit_idx) == 0:
+            return env.state, env.drivers, env.dispatch_summary
+
+        if hex_ids is not None:
+            cost = hex_distance_matrix(
+                [hex_ids[s] for s in surplus_idx],
+                [hex_ids[d] for d in deficit_idx]
+            )
+        else:
+            cost = np.ones((len(surplus_idx), len(deficit_idx)))
+
+        flow = Oracle.min_cost_transport(-env.state[surplus_idx], env.state[deficit_idx], cost)
+        for i, j in zip(*np.nonzero(flow)):
+            s, d, num = int(surplus_idx[i]), int(deficit_idx[j]), int(flow[i, j])
+            env.drivers[s] -= num
+            env.drivers[d] += num
+            env.dispatch_summary.append((s, d, num))
+
+        env.state = env.riders - env.drivers
         return env.state, env.drivers, env.dispatch_summary
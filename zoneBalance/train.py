@@ -3,7 +3,9 @@ import numpy as np
 import json
 from zoneBalance.dqn import DQNAgent
 from zoneBalance.oracle import Oracle
-from zoneBalance.helpers import performance_score, generate_json_output, get_cross_group_adjacent_hexes
+from zoneBalance.helpers import (
+    performance_score, generate_json_output, get_cross_group_adjacent_hexes, build_neighbour_actions
+)
 
 # import sys
 # import os
@@ -79,7 +81,8 @@ class MultiZoneEnv:
         self.prev_perfect = current_perfect
         return float(reward)
 
-def train_single_group(group_json, group_id, all_groups=None, hex_set=None, rider_counts=None, driver_counts=None):
+def train_single_group(group_json, group_id, all_groups=None, hex_set=None, rider_counts=None, driver_counts=None,
+                       neighbour_k=None, on_episode=None):
     """
     Train for a single group with support for cross-group balancing.
     
@@ -90,6 +93,10 @@ def train_single_group(group_json, group_id, all_groups=None, hex_set=None, ride
       - hex_set: set of all valid hex IDs
       - rider_counts: dict mapping hex_id -> rider count
       - driver_counts: dict mapping hex_id -> driver count
+      - neighbour_k: if set, restrict agent moves to each zone's k-ring neighbours
+        (sparse action space) instead of every zone pair
+      - on_episode: optional callback(done, total) after every episode, e.g. a
+        job's progress reporter; an exception it raises stops training
     """
     gid = f"group_{group_id}"
     
@@ -122,7 +129,10 @@ def train_single_group(group_json, group_id, all_groups=None, hex_set=None, ride
     )
     
     # Agent state size includes both current group and adjacent hexes
-    agent = DQNAgent(state_size=env.num_zones)
+    action_pairs = None
+    if neighbour_k is not None:
+        action_pairs = build_neighbour_actions(hex_ids + adjacent_hex_list, k=neighbour_k)
+    agent = DQNAgent(state_size=env.num_zones, action_pairs=action_pairs)
     episodes = 100
 
     best_agent_reward = -float('inf')
@@ -160,9 +170,13 @@ def train_single_group(group_json, group_id, all_groups=None, hex_set=None, ride
         if (e+1) % 50 == 0 or e == 0:
             print(f"Episode {e+1:04d} | Reward={agent_reward:7.2f} | Eps={agent.epsilon:.3f}")
 
+        if on_episode is not None:
+            on_episode(e + 1, episodes)
+
     # Calculate oracle results (only for current group)
+    # Min-cost-flow baseline priced by H3 grid distance over group + adjacent hexes
     env.reset()
-    oracle_state, oracle_final_drivers, oracle_moves = Oracle.final_balance(env)
+    oracle_state, oracle_final_drivers, oracle_moves = Oracle.final_balance(env, hex_ids=hex_ids + adjacent_hex_list)
     # Oracle also only considers current group
     oracle_state = oracle_state[:env.current_group_size] if len(oracle_state) > env.current_group_size else oracle_state
     oracle_final_drivers = oracle_final_drivers[:env.current_group_size] if len(oracle_final_drivers) > env.current_group_size else oracle_final_drivers